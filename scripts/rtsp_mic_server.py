@@ -18,9 +18,14 @@ import subprocess
 import sys
 import os
 import time
+import json
+import math
 import signal
 import argparse
 import logging
+import threading
+from array import array
+from collections import deque
 from typing import Optional
 import socket
 
@@ -31,9 +36,135 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class EdgeVAD:
+    """
+    Lightweight energy VAD for edge mode (pure Python, no numpy needed on
+    the device).
+
+    A frame is speech when its RMS clears an adaptive noise floor by
+    ``threshold_db`` (and an absolute ``min_rms``, in int16 units). Speech
+    starts after ``attack_frames`` such frames in a row and continues until
+    ``hangover`` seconds pass without one. The floor tracks quiet frames:
+    quickly downwards, slowly upwards.
+    """
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, frame_ms: int = 30,
+                 threshold_db: float = 9.0, min_rms: float = 150.0, attack_frames: int = 2,
+                 hangover: float = 0.6):
+        self.channels = channels
+        self.frame_samples = int(sample_rate * frame_ms / 1000) * channels
+        self.frame_bytes = self.frame_samples * 2
+        self.threshold_ratio = 10 ** (threshold_db / 20)
+        self.min_rms = min_rms
+        self.attack_frames = attack_frames
+        self.hangover_frames = max(1, int(hangover * 1000 / frame_ms))
+        self.noise_floor = None
+        self.in_speech = False
+        self._loud_run = 0
+        self._quiet_run = 0
+
+    def frame_rms(self, frame: bytes) -> float:
+        samples = array('h')
+        samples.frombytes(frame)
+        if sys.byteorder == 'big':
+            samples.byteswap()  # Capture is s16le
+        return math.sqrt(sum(x * x for x in samples) / max(1, len(samples)))
+
+    def process(self, frame: bytes) -> bool:
+        """Feed one frame; returns whether the stream is in speech after it"""
+        rms = self.frame_rms(frame)
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        loud = rms >= max(self.min_rms, self.noise_floor * self.threshold_ratio)
+        if loud:
+            self._loud_run += 1
+            self._quiet_run = 0
+        else:
+            self._loud_run = 0
+            self._quiet_run += 1
+            rate = 0.5 if rms < self.noise_floor else 0.02
+            self.noise_floor += rate * (rms - self.noise_floor)
+        if not self.in_speech and self._loud_run >= self.attack_frames:
+            self.in_speech = True
+        elif self.in_speech and self._quiet_run >= self.hangover_frames:
+            self.in_speech = False
+        return self.in_speech
+
+
+class EdgeGate:
+    """
+    Decides what the publisher forwards in edge mode.
+
+    Speech bursts are forwarded with ``preroll`` seconds of audio from
+    before the VAD triggered, so word onsets survive. When a burst ends a
+    silence marker follows: ``marker`` seconds of digital silence, so
+    endpointers on the server close the utterance. While the room is quiet,
+    only one silent frame is sent every ``keepalive`` seconds to keep the
+    RTSP session and readers alive. Keeps duty-cycle stats.
+    """
+
+    def __init__(self, vad: EdgeVAD, write, preroll: float = 0.3, marker: float = 1.0,
+                 keepalive: float = 2.0, frame_ms: int = 30, clock=time.monotonic):
+        self.vad = vad
+        self.write = write
+        self.frame_seconds = frame_ms / 1000
+        self.preroll = deque(maxlen=max(1, int(preroll / self.frame_seconds)))
+        self.silence_frame = bytes(vad.frame_bytes)
+        self.marker_frames = max(1, int(marker / self.frame_seconds))
+        self.keepalive = keepalive
+        self.clock = clock
+        self.last_write = clock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.frames_in = 0
+        self.frames_speech = 0
+        self.frames_sent = 0
+        self.bursts = 0
+
+    def _send(self, frame: bytes):
+        self.write(frame)
+        self.frames_sent += 1
+        self.last_write = self.clock()
+
+    def feed(self, frame: bytes):
+        was_speech = self.vad.in_speech
+        speech = self.vad.process(frame)
+        self.frames_in += 1
+        if speech:
+            self.frames_speech += 1
+            if not was_speech:
+                self.bursts += 1
+                while self.preroll:
+                    self._send(self.preroll.popleft())
+            self._send(frame)
+            return
+        self.preroll.append(frame)
+        if was_speech:
+            for _ in range(self.marker_frames):
+                self._send(self.silence_frame)
+        elif self.clock() - self.last_write >= self.keepalive:
+            self._send(self.silence_frame)
+
+    def stats(self) -> dict:
+        frames = max(1, self.frames_in)
+        return {
+            "seconds": round(self.frames_in * self.frame_seconds, 1),
+            "speech_duty_cycle": round(self.frames_speech / frames, 4),
+            "sent_duty_cycle": round(self.frames_sent / frames, 4),
+            "bursts": self.bursts,
+            "bytes_sent": self.frames_sent * self.vad.frame_bytes,
+            "bytes_continuous": self.frames_in * self.vad.frame_bytes,
+            "noise_floor_rms": round(self.vad.noise_floor or 0.0, 1),
+        }
+
+
 class AudioStreamingServer:
     def __init__(self, port: int = 8554, audio_device: str = "default", 
-                 sample_rate: int = 16000, channels: int = 1, use_udp: bool = False):
+                 sample_rate: int = 16000, channels: int = 1, use_udp: bool = False,
+                 edge_vad: bool = False, vad_threshold_db: float = 9.0, preroll: float = 0.3,
+                 hangover: float = 0.6, keepalive: float = 2.0, stats_interval: float = 60.0,
+                 stats_file: Optional[str] = None):
         self.port = port
         self.audio_device = audio_device
         self.sample_rate = sample_rate
@@ -41,6 +172,19 @@ class AudioStreamingServer:
         self.use_udp = use_udp
         self.ffmpeg_process: Optional[subprocess.Popen] = None
         self.running = False
+        # Edge mode: capture into Python, forward only speech bursts to the publisher ffmpeg
+        self.edge_vad = edge_vad
+        self.vad_threshold_db = vad_threshold_db
+        self.preroll = preroll
+        self.hangover = hangover
+        self.keepalive = keepalive
+        self.stats_interval = stats_interval
+        self.stats_file = stats_file
+        self.capture_process: Optional[subprocess.Popen] = None
+        self.gate_thread: Optional[threading.Thread] = None
+        self.gate: Optional[EdgeGate] = None
+        self.publisher_log: deque = deque(maxlen=20)  # Edge mode: last stderr lines of the publisher
+        self.publisher_drain: Optional[threading.Thread] = None
         
     def check_dependencies(self) -> bool:
         """Check if required dependencies are available"""
@@ -151,13 +295,29 @@ class AudioStreamingServer:
         except:
             pass
     
+    def build_capture_command(self) -> list:
+        """Edge mode: raw s16le microphone PCM on stdout for the VAD"""
+        return [
+            'ffmpeg', '-loglevel', 'error',
+            '-f', 'pulse',
+            '-i', self.audio_device,
+            '-ar', str(self.sample_rate),
+            '-ac', str(self.channels),
+            '-f', 's16le',
+            'pipe:1'
+        ]
+
     def build_ffmpeg_command(self) -> list:
         """Build the FFmpeg command for pushing audio to the RTSP server"""
+        if self.edge_vad:
+            # Publish whatever the edge gate forwards on stdin; warnings only, drained by a thread
+            source = ['-nostats', '-loglevel', 'warning', '-f', 's16le', '-ar', str(self.sample_rate), '-ac', str(self.channels), '-i', 'pipe:0']
+        else:
+            source = ['-f', 'pulse', '-i', self.audio_device]
         # This command sends the audio stream to the mediamtx RTSP server
         cmd = [
             'ffmpeg',
-            '-f', 'pulse',
-            '-i', self.audio_device,
+            *source,
             '-acodec', 'pcm_s16le',
             '-ar', str(self.sample_rate),
             '-ac', str(self.channels),
@@ -194,10 +354,16 @@ class AudioStreamingServer:
         
         self.ffmpeg_process = subprocess.Popen(
             self.build_ffmpeg_command(),
-            stdout=subprocess.PIPE,
+            stdin=subprocess.PIPE if self.edge_vad else None,
+            # In edge mode the process runs for hours; an undrained pipe would fill and stall the gate's writes
+            stdout=subprocess.DEVNULL if self.edge_vad else subprocess.PIPE,
             stderr=subprocess.PIPE,
-            universal_newlines=True
+            universal_newlines=not self.edge_vad
         )
+        if self.edge_vad:
+            self.publisher_drain = threading.Thread(target=self._drain_publisher_stderr, args=(self.ffmpeg_process,), daemon=True)
+            self.publisher_drain.start()
+            self.start_edge_gate()
         
         # Wait a moment for FFmpeg to connect to the RTSP server
         time.sleep(3)
@@ -207,12 +373,82 @@ class AudioStreamingServer:
             logger.info("✅ FFmpeg is successfully streaming to the RTSP server.")
             return True
         else:
-            stdout, stderr = self.ffmpeg_process.communicate()
+            stdout, stderr = self.publisher_output()
             logger.error("❌ FFmpeg failed to start")
             logger.error(f"Stdout: {stdout}")
             logger.error(f"Stderr: {stderr}")
             return False
     
+    def _drain_publisher_stderr(self, process: subprocess.Popen) -> None:
+        """Edge mode: keep reading the publisher's warnings (e.g. RTSP reconnects) so its pipe never fills"""
+        for line in iter(process.stderr.readline, b''):
+            text = line.decode('utf-8', errors='replace').strip()
+            if text:
+                self.publisher_log.append(text)
+                logger.warning(f"Publisher: {text}")
+
+    def publisher_output(self) -> tuple:
+        """(stdout, stderr) of the exited publisher ffmpeg, for error reports"""
+        if self.edge_vad:
+            # The drain thread owns stderr; report what it kept once it has read to EOF
+            self.ffmpeg_process.wait()
+            self.publisher_drain.join(timeout=1.0)
+            return "", "\n".join(self.publisher_log)
+        return self.ffmpeg_process.communicate()
+
+    def start_edge_gate(self) -> None:
+        """Start the capture ffmpeg and the thread that forwards only speech to the publisher"""
+        logger.info(f"🗣️  Edge VAD on: forwarding speech bursts only "
+                    f"(threshold {self.vad_threshold_db} dB over noise, pre-roll {self.preroll}s)")
+        vad = EdgeVAD(self.sample_rate, self.channels, threshold_db=self.vad_threshold_db, hangover=self.hangover)
+        publisher = self.ffmpeg_process
+
+        def write(frame: bytes) -> None:
+            publisher.stdin.write(frame)
+            publisher.stdin.flush()
+
+        self.gate = EdgeGate(vad, write, preroll=self.preroll, keepalive=self.keepalive)
+        self.capture_process = subprocess.Popen(
+            self.build_capture_command(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self.gate_thread = threading.Thread(target=self._run_edge_gate, daemon=True)
+        self.gate_thread.start()
+
+    def _run_edge_gate(self) -> None:
+        stream = self.capture_process.stdout
+        frame_bytes = self.gate.vad.frame_bytes
+        next_report = time.monotonic() + self.stats_interval
+        try:
+            while True:
+                frame = stream.read(frame_bytes)
+                if not frame or len(frame) < frame_bytes:
+                    logger.error("❌ Microphone capture ended")
+                    break
+                self.gate.feed(frame)
+                if time.monotonic() >= next_report:
+                    self.report_duty_cycle()
+                    next_report = time.monotonic() + self.stats_interval
+        except (BrokenPipeError, ValueError, OSError) as e:
+            logger.error(f"❌ Edge gate stopped: {e}")
+
+    def report_duty_cycle(self) -> None:
+        """Log (and optionally append to --stats-file) this device's duty cycle since the last report"""
+        stats = self.gate.stats()
+        stats.update({"device": f"{socket.gethostname()}:{self.audio_device}", "time": time.time()})
+        saved = 1 - stats["bytes_sent"] / max(1, stats["bytes_continuous"])
+        logger.info(f"📊 {stats['device']}: speech {stats['speech_duty_cycle']:.1%} of {stats['seconds']:.0f}s "
+                    f"in {stats['bursts']} burst(s), sent {stats['bytes_sent'] / 1024:.0f} KB "
+                    f"({saved:.1%} less than continuous)")
+        if self.stats_file:
+            try:
+                with open(self.stats_file, 'a') as f:
+                    f.write(json.dumps(stats) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write stats to {self.stats_file}: {e}")
+        self.gate.reset_stats()
+
     def stop_server(self) -> None:
         """Stop the audio streaming server"""
         if not self.running:
@@ -220,6 +456,16 @@ class AudioStreamingServer:
         
         logger.info("🛑 Stopping audio streaming server...")
         
+        if self.capture_process:
+            self.capture_process.terminate()
+            try:
+                self.capture_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.capture_process.kill()
+            self.capture_process = None
+            if self.gate is not None and self.gate.frames_in:
+                self.report_duty_cycle()
+        
         if self.ffmpeg_process:
             try:
                 self.ffmpeg_process.terminate()
@@ -261,8 +507,11 @@ class AudioStreamingServer:
         try:
             # Monitor the FFmpeg process
             while self.running:
+                if self.capture_process and self.capture_process.poll() is not None:
+                    logger.error("❌ Microphone capture process died unexpectedly")
+                    break
                 if self.ffmpeg_process and self.ffmpeg_process.poll() is not None:
-                    stdout, stderr = self.ffmpeg_process.communicate()
+                    stdout, stderr = self.publisher_output()
                     logger.error("❌ FFmpeg process died unexpectedly")
                     logger.error(f"Stdout: {stdout}")
                     logger.error(f"Stderr: {stderr}")
@@ -328,6 +577,54 @@ Connect to Twin or ffplay using:
         help='List available audio devices and exit'
     )
     
+    parser.add_argument(
+        '--edge-vad',
+        action='store_true',
+        help='Only forward speech bursts (with pre-roll); send silence markers otherwise'
+    )
+    
+    parser.add_argument(
+        '--vad-threshold-db',
+        type=float,
+        default=9.0,
+        help='Edge VAD: dB above the adaptive noise floor that counts as speech (default: 9)'
+    )
+    
+    parser.add_argument(
+        '--preroll',
+        type=float,
+        default=0.3,
+        help='Edge VAD: seconds of audio forwarded from before speech onset (default: 0.3)'
+    )
+    
+    parser.add_argument(
+        '--hangover',
+        type=float,
+        default=0.6,
+        help='Edge VAD: seconds of quiet before a burst ends (default: 0.6)'
+    )
+    
+    parser.add_argument(
+        '--keepalive',
+        type=float,
+        default=2.0,
+        help='Edge VAD: seconds between silent keepalive frames while quiet (default: 2)'
+    )
+    
+    parser.add_argument(
+        '--stats-interval',
+        type=float,
+        default=60.0,
+        help='Edge VAD: seconds between duty-cycle reports (default: 60)'
+    )
+    
+    parser.add_argument(
+        '--stats-file',
+        type=str,
+        default=None,
+        help='Edge VAD: append duty-cycle reports to this file as JSON lines'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -344,7 +641,14 @@ Connect to Twin or ffplay using:
         port=args.port,
         audio_device=args.device,
         sample_rate=args.sample_rate,
-        channels=args.channels
+        channels=args.channels,
+        edge_vad=args.edge_vad,
+        vad_threshold_db=args.vad_threshold_db,
+        preroll=args.preroll,
+        hangover=args.hangover,
+        keepalive=args.keepalive,
+        stats_interval=args.stats_interval,
+        stats_file=args.stats_file
     )
     
     if args.list_devices:
@@ -30,6 +30,7 @@ setup(
     entry_points={
         'console_scripts': [
             'twin=twin.main:main',
+            'twin-kws=twin.audio.kws:main',
         ],
     },
     classifiers=[
@@ -0,0 +1,192 @@
+import time
+import asyncio
+import logging
+import dataclasses
+import numpy as np
+from ..audio.formats import to_float32
+from ..utils.metrics import get_metrics
+from .executor import get_transcription_executor
+
+logger = logging.getLogger('twin')
+
+MAX_CHUNK_SECONDS = 30.0  # Whisper's window; longer audio is decoded on its own
+
+
+def shift_segment(segment, offset):
+    """Copy of a faster-whisper segment with its timestamps moved by ``-offset`` seconds"""
+    if dataclasses.is_dataclass(segment):
+        return dataclasses.replace(segment, start=segment.start - offset, end=segment.end - offset)
+    return segment._replace(start=segment.start - offset, end=segment.end - offset)
+
+
+class BatchItem:
+    def __init__(self, audio, source, future):
+        self.audio = audio
+        self.source = source
+        self.future = future
+        self.submitted = time.monotonic()
+
+
+class TranscriptionBroker:
+    """
+    Batches segments from all sources into one faster-whisper decode.
+
+    Sources ``submit`` a finished segment and await its own segments back.
+    The first pending segment opens a batch that is flushed when it holds
+    ``batch_size`` segments or ``max_wait`` seconds have passed. The batch is
+    concatenated and decoded by the batched pipeline with one clip per
+    segment, then each output segment is routed back to the source whose
+    clip it falls in, with timestamps relative to that source's audio.
+    Decodes go through the transcription executor, so a batch can fill while
+    the previous one is being decoded.
+    """
+
+    def __init__(self, model, batch_size=4, max_wait=0.15, language="en", sample_rate=16000, pipeline=None):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.language = language
+        self.sample_rate = sample_rate
+        self._pipeline = pipeline
+        self._queue = None
+        self._loop = None
+        self._task = None
+        self.batches = 0
+        self.segments = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            from faster_whisper import BatchedInferencePipeline  # Import only if needed
+            self._pipeline = BatchedInferencePipeline(model=self.model)
+        return self._pipeline
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._collect())
+            logger.info(f"Transcription broker started (batch {self.batch_size}, wait {self.max_wait * 1000:.0f} ms)")
+
+    async def submit(self, audio, source=None):
+        """Decode ``audio`` as part of the next batch; returns (segments, decode_seconds)"""
+        self._start()
+        item = BatchItem(audio, source, asyncio.get_running_loop().create_future())
+        await self._queue.put(item)
+        return await item.future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = batch[0].submitted + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch = [item for item in batch if not item.future.done()]  # Submitter was cancelled
+            if batch:
+                get_metrics().observe("transcribe.batch.wait_seconds", time.monotonic() - batch[0].submitted)
+                loop.create_task(self._run(batch))
+
+    async def _run(self, batch):
+        try:
+            results, seconds = await get_transcription_executor().run(self.decode_batch, [item.audio for item in batch])
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        for item, segments in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result((segments, seconds))
+
+    def decode_batch(self, audios):
+        """
+        Blocking batched decode; runs on a transcription worker. Returns one
+        segment list per input plus the wall time of the whole batch.
+        """
+        started = time.time()
+        audios = [to_float32(audio) for audio in audios]
+        max_samples = int(MAX_CHUNK_SECONDS * self.sample_rate)
+        batched = [i for i, audio in enumerate(audios) if 0 < audio.shape[0] <= max_samples]
+        results = [[] for _ in audios]
+
+        if batched:
+            offsets = np.cumsum([0] + [audios[i].shape[0] for i in batched])
+            clips = [{"start": int(offsets[n]), "end": int(offsets[n + 1])} for n in range(len(batched))]
+            segments, _ = self.pipeline.transcribe(
+                np.concatenate([audios[i] for i in batched]),
+                language=self.language,
+                batch_size=len(batched),
+                vad_filter=False,  # Inputs are already endpointed; each clip is one segment
+                clip_timestamps=clips,
+                suppress_tokens=[2, 3],
+                suppress_blank=True,
+                no_speech_threshold=0.1,
+            )
+            starts = offsets[:-1] / self.sample_rate
+            for segment in segments:
+                n = max(0, int(np.searchsorted(starts, segment.start + 1e-3, side='right')) - 1)
+                results[batched[n]].append(shift_segment(segment, starts[n]))
+
+        for i, audio in enumerate(audios):
+            if audio.shape[0] > max_samples:
+                segments, _ = self.pipeline.transcribe(audio, language=self.language, batch_size=self.batch_size)
+                results[i] = list(segments)
+
+        elapsed = time.time() - started
+        self._record(audios, elapsed)
+        return results, elapsed
+
+    def _record(self, audios, elapsed):
+        audio_seconds = sum(audio.shape[0] for audio in audios) / self.sample_rate
+        self.batches += 1
+        self.segments += len(audios)
+        self.audio_seconds += audio_seconds
+        self.decode_seconds += elapsed
+        metrics = get_metrics()
+        metrics.observe("transcribe.batch.size", len(audios))
+        metrics.observe("transcribe.batch.decode_seconds", elapsed)
+        if elapsed > 0:
+            metrics.observe("transcribe.batch.throughput", audio_seconds / elapsed)
+
+    def stats(self):
+        return {
+            "batch_size": self.batch_size,
+            "max_wait": self.max_wait,
+            "batches": self.batches,
+            "mean_batch": round(self.segments / self.batches, 2) if self.batches else 0.0,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "decode_seconds": round(self.decode_seconds, 1),
+            # Audio seconds transcribed per wall-clock second of decoding
+            "throughput": round(self.audio_seconds / self.decode_seconds, 2) if self.decode_seconds else 0.0,
+        }
+
+
+transcription_brokers = {}
+
+
+def get_transcription_broker(model):
+    """Get the transcription broker for ``model`` (one per model, so tiers never share a batch)"""
+    broker = transcription_brokers.get(id(model))
+    if broker is None:
+        from ..core import config
+        broker = TranscriptionBroker(
+            model,
+            batch_size=config.TRANSCRIBE_BATCH_SIZE,
+            max_wait=config.TRANSCRIBE_BATCH_WAIT,
+            language=config.LANGUAGE,
+            sample_rate=config.SAMPLE_RATE,
+        )
+        name = "transcribe_batch" if not transcription_brokers else f"transcribe_batch.{len(transcription_brokers)}"
+        transcription_brokers[id(model)] = broker
+        get_metrics().register_collector(name, broker.stats)
+    return broker
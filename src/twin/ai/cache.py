@@ -0,0 +1,95 @@
+import hashlib
+import logging
+from collections import OrderedDict
+import numpy as np
+from ..audio.formats import to_float32
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger('twin')
+
+
+def audio_fingerprint(audio_data, sample_rate=16000, block=0.02, step_db=3.0, floor_db=-60.0):
+    """
+    Cheap fingerprint of an audio window: its RMS envelope in ``block``-second
+    blocks, in dB quantized to ``step_db`` steps, hashed together with the
+    window's length. Only the content counts, not where the window sits in
+    the stream, so a repeat of the same audio later on matches too. Windows
+    that differ only by low-level noise or quantization share a fingerprint.
+    """
+    audio = to_float32(audio_data)
+    hop = max(1, int(block * sample_rate))
+    blocks = audio.shape[0] // hop
+    envelope = np.sqrt(np.mean(np.square(audio[:blocks * hop].reshape(blocks, hop)), axis=1)) if blocks else np.zeros(0)
+    levels = np.maximum(20 * np.log10(envelope + 1e-9), floor_db)
+    quantized = np.round((levels - floor_db) / step_db).astype(np.uint8)
+    digest = hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+    return (audio.shape[0], digest)
+
+
+class TranscriptionCache:
+    """
+    Bounded LRU of transcription results keyed by ``audio_fingerprint``.
+
+    A window that fingerprints the same as a recent one (an unchanged
+    buffer, or near-identical silence just above the gate) gets the earlier
+    result back without a decode. Each entry remembers what its decode cost,
+    so hits are reported as decode seconds saved.
+    """
+
+    def __init__(self, max_entries=64, step_db=3.0):
+        self.max_entries = max(1, max_entries)
+        self.step_db = step_db
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def key(self, audio_data, sample_rate=16000, namespace='local'):
+        """Fingerprint of ``audio_data`` tagged with ``namespace`` (the model that decodes it)"""
+        return (namespace,) + audio_fingerprint(audio_data, sample_rate, step_db=self.step_db)
+
+    def get(self, key):
+        """Cached result for ``key`` or None; counts the hit or miss"""
+        metrics = get_metrics()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            metrics.inc("transcribe.cache.misses")
+            return None
+        self._entries.move_to_end(key)
+        result, decode_seconds = entry
+        self.hits += 1
+        self.saved_seconds += decode_seconds
+        metrics.inc("transcribe.cache.hits")
+        metrics.observe("transcribe.cache.saved_seconds", decode_seconds)
+        return result
+
+    def put(self, key, result, decode_seconds):
+        self._entries[key] = (result, decode_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
+
+
+transcription_cache = None
+
+
+def get_transcription_cache():
+    """Get singleton transcription cache"""
+    global transcription_cache
+    if transcription_cache is None:
+        from ..core import config
+        transcription_cache = TranscriptionCache(max_entries=config.TRANSCRIBE_CACHE_SIZE, step_db=config.TRANSCRIBE_CACHE_STEP_DB)
+        get_metrics().register_collector("transcribe_cache", transcription_cache.stats)
+    return transcription_cache
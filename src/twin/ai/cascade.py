@@ -0,0 +1,127 @@
+import logging
+from ..audio.formats import to_float32
+from ..utils.metrics import get_metrics
+from .batching import shift_segment
+
+logger = logging.getLogger('twin')
+
+
+class DecodeCascade:
+    """
+    Two-pass decoding: every window is decoded cheaply (greedy or a small
+    beam) and only the segments Whisper itself is unsure about are decoded
+    again with a wider beam, and with ``fallback_model`` when one is given.
+
+    A segment is escalated when its ``avg_logprob`` is below
+    ``min_logprob``, its ``no_speech_prob`` above ``max_no_speech`` or its
+    ``compression_ratio`` above ``max_compression`` (repetition loops).
+    Flagged segments are re-decoded over their own span plus ``padding``
+    seconds, neighbouring spans merged, and replaced by the result.
+    """
+
+    def __init__(self, beam_size=1, fallback_beam=5, min_logprob=-0.7, max_no_speech=0.5, max_compression=2.4, padding=0.2):
+        self.beam_size = beam_size
+        self.fallback_beam = fallback_beam
+        self.min_logprob = min_logprob
+        self.max_no_speech = max_no_speech
+        self.max_compression = max_compression
+        self.padding = padding
+        self.windows = 0
+        self.escalated_windows = 0
+        self.cheap_segments = 0
+        self.escalated_segments = 0
+        self.cheap_seconds = 0.0
+        self.escalated_seconds = 0.0
+
+    def flag(self, segment):
+        """Why ``segment`` needs the expensive pass, or None"""
+        if segment.avg_logprob < self.min_logprob:
+            return "logprob"
+        if segment.no_speech_prob > self.max_no_speech:
+            return "no_speech"
+        if segment.compression_ratio > self.max_compression:
+            return "compression"
+        return None
+
+    def decode(self, decode, model, audio_data, language="en", fallback_model=None, sample_rate=16000):
+        """
+        Blocking cascade; runs on a transcription worker. ``decode`` is
+        ``decode_segments``. Returns (segments, seconds of both passes).
+        """
+        audio = to_float32(audio_data)
+        segments, cheap_seconds = decode(model, audio, language, beam_size=self.beam_size)
+        flagged = [(segment, self.flag(segment)) for segment in segments]
+        flagged = [(segment, reason) for segment, reason in flagged if reason]
+
+        cheap_count = len(segments) - len(flagged)
+        escalated_seconds = 0.0
+        if flagged:
+            spans = []
+            for segment, _ in flagged:
+                start, end = max(0.0, segment.start - self.padding), segment.end + self.padding
+                if spans and start <= spans[-1][1]:
+                    spans[-1][1] = max(spans[-1][1], end)
+                else:
+                    spans.append([start, end])
+            replacements = []
+            for start, end in spans:
+                first = int(start * sample_rate)
+                redecoded, seconds = decode(fallback_model or model, audio[first:int(end * sample_rate)], language, beam_size=self.fallback_beam)
+                escalated_seconds += seconds
+                replacements.extend(shift_segment(s, -first / sample_rate) for s in redecoded)
+            # Keep the confident segments outside the re-decoded spans, then merge in time order
+            kept = [s for s in segments if not any(start <= s.start and s.end <= end for start, end in spans)]
+            segments = sorted(kept + replacements, key=lambda s: s.start)
+
+        self._record(cheap_count, flagged, cheap_seconds, escalated_seconds)
+        return segments, cheap_seconds + escalated_seconds
+
+    def _record(self, cheap_count, flagged, cheap_seconds, escalated_seconds):
+        self.windows += 1
+        self.cheap_segments += cheap_count
+        self.cheap_seconds += cheap_seconds
+        metrics = get_metrics()
+        metrics.inc("transcribe.cascade.cheap_segments", cheap_count)
+        metrics.observe("transcribe.cascade.cheap_seconds", cheap_seconds)
+        if flagged:
+            self.escalated_windows += 1
+            self.escalated_segments += len(flagged)
+            self.escalated_seconds += escalated_seconds
+            metrics.inc("transcribe.cascade.escalated_segments", len(flagged))
+            metrics.observe("transcribe.cascade.escalated_seconds", escalated_seconds)
+            reasons = ", ".join(sorted({reason for _, reason in flagged}))
+            logger.info(f"[Cascade] {cheap_count} cheap, {len(flagged)} re-decoded ({reasons}): "
+                        f"cheap pass {cheap_seconds:.2f}s + beam {self.fallback_beam} {escalated_seconds:.2f}s")
+        else:
+            logger.debug(f"[Cascade] {cheap_count} segment(s) kept from the cheap pass ({cheap_seconds:.2f}s)")
+
+    def stats(self):
+        segments = self.cheap_segments + self.escalated_segments
+        return {
+            "windows": self.windows,
+            "escalated_windows": self.escalated_windows,
+            "cheap_segments": self.cheap_segments,
+            "escalated_segments": self.escalated_segments,
+            "escalation_rate": round(self.escalated_segments / segments, 3) if segments else 0.0,
+            "cheap_seconds": round(self.cheap_seconds, 2),
+            "escalated_seconds": round(self.escalated_seconds, 2),
+        }
+
+
+decode_cascade = None
+
+
+def get_decode_cascade():
+    """Get singleton decode cascade"""
+    global decode_cascade
+    if decode_cascade is None:
+        from ..core import config
+        decode_cascade = DecodeCascade(
+            beam_size=config.CASCADE_BEAM,
+            fallback_beam=config.CASCADE_FALLBACK_BEAM,
+            min_logprob=config.CASCADE_MIN_LOGPROB,
+            max_no_speech=config.CASCADE_MAX_NO_SPEECH,
+            max_compression=config.CASCADE_MAX_COMPRESSION,
+        )
+        get_metrics().register_collector("transcribe_cascade", decode_cascade.stats)
+    return decode_cascade
@@ -0,0 +1,146 @@
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger('twin')
+
+EXECUTOR_POLICIES = ('block', 'drop-newest', 'drop-oldest')
+
+
+class TranscriptionDropped(Exception):
+    """A transcription job was shed because the queue was full"""
+
+
+class TranscriptionJob:
+    def __init__(self, fn, args, kwargs, future, source):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.source = source
+        self.enqueued = time.monotonic()
+
+
+class TranscriptionExecutor:
+    """
+    Runs blocking Whisper work off the event loop.
+
+    Jobs wait in a bounded asyncio queue and ``workers`` dispatcher tasks
+    hand them to a dedicated thread pool of the same size, so at most
+    ``workers`` decodes run at once and all of them share one model
+    (CTranslate2 releases the GIL while decoding). When the queue is full,
+    ``policy`` decides: 'block' makes the submitting source wait,
+    'drop-newest' rejects the new job and 'drop-oldest' sheds the stalest
+    queued one. Either way a shed job raises TranscriptionDropped in its
+    submitter. Queue wait and decode time are recorded separately.
+    """
+
+    def __init__(self, workers=1, max_queue=8, policy='block'):
+        if policy not in EXECUTOR_POLICIES:
+            raise ValueError(f"Unknown transcription queue policy {policy!r}; expected one of {EXECUTOR_POLICIES}")
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="twin-whisper")
+        self._queue = None
+        self._loop = None
+        self._tasks = []
+        self.busy = 0
+        self.completed = 0
+        self.dropped = 0
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Dispatchers are bound to the loop that first submitted work
+            self._loop = loop
+            self._queue = asyncio.Queue(self.max_queue)
+            self._tasks = [loop.create_task(self._dispatch()) for _ in range(self.workers)]
+            logger.info(f"Transcription executor started ({self.workers} worker(s), queue {self.max_queue}, {self.policy})")
+
+    async def run(self, fn, *args, source=None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on a transcription worker and return its result"""
+        self._start()
+        job = TranscriptionJob(fn, args, kwargs, asyncio.get_running_loop().create_future(), source)
+        if self._queue.full() and self.policy != 'block':
+            if self.policy == 'drop-newest':
+                self._count_drop(source)
+                raise TranscriptionDropped("transcription queue full")
+            shed = self._queue.get_nowait()
+            self._count_drop(shed.source)
+            if not shed.future.done():
+                shed.future.set_exception(TranscriptionDropped("shed from a full transcription queue"))
+        await self._queue.put(job)
+        get_metrics().set("transcribe.queue_depth", self._queue.qsize())
+        return await job.future
+
+    def _count_drop(self, source):
+        self.dropped += 1
+        metrics = get_metrics()
+        metrics.inc("transcribe.dropped")
+        if source:
+            metrics.inc(f"transcribe.{source}.dropped")
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        metrics = get_metrics()
+        while True:
+            job = await self._queue.get()
+            if job.future.done():
+                continue  # Submitter was cancelled
+            waited = time.monotonic() - job.enqueued
+            metrics.observe("transcribe.queue_wait_seconds", waited)
+            self.busy += 1
+            started = time.monotonic()
+            try:
+                result = await loop.run_in_executor(self._pool, lambda: job.fn(*job.args, **job.kwargs))
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.busy -= 1
+                self.completed += 1
+                decoded = time.monotonic() - started
+                metrics.observe("transcribe.decode_seconds", decoded)
+                if job.source:
+                    metrics.observe(f"transcribe.{job.source}.queue_wait_seconds", waited)
+                    metrics.observe(f"transcribe.{job.source}.decode_seconds", decoded)
+                metrics.set("transcribe.queue_depth", self._queue.qsize())
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "policy": self.policy,
+            "completed": self.completed,
+            "dropped": self.dropped,
+        }
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        self._pool.shutdown(wait=False)
+
+
+transcription_executor = None
+
+
+def get_transcription_executor():
+    """Get singleton transcription executor"""
+    global transcription_executor
+    if transcription_executor is None:
+        from ..core import config
+        transcription_executor = TranscriptionExecutor(
+            workers=config.TRANSCRIBE_WORKERS,
+            max_queue=config.TRANSCRIBE_QUEUE_SIZE,
+            policy=config.TRANSCRIBE_QUEUE_POLICY,
+        )
+        get_metrics().register_collector("transcribe", transcription_executor.stats)
+    return transcription_executor
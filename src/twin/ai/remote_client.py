@@ -0,0 +1,169 @@
+import io
+import time
+import asyncio
+import logging
+import aiohttp
+import numpy as np
+import soundfile as sf
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger('twin')
+
+# encoding -> (filename, content type, soundfile format, subtype)
+UPLOAD_ENCODINGS = {
+    'float': ('audio.wav', 'audio/wav', 'WAV', 'FLOAT'),
+    'int16': ('audio.wav', 'audio/wav', 'WAV', 'PCM_16'),
+    'flac': ('audio.flac', 'audio/flac', 'FLAC', 'PCM_16'),
+    'opus': ('audio.ogg', 'audio/ogg', 'OGG', 'OPUS'),
+}
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+# Statuses meaning the server cannot take this encoding; the client falls back to int16 WAV
+UNSUPPORTED_MEDIA = (400, 415, 422)
+
+
+class RemoteTranscriptionError(Exception):
+    """The remote transcription request failed or missed its deadline"""
+
+
+def encode_upload(audio_data, sample_rate, encoding='int16'):
+    """Encode PCM for upload; returns (payload bytes, filename, content type)"""
+    if encoding == 'opus' and sample_rate not in OPUS_SAMPLE_RATES:
+        encoding = 'flac'  # Opus only runs at a handful of rates
+    filename, content_type, file_format, subtype = UPLOAD_ENCODINGS[encoding]
+    if audio_data.dtype.kind == 'f' and subtype != 'FLOAT':
+        audio_data = np.clip(audio_data, -1.0, 1.0)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_data, sample_rate, format=file_format, subtype=subtype)
+    return buffer.getvalue(), filename, content_type
+
+
+class RemoteTranscriptionClient:
+    """
+    Async client for the remote Whisper endpoint.
+
+    One aiohttp session with a keep-alive connection pool is shared by all
+    sources; at most ``max_concurrency`` requests are in flight and each one,
+    including the wait for a slot, must finish within ``timeout`` seconds.
+    Uploads use ``encoding`` ('float', 'int16', 'flac' or 'opus'); if the
+    server rejects a compressed upload the client drops to int16 WAV for the
+    rest of the session.
+    """
+
+    def __init__(self, url, encoding='int16', max_concurrency=4, timeout=10.0, connect_timeout=3.0, keepalive=30.0):
+        if encoding not in UPLOAD_ENCODINGS:
+            raise ValueError(f"Unknown upload encoding {encoding!r}; expected one of {sorted(UPLOAD_ENCODINGS)}")
+        self.url = url
+        self.encoding = encoding
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.keepalive = keepalive
+        self._session = None
+        self._loop = None
+        self._slots = None
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.bytes_sent = 0
+
+    def _ensure_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=self.keepalive)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=None, connect=self.connect_timeout),
+            )
+        return self._session
+
+    async def transcribe(self, audio_data=None, audio_buffer=None, sample_rate=16000, timeout=None, source=None):
+        """Upload audio and return the transcribed text; raises RemoteTranscriptionError"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        self.requests += 1
+        metrics = get_metrics()
+        try:
+            text = await asyncio.wait_for(self._request(audio_data, audio_buffer, sample_rate), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            metrics.inc("remote_transcribe.timeouts")
+            raise RemoteTranscriptionError(f"no response within {timeout:.1f}s")
+        except aiohttp.ClientError as e:
+            self.failures += 1
+            metrics.inc("remote_transcribe.errors")
+            raise RemoteTranscriptionError(str(e) or type(e).__name__)
+        elapsed = time.monotonic() - started
+        metrics.observe("remote_transcribe.request_seconds", elapsed)
+        if source:
+            metrics.observe(f"remote_transcribe.{source}.request_seconds", elapsed)
+        return text
+
+    async def _request(self, audio_data, audio_buffer, sample_rate):
+        session = self._ensure_session()
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                while True:
+                    encoding = self.encoding
+                    if audio_buffer is not None:
+                        # Caller already has an encoded WAV
+                        audio_buffer.seek(0)
+                        payload, filename, content_type = audio_buffer.read(), 'audio.wav', 'audio/wav'
+                    else:
+                        # FLAC/Opus encoding is CPU work; keep it off the event loop
+                        payload, filename, content_type = await asyncio.get_running_loop().run_in_executor(
+                            None, encode_upload, audio_data, sample_rate, encoding)
+                    form = aiohttp.FormData()
+                    form.add_field('file', payload, filename=filename, content_type=content_type)
+                    self.bytes_sent += len(payload)
+                    get_metrics().observe("remote_transcribe.upload_bytes", len(payload))
+                    async with session.post(self.url, data=form) as response:
+                        if response.status in UNSUPPORTED_MEDIA and audio_buffer is None and encoding in ('flac', 'opus'):
+                            logger.warning(f"Remote transcriber rejected {encoding} uploads (HTTP {response.status}); using int16 WAV")
+                            self.encoding = 'int16'
+                            continue
+                        response.raise_for_status()
+                        response_data = await response.json(content_type=None)
+                    logger.debug(f"Remote transcription response: {response_data}")
+                    return response_data.get("transcription", "").strip()
+            finally:
+                self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "encoding": self.encoding,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "bytes_sent": self.bytes_sent,
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+remote_transcription_client = None
+
+
+def get_remote_transcription_client(url):
+    """Get singleton remote transcription client (recreated if the URL changes)"""
+    global remote_transcription_client
+    if remote_transcription_client is None or remote_transcription_client.url != url:
+        from ..core import config
+        remote_transcription_client = RemoteTranscriptionClient(
+            url,
+            encoding=config.REMOTE_TRANSCRIBE_ENCODING,
+            max_concurrency=config.REMOTE_TRANSCRIBE_CONCURRENCY,
+            timeout=config.REMOTE_TRANSCRIBE_TIMEOUT,
+            keepalive=config.REMOTE_TRANSCRIBE_KEEPALIVE,
+        )
+        get_metrics().register_collector("remote_transcribe", remote_transcription_client.stats)
+    return remote_transcription_client
@@ -0,0 +1,151 @@
+import re
+import time
+import logging
+from .transcribe import clean_transcription, is_noise
+from ..utils.metrics import get_metrics
+from ..audio.formats import to_float32
+
+logger = logging.getLogger('twin')
+
+SENTENCE_END = re.compile(r'[.?!]["\')\]]*$')
+
+
+def normalize_word(word):
+    """Comparison key for hypothesis agreement: case and punctuation insensitive"""
+    return re.sub(r"[^\w']", '', word.lower())
+
+
+def decode_words(model, audio_data, language="en", initial_prompt=None):
+    """
+    Decode audio with word timestamps. Returns a list of (text, start, end)
+    tuples with times in seconds relative to the start of ``audio_data``.
+    """
+    segments, _ = model.transcribe(
+        to_float32(audio_data),  # PCM stays in its capture format until the Whisper boundary
+        language=language,
+        initial_prompt=initial_prompt or None,
+        word_timestamps=True,
+        suppress_tokens=[2, 3],
+        suppress_blank=True,
+        condition_on_previous_text=False,
+        no_speech_threshold=0.1,
+        vad_filter=False,
+    )
+    words = []
+    for segment in segments:
+        if segment.no_speech_prob > 0.3:
+            continue
+        for word in segment.words or []:
+            text = word.word.strip()
+            if text:
+                words.append((text, word.start, word.end))
+    return words
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of one utterance with stable-prefix commit.
+
+    Audio is decoded every ``hop`` seconds from the last commit point, with
+    the committed text as the prompt. Words on which two consecutive
+    hypotheses agree are committed and the decode window is advanced past
+    them, so each decode only covers audio that is still uncertain. Committed
+    words are released as text at sentence boundaries (or when the utterance
+    ends) so downstream wake/intent detection sees whole phrases, each once.
+    """
+
+    def __init__(self, model, sample_rate=16000, hop=1.0, language="en", prompt_chars=200):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.hop_samples = int(sample_rate * hop)
+        self.language = language
+        self.prompt_chars = prompt_chars
+        self.utterance_start = None
+        self._reset_utterance(None)
+
+    def _reset_utterance(self, start_sample):
+        self.utterance_start = start_sample
+        self._offset = 0  # samples (relative to utterance start) already committed
+        self._decoded_until = 0
+        self._previous = []  # uncommitted words of the last hypothesis
+        self._committed = []
+        self._unreleased = []
+
+    def discard(self):
+        """Drop the utterance in progress without releasing its uncommitted or unreleased words"""
+        self._reset_utterance(None)
+
+    def due(self, start_sample, end_sample):
+        """True if enough new audio has arrived since the last decode to warrant another"""
+        if start_sample != self.utterance_start:
+            return True
+        return end_sample - start_sample - self._decoded_until >= self.hop_samples
+
+    def update(self, start_sample, audio_data, final=False):
+        """
+        Decode the uncommitted tail of the utterance beginning at ``start_sample``
+        and return any newly released text. ``final`` commits the whole
+        hypothesis (end of utterance).
+        """
+        if start_sample != self.utterance_start:
+            released = self._release(force=True)
+            self._reset_utterance(start_sample)
+        else:
+            released = []
+
+        window = audio_data[self._offset:]
+        self._decoded_until = audio_data.shape[0]
+        if window.shape[0] < self.sample_rate * 0.2:
+            words = []
+        else:
+            prompt = " ".join(self._committed)[-self.prompt_chars:]
+            decode_start = time.time()
+            words = decode_words(self.model, window, self.language, prompt)
+            metrics = get_metrics()
+            metrics.inc("streaming.decode_calls")
+            metrics.observe("streaming.decode_seconds", time.time() - decode_start)
+
+        if final:
+            agreed = len(words)
+        else:
+            agreed = 0
+            for (text, _, _), previous in zip(words, self._previous):
+                if normalize_word(text) != normalize_word(previous):
+                    break
+                agreed += 1
+
+        if agreed:
+            committed = words[:agreed]
+            self._committed.extend(text for text, _, _ in committed)
+            self._unreleased.extend(text for text, _, _ in committed)
+            self._offset += int(committed[-1][2] * self.sample_rate)
+        self._previous = [text for text, _, _ in words[agreed:]]
+
+        released.extend(self._release(force=final))
+        if final:
+            self._account_speech(audio_data.shape[0])
+            self._reset_utterance(None)
+        return released
+
+    def _release(self, force=False):
+        """Release committed words up to the last sentence boundary (or all of them when forced)"""
+        cut = len(self._unreleased) if force else 0
+        if not force:
+            for i in range(len(self._unreleased) - 1, -1, -1):
+                if SENTENCE_END.search(self._unreleased[i]):
+                    cut = i + 1
+                    break
+        if cut == 0:
+            return []
+        text = clean_transcription(" ".join(self._unreleased[:cut]))
+        self._unreleased = self._unreleased[cut:]
+        if not text or is_noise(text):
+            return []
+        return [text]
+
+    def _account_speech(self, samples):
+        metrics = get_metrics()
+        metrics.inc("streaming.speech_seconds", samples / self.sample_rate)
+        speech = metrics.get_counter("streaming.speech_seconds")
+        if speech > 0:
+            metrics.set("streaming.decode_calls_per_speech_second", metrics.get_counter("streaming.decode_calls") / speech)
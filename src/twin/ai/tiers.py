@@ -0,0 +1,56 @@
+import logging
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger('twin')
+
+
+class ModelTiers:
+    """
+    Picks the Whisper model per room: while a room is asleep its audio only
+    feeds wake detection, so it is decoded by the small model; once it wakes
+    (and for the utterances that follow) it gets the full model. Waking with
+    room None wakes every room; the assistant's wake state is global, so
+    main follows it with ``wake()`` and ``sleep()``. Without a small model
+    every room always uses the full one.
+    """
+
+    def __init__(self, full, small=None):
+        self.full = full
+        self.small = small
+        self.awake_rooms = set()
+        self.all_awake = False
+
+    def is_awake(self, room):
+        return self.all_awake or room in self.awake_rooms
+
+    def wake(self, room=None):
+        if room is None:
+            self.all_awake = True
+        else:
+            self.awake_rooms.add(room)
+        if self.small is not None:
+            logger.info(f"[ASR] {room or 'All rooms'} awake: switching to the full model")
+
+    def sleep(self):
+        if self.small is not None and (self.all_awake or self.awake_rooms):
+            logger.info("[ASR] Asleep: rooms back on the small model")
+        self.all_awake = False
+        self.awake_rooms.clear()
+
+    def select(self, room):
+        """(model, tier name) to decode ``room``'s audio with right now"""
+        if self.small is None or self.is_awake(room):
+            return self.full, 'full'
+        return self.small, 'small'
+
+    def record(self, tier, audio_seconds, decode_seconds):
+        metrics = get_metrics()
+        metrics.inc(f"transcribe.tier.{tier}.windows")
+        metrics.inc(f"transcribe.tier.{tier}.audio_seconds", audio_seconds)
+        metrics.observe(f"transcribe.tier.{tier}.decode_seconds", decode_seconds)
+
+    def stats(self):
+        return {
+            "small_model": self.small is not None,
+            "awake": ["*"] if self.all_awake else sorted(self.awake_rooms),
+        }
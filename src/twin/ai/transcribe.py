@@ -1,11 +1,15 @@
 import time
 import numpy as np
 import re
-import requests
 import logging
-import io
-import soundfile as sf
 from fuzzywuzzy import fuzz
+from ..audio.formats import to_float32
+from .executor import get_transcription_executor, TranscriptionDropped
+from .batching import get_transcription_broker
+from .remote_client import get_remote_transcription_client, RemoteTranscriptionError
+from .cache import get_transcription_cache
+from .cascade import get_decode_cascade
+from ..core import config
 
 logger = logging.getLogger('twin')
 
@@ -19,9 +23,10 @@ NOISE_PHRASES = [
 ]
 
 # Transcription Model Initialization
-def init_transcription_model(whisper_model, device_type, compute_type):
+def init_transcription_model(whisper_model, device_type, compute_type, num_workers=1):
     from faster_whisper import WhisperModel  # Import only if needed
-    model = WhisperModel(whisper_model, device=device_type, compute_type=compute_type)
+    # num_workers lets the one shared model serve that many concurrent decodes
+    model = WhisperModel(whisper_model, device=device_type, compute_type=compute_type, num_workers=num_workers)
     return model
 
 def clean_transcription(text):
@@ -50,77 +55,96 @@ def filter_segments(segments, confidence_threshold=0.6, min_duration=0.5, max_du
             filtered.append(segment)
     return filtered
 
+def decode_segments(model, audio_data, language="en", **options):
+    """
+    Blocking Whisper decode; runs on a transcription worker. The segment
+    generator is lazy (decoding happens while iterating), so it is consumed
+    here rather than on the event loop. ``options`` (e.g. beam_size) override
+    the defaults below. Returns (segments, decode_seconds).
+    """
+    transcription_start = time.time()
+    kwargs = dict(
+        language=language, 
+        suppress_tokens=[2, 3], 
+        suppress_blank=True, 
+        condition_on_previous_text=True, 
+        no_speech_threshold=0.1,
+        vad_filter=True,  # Enable VAD
+        vad_parameters=dict(min_silence_duration_ms=100)
+    )
+    kwargs.update(options)
+    segments, _ = model.transcribe(
+        to_float32(audio_data),  # Whisper is the only consumer that needs float
+        **kwargs
+    )
+    segments = list(segments)
+    return segments, time.time() - transcription_start
+
 async def transcribe_audio(model=None, audio_data=None, audio_buffer=None, language="en", similarity_threshold=85, 
                            recent_transcriptions=None, history_buffer=None, history_max_chars=4000, 
-                           use_remote=False, remote_url=None, sample_rate=16000):
+                           use_remote=False, remote_url=None, sample_rate=16000, source=None,
+                           fallback_model=None):
     """Transcribes audio data, handling both numpy array and BytesIO buffer inputs."""
+    # A window that fingerprints like a recent one reuses its result instead of decoding again
+    # (keyed per model, so a small-model result never answers for the full model)
+    cache = get_transcription_cache() if config.TRANSCRIBE_CACHE_SIZE > 0 and audio_data is not None else None
+    cache_key = cache.key(audio_data, sample_rate, 'remote' if use_remote and remote_url else f'local.{id(model)}') if cache else None
+    cached = cache.get(cache_key) if cache else None
     if use_remote and remote_url:
+        if audio_buffer is None and audio_data is None:
+            logger.error("Remote transcription called with no audio data or buffer.")
+            return [], 0
+        client = get_remote_transcription_client(remote_url)
+        request_start = time.time()
         try:
-            send_buffer = None
-            if audio_buffer:
-                # Use the provided buffer directly
-                audio_buffer.seek(0) # Ensure buffer is at the start
-                send_buffer = audio_buffer
-                buffer_size = send_buffer.getbuffer().nbytes
-                logger.debug(f"Using provided audio buffer (Size: {buffer_size} bytes)")
-            elif audio_data is not None:
-                # Convert numpy array to WAV buffer
-                audio_max = np.max(np.abs(audio_data))
-                audio_mean = np.mean(np.abs(audio_data))
-                audio_shape = audio_data.shape
-                logger.debug(f"Converting numpy audio data: shape={audio_shape}, max={audio_max:.6f}, mean={audio_mean:.6f}, dtype={audio_data.dtype}")
-                
-                buffer = io.BytesIO()
-                # Explicitly write as FLOAT (32-bit float) to match input numpy array
-                sf.write(buffer, audio_data, sample_rate, format='WAV', subtype='FLOAT')
-                buffer.seek(0)
-                send_buffer = buffer
-                buffer_size = send_buffer.getbuffer().nbytes
-                logger.debug(f"Converted numpy audio to buffer (Size: {buffer_size} bytes, Format: WAV/FLOAT)")
-            else:
-                logger.error("Remote transcription called with no audio data or buffer.")
-                return [], 0
-
-            # Send the buffer to the remote server
-            files = {'file': ('audio.wav', send_buffer, 'audio/wav')}
-            response = requests.post(remote_url, files=files)
-            response.raise_for_status()
-
-            response_data = response.json()
-            text = response_data.get("transcription", "").strip()
-            logger.debug(f"Remote transcription response: {response_data}")
-            
-            # Custom noise filtering for remote transcription
-            if text and not is_noise(text) and not is_similar(text, recent_transcriptions or [], similarity_threshold):
-                if recent_transcriptions is not None:
-                    recent_transcriptions.append(text)
-                if history_buffer is not None:
-                    history_buffer.append(text)
-                return [text], 0
+            if cached is not None:
+                text = cached
             else:
-                if text:
-                    logger.debug(f"Filtered out text: '{text}', is_noise={is_noise(text)}, is_similar={is_similar(text, recent_transcriptions or [], similarity_threshold)}")
-                return [], 0
-        except requests.RequestException as e:
-            logger.error(f"Error in remote transcription: {str(e)}")
+                # Pooled keep-alive session; the upload is encoded per REMOTE_TRANSCRIBE_ENCODING
+                text = await client.transcribe(audio_data=audio_data, audio_buffer=audio_buffer, sample_rate=sample_rate, source=source)
+        except RemoteTranscriptionError as e:
+            logger.error(f"Error in remote transcription: {e}")
             return [], 0
         except Exception as e:
-             logger.error(f"Unexpected error during remote transcription prep/send: {e}", exc_info=True)
-             return [], 0
+            logger.error(f"Unexpected error during remote transcription prep/send: {e}", exc_info=True)
+            return [], 0
+        transcription_time = time.time() - request_start
+        if cache and cached is None:
+            cache.put(cache_key, text, transcription_time)
+
+        # Custom noise filtering for remote transcription
+        if text and not is_noise(text) and not is_similar(text, recent_transcriptions or [], similarity_threshold):
+            if recent_transcriptions is not None:
+                recent_transcriptions.append(text)
+            if history_buffer is not None:
+                history_buffer.append(text)
+            return [text], transcription_time
+        if text:
+            logger.debug(f"Filtered out text: '{text}', is_noise={is_noise(text)}, is_similar={is_similar(text, recent_transcriptions or [], similarity_threshold)}")
+        return [], transcription_time
     elif audio_data is not None:
-        # Local transcription requires numpy array
-        transcription_start = time.time()
-        segments, _ = model.transcribe(
-            audio_data, 
-            language=language, 
-            suppress_tokens=[2, 3], 
-            suppress_blank=True, 
-            condition_on_previous_text=True, 
-            no_speech_threshold=0.1,
-            vad_filter=True,  # Enable VAD
-            vad_parameters=dict(min_silence_duration_ms=100)
-        )
-        transcription_time = time.time() - transcription_start
+        # Local transcription requires numpy array; the decode runs on a transcription worker
+        # so the event loop keeps serving other sources, the web server and commands
+        try:
+            if cached is not None:
+                segments, transcription_time = cached, 0
+            elif config.TRANSCRIBE_BATCH_SIZE > 1:
+                # Decoded together with whatever other sources have ready
+                segments, transcription_time = await get_transcription_broker(model).submit(audio_data, source=source)
+            elif config.TRANSCRIBE_CASCADE:
+                # Cheap pass first; only low-confidence segments get the wide beam / fallback model
+                segments, transcription_time = await get_transcription_executor().run(
+                    get_decode_cascade().decode, decode_segments, model, audio_data, language, fallback_model, sample_rate, source=source
+                )
+            else:
+                segments, transcription_time = await get_transcription_executor().run(
+                    decode_segments, model, audio_data, language, source=source
+                )
+        except TranscriptionDropped:
+            logger.warning(f"Transcription queue full; dropped {audio_data.shape[0] / sample_rate:.1f}s of audio{f' from {source}' if source else ''}")
+            return [], 0
+        if cache and cached is None:
+            cache.put(cache_key, segments, transcription_time)
         
         # Apply filtering
         filtered_segments = filter_segments(segments, confidence_threshold=0.7, min_duration=0.5, max_duration=10.0)
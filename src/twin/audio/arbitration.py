@@ -0,0 +1,152 @@
+import math
+import asyncio
+import logging
+import numpy as np
+from .formats import to_float32
+from .gate import signal_rms
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger("twin")
+
+
+def energy_envelope(audio_data, sample_rate, hop=0.01):
+    """Log-energy (dB) per ``hop`` seconds; gain-independent up to a constant offset"""
+    hop_len = max(1, int(sample_rate * hop))
+    audio_data = to_float32(np.asarray(audio_data).reshape(-1))
+    n = audio_data.shape[0] // hop_len
+    if n == 0:
+        return np.zeros(0)
+    frames = audio_data[:n * hop_len].reshape(n, hop_len)
+    energy = np.einsum('ij,ij->i', frames, frames, dtype=np.float64) / hop_len
+    return 10 * np.log10(energy + 1e-10)
+
+
+def envelope_correlation(env_a, start_a, env_b, start_b, hop=0.01, max_lag=0.5, min_overlap=10):
+    """
+    Best normalized cross-correlation of two energy envelopes over lags of up
+    to ``max_lag`` seconds around their timestamp alignment. Returns
+    (correlation, lag_seconds), where a positive lag means the sound reached
+    ``b`` later than the timestamps suggest; correlation is -1 when they
+    never overlap by ``min_overlap`` frames.
+    """
+    nominal = int(round((start_b - start_a) / hop))
+    max_shift = int(round(max_lag / hop))
+    best, best_lag = -1.0, 0.0
+    for shift in range(nominal - max_shift, nominal + max_shift + 1):
+        # env_b[i] is aligned with env_a[i + shift]
+        lo = max(0, -shift)
+        hi = min(env_b.shape[0], env_a.shape[0] - shift)
+        if hi - lo < min_overlap:
+            continue
+        a = env_a[lo + shift:hi + shift]
+        b = env_b[lo:hi]
+        a = a - a.mean()
+        b = b - b.mean()
+        denom = math.sqrt(float(np.dot(a, a)) * float(np.dot(b, b)))
+        if denom == 0:
+            continue
+        corr = float(np.dot(a, b)) / denom
+        if corr > best:
+            best, best_lag = corr, (nominal - shift) * hop
+    return best, best_lag
+
+
+class SpeechCandidate:
+    """One source's copy of an utterance, with the SNR used to pick the best copy"""
+
+    def __init__(self, source_id, location, segment, noise_floor, envelope_hop=0.01):
+        self.source_id = source_id
+        self.location = location
+        self.segment = segment
+        level = signal_rms(segment.audio)
+        self.snr_db = 20 * math.log10(max(level, 1e-9) / max(noise_floor or 0.0, 1e-6))
+        self.envelope = energy_envelope(segment.audio, segment.sample_rate, envelope_hop)
+
+    def __repr__(self):
+        return f"SpeechCandidate({self.source_id}, room={self.location}, snr={self.snr_db:.1f}dB, {self.segment})"
+
+
+class ArbitrationGroup:
+    def __init__(self, first):
+        self.candidates = [first]
+        self.future = asyncio.get_running_loop().create_future()
+        self.opened_at = asyncio.get_running_loop().time()
+
+    @property
+    def source_ids(self):
+        return {c.source_id for c in self.candidates}
+
+
+class Arbiter:
+    """
+    Cross-microphone arbitration for endpointed utterances.
+
+    Every source submits each utterance it endpoints. Utterances that overlap
+    in time (within ``max_offset`` seconds, to absorb per-camera stream
+    latency) and whose energy envelopes cross-correlate above
+    ``min_correlation`` are grouped as one spoken utterance. After ``window``
+    seconds (or as soon as every registered source has contributed) the copy
+    with the best SNR wins; only its source transcribes it, and the group's
+    winning room is that source's location.
+    """
+
+    def __init__(self, window=0.5, max_offset=0.5, min_correlation=0.5, envelope_hop=0.01):
+        self.window = window
+        self.max_offset = max_offset
+        self.min_correlation = min_correlation
+        self.envelope_hop = envelope_hop
+        self._sources = set()
+        self._open = []
+
+    def register(self, source_id):
+        self._sources.add(source_id)
+
+    def unregister(self, source_id):
+        self._sources.discard(source_id)
+
+    def candidate(self, source_id, location, segment, noise_floor):
+        return SpeechCandidate(source_id, location, segment, noise_floor, self.envelope_hop)
+
+    def same_utterance(self, a, b):
+        sa, sb = a.segment, b.segment
+        if sa.start_time - self.max_offset > sb.end_time or sb.start_time - self.max_offset > sa.end_time:
+            return False
+        corr, _ = envelope_correlation(a.envelope, sa.start_time, b.envelope, sb.start_time, self.envelope_hop, self.max_offset)
+        return corr >= self.min_correlation
+
+    async def submit(self, candidate):
+        """Wait for the group this utterance belongs to be decided; returns the winning candidate"""
+        group = self._match(candidate)
+        if group is None:
+            group = ArbitrationGroup(candidate)
+            self._open.append(group)
+            asyncio.get_running_loop().call_later(self.window, self._decide, group)
+        else:
+            group.candidates.append(candidate)
+        if self._sources and group.source_ids >= self._sources:
+            self._decide(group)
+        return await group.future
+
+    def _match(self, candidate):
+        for group in self._open:
+            if candidate.source_id in group.source_ids:
+                continue
+            if any(self.same_utterance(member, candidate) for member in group.candidates):
+                return group
+        return None
+
+    def _decide(self, group):
+        if group.future.done():
+            return
+        if group in self._open:
+            self._open.remove(group)
+        winner = max(group.candidates, key=lambda c: c.snr_db)
+        metrics = get_metrics()
+        metrics.inc("arbitration.groups")
+        metrics.inc("arbitration.suppressed", len(group.candidates) - 1)
+        metrics.inc(f"arbitration.wins.{winner.source_id}")
+        metrics.observe("arbitration.wait_seconds", asyncio.get_running_loop().time() - group.opened_at)
+        if len(group.candidates) > 1:
+            others = ", ".join(f"{c.source_id} {c.snr_db:.1f}dB" for c in group.candidates if c is not winner)
+            logger.info(f"[Arbiter] {winner.location} wins via {winner.source_id} ({winner.snr_db:.1f}dB) over {others}")
+        group.future.set_result(winner)
@@ -5,6 +5,8 @@ import asyncio
 import time
 import numpy as np
 from ..core import config # Make sure config is imported
+from .echo import get_playback_tracker, playback_room
+from .cues import get_cue_player
 
 logger = logging.getLogger("twin")
 
@@ -20,7 +22,7 @@ def log_available_audio_devices():
     except Exception as e:
         logger.warning(f"Could not query audio devices: {e}. This is acceptable if using RTSP source.")
 
-def audio_callback(indata, frames, time_info, status, audio_queue, audio_buffer, small_audio_buffer):
+def audio_callback(indata, frames, time_info, status, audio_queue, audio_buffer):
     if status:
         logger.error(f"Audio callback error: {status}")
     
@@ -34,16 +36,21 @@ def audio_callback(indata, frames, time_info, status, audio_queue, audio_buffer,
         else:
             logger.debug("Audio callback received empty data")
     
-    audio_data = indata[:, 0] if indata.shape[1] > 1 else indata.flatten()
-    audio_queue.put(audio_data.copy())
-    audio_buffer.extend(audio_data)
-    small_audio_buffer.extend(audio_data)  # Add this line to handle the small buffer
+    audio_data = indata[:, 0]  # view of the first channel, no copy
+    if audio_queue is not None:
+        # Only for consumers that need discrete blocks; must be a BoundedQueue so
+        # a stalled reader costs drops, not memory (never block the audio thread)
+        audio_queue.put(audio_data.copy(), timeout=0)
+    # O(1) per chunk: the ring buffer copies the block into preallocated storage
+    audio_buffer.write(audio_data)
 
-async def play_tts_response(response_text, max_words=15, tts_python_path=None, tts_script_path=None, silent=False):
+async def play_tts_response(response_text, max_words=15, tts_python_path=None, tts_script_path=None, silent=False, room=None):
     if silent:
         return 0
     
     start_time = time.time()
+    # Rooms hearing this are echo-gated until it finishes
+    playback = get_playback_tracker().begin(room or playback_room(), 'tts')
     try:
         words = response_text.split()
         truncated_response = ' '.join(words[:max_words]) + '...' if len(words) > max_words else response_text
@@ -55,12 +62,22 @@ async def play_tts_response(response_text, max_words=15, tts_python_path=None, t
         await proc.communicate()
     except Exception as e:
         logger.error(f"Failed to execute TTS script: {e}")
+    finally:
+        get_playback_tracker().end(playback)
     return time.time() - start_time
 
 # **Function to Play Wake Sound**
-async def play_wake_sound(sound_file):
-    ssh_target = config.SSH_HOST_TARGET
-    logger.debug(f"play_wake_sound: SSH_HOST_TARGET from config = '{ssh_target}'")
+async def play_wake_sound(sound_file, room=None, ssh_target=None):
+    ssh_target = ssh_target or config.SSH_HOST_TARGET
+    logger.debug(f"play_wake_sound: SSH target = '{ssh_target}'")
+    
+    if config.CUE_PLAYBACK == 'cached':
+        # Decoded once, played on the persistent output stream or over the actuator's open channel
+        try:
+            await get_cue_player().play('wake', sound_file, room=room, ssh_target=ssh_target, beep_hz=800)
+            return
+        except Exception as e:
+            logger.warning(f"Cached wake cue failed ({e}); falling back to a one-off player")
     
     if ssh_target:
         # For remote execution, use a simple beep command instead of trying to play our audio file
@@ -72,6 +89,8 @@ async def play_wake_sound(sound_file):
         final_command = ['paplay', sound_file]
         logger.info(f"Attempting local wake sound: {' '.join(final_command)}")
         
+    proc = None
+    playback = get_playback_tracker().begin(room or playback_room(), 'wake')
     try:
         proc = await asyncio.create_subprocess_exec(
             *final_command,
@@ -99,11 +118,21 @@ async def play_wake_sound(sound_file):
             await proc.wait()
     except Exception as e:
         logger.error(f"Failed to play wake sound with command {' '.join(final_command)}: {e}", exc_info=True)
+    finally:
+        get_playback_tracker().end(playback)
 
 # **Function to Play Sleep Sound**
-async def play_sleep_sound(sound_file):
-    ssh_target = config.SSH_HOST_TARGET
-    logger.debug(f"play_sleep_sound: SSH_HOST_TARGET from config = '{ssh_target}'")
+async def play_sleep_sound(sound_file, room=None, ssh_target=None):
+    ssh_target = ssh_target or config.SSH_HOST_TARGET
+    logger.debug(f"play_sleep_sound: SSH target = '{ssh_target}'")
+    
+    if config.CUE_PLAYBACK == 'cached':
+        # Decoded once, played on the persistent output stream or over the actuator's open channel
+        try:
+            await get_cue_player().play('sleep', sound_file, room=room, ssh_target=ssh_target, beep_hz=400)
+            return
+        except Exception as e:
+            logger.warning(f"Cached sleep cue failed ({e}); falling back to a one-off player")
     
     if ssh_target:
         # For remote execution, use a simple lower tone beep for sleep
@@ -114,6 +143,8 @@ async def play_sleep_sound(sound_file):
         final_command = ['paplay', sound_file]
         logger.info(f"Attempting local sleep sound: {' '.join(final_command)}")
 
+    proc = None
+    playback = get_playback_tracker().begin(room or playback_room(), 'sleep')
     try:
         proc = await asyncio.create_subprocess_exec(
             *final_command,
@@ -141,3 +172,5 @@ async def play_sleep_sound(sound_file):
             await proc.wait()
     except Exception as e:
         logger.error(f"Failed to play sleep sound with command {' '.join(final_command)}: {e}", exc_info=True)
+    finally:
+        get_playback_tracker().end(playback)
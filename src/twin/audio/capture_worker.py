@@ -0,0 +1,296 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+import multiprocessing
+from .shm_ring import SharedAudioRing
+from .formats import get_sample_format
+from .health import get_source_health
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger("twin")
+
+
+def apply_worker_status(event, url, reason=None):
+    """Mirror a worker's capture outcome into the main process's source health and metrics"""
+    health = get_source_health()
+    if event == "failure":
+        health.record_failure(url, reason)
+        get_metrics().inc("capture_workers.failures")
+        logger.debug(f"Capture worker reported a failure for {url}: {reason}")
+    elif event == "success":
+        health.record_success(url)
+    elif event == "spawn":
+        health.record_spawn(url)
+        get_metrics().inc("capture_workers.spawns")
+
+
+def run_worker(commands, notify_conn, status_conn, parent_pid):
+    """
+    Capture worker process entry point.
+
+    Runs a private IngestEngine (one selector thread) for the sources it is
+    given, writing each source's PCM into its shared-memory ring and posting
+    the source's slot number on ``notify_conn`` so the main process wakes on
+    arrival. Connection outcomes recorded by the worker's health manager are
+    sent on ``status_conn`` for the main process to apply. Exits when told
+    to or when the parent process goes away.
+    """
+    from .ingest import IngestEngine
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [capture-worker %(process)d] %(message)s")
+    notify_fd = notify_conn.fileno()
+    os.set_blocking(notify_fd, False)
+    status_lock = threading.Lock()
+
+    def forward_status(event, url, reason):
+        with status_lock:
+            status_conn.send((event, url, reason))
+    get_source_health().listener = forward_status
+    engine = IngestEngine()
+    sources = {}
+
+    def make_callback(slot, ring):
+        token = bytes([slot])
+
+        def callback(indata, frames, time_info, status):
+            ring.write(indata[:, 0])
+            try:
+                os.write(notify_fd, token)
+            except BlockingIOError:
+                pass  # The main process is behind; it will find the data by sequence number anyway
+        return callback
+
+    try:
+        while True:
+            try:
+                command = commands.get(timeout=1)
+            except queue.Empty:
+                if os.getppid() != parent_pid:
+                    break
+                continue
+            op = command[0]
+            if op == "add":
+                _, slot, spec = command
+                ring = SharedAudioRing.attach(spec["shm_name"], get_sample_format(spec["sample_format"]).dtype)
+                source = engine.add_source(
+                    spec["rtsp_url"],
+                    make_callback(slot, ring),
+                    sample_rate=spec["sample_rate"],
+                    channels=spec["channels"],
+                    chunk_size=spec["chunk_size"],
+                    buffer_size=spec["chunk_size"],  # The shared ring is the real buffer
+                    latency_flags=spec["latency_flags"],
+                    reconnect_interval=spec["reconnect_interval"],
+                    sample_format=spec["sample_format"],
+                )
+                sources[slot] = (source, ring)
+            elif op == "remove":
+                entry = sources.pop(command[1], None)
+                if entry:
+                    source, ring = entry
+                    source.stop()
+                    ring.mark_closed()
+                    ring.close()
+            elif op == "stop":
+                break
+    finally:
+        engine.stop()
+        for source, ring in sources.values():
+            ring.mark_closed()
+            ring.close()
+
+
+class WorkerSource:
+    """
+    Main-process handle for a source captured in a worker process.
+
+    Exposes the RTSPAudioCapture surface (``buffer``, ``is_running``,
+    ``stop()``) and replays the worker's audio into ``callback`` on the event
+    loop whenever the worker signals new samples. The samples are read
+    straight out of shared memory, with no pickling or pipe copy: one
+    snapshot copy out of the ring (so a lapping writer cannot tear it) and
+    the callback's copy into the source's local buffer.
+    """
+
+    def __init__(self, worker, slot, ring, callback, chunk_size):
+        self.worker = worker
+        self.slot = slot
+        self.buffer = ring
+        self.callback = callback
+        self.chunk_size = chunk_size
+        self.cursor = 0
+
+    @property
+    def is_running(self):
+        return self.worker.is_alive() and self.slot in self.worker.sources and not self.buffer.closed
+
+    def pump(self):
+        """Deliver everything written since the last pump to the callback"""
+        audio, self.cursor = self.buffer.since(self.cursor)
+        if audio.shape[0] == 0:
+            return
+        try:
+            self.callback(audio.reshape(-1, 1), audio.shape[0], {'current_time': time.time()}, None)
+        except Exception as e:
+            logger.error(f"Error in callback for worker source {self.slot}: {e}")
+
+    def stop(self):
+        self.worker.remove(self)
+
+
+class CaptureWorker:
+    """One spawned capture process serving up to ``max_sources`` sources"""
+
+    def __init__(self, index, max_sources, loop):
+        self.index = index
+        self.max_sources = max_sources
+        self.loop = loop
+        self.sources = {}
+        self._next_slot = 0
+        # Spawn, not fork: the parent may already hold Whisper/torch state
+        ctx = multiprocessing.get_context("spawn")
+        self._commands = ctx.Queue()
+        self._notify_r, notify_w = ctx.Pipe(duplex=False)
+        self._status_r, status_w = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(
+            target=run_worker,
+            args=(self._commands, notify_w, status_w, os.getpid()),
+            name=f"twin-capture-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        notify_w.close()
+        status_w.close()
+        os.set_blocking(self._notify_r.fileno(), False)
+        loop.add_reader(self._notify_r.fileno(), self._on_notify)
+        loop.add_reader(self._status_r.fileno(), self._on_status)
+        logger.info(f"Capture worker {index} started (pid {self.process.pid})")
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    @property
+    def has_capacity(self):
+        return len(self.sources) < self.max_sources
+
+    def add(self, spec, callback, capacity, dtype):
+        slot = self._next_slot
+        self._next_slot = (self._next_slot + 1) % 256
+        ring = SharedAudioRing.create(capacity, dtype)
+        spec = dict(spec, shm_name=ring.name)
+        source = WorkerSource(self, slot, ring, callback, spec["chunk_size"])
+        self.sources[slot] = source
+        self._commands.put(("add", slot, spec))
+        return source
+
+    def remove(self, source):
+        if self.sources.pop(source.slot, None) is None:
+            return
+        if self.is_alive():
+            self._commands.put(("remove", source.slot))
+        source.buffer.close()
+
+    def _on_notify(self):
+        try:
+            tokens = os.read(self._notify_r.fileno(), 4096)
+        except BlockingIOError:
+            return
+        if not tokens:
+            # Worker exited: stop watching its pipe so the loop doesn't spin
+            self.loop.remove_reader(self._notify_r.fileno())
+            return
+        for slot in set(tokens):
+            source = self.sources.get(slot)
+            if source is not None:
+                source.pump()
+
+    def _on_status(self):
+        try:
+            while self._status_r.poll():
+                apply_worker_status(*self._status_r.recv())
+        except (EOFError, OSError):
+            # Worker exited
+            self.loop.remove_reader(self._status_r.fileno())
+
+    def stop(self):
+        for source in list(self.sources.values()):
+            source.buffer.close()
+        self.sources.clear()
+        for conn in (self._notify_r, self._status_r):
+            try:
+                self.loop.remove_reader(conn.fileno())
+            except Exception:
+                pass
+        if self.is_alive():
+            self._commands.put(("stop",))
+            self.process.join(timeout=5)
+            if self.is_alive():
+                self.process.terminate()
+        self._notify_r.close()
+        self._status_r.close()
+
+
+class CaptureWorkerPool:
+    """
+    Assigns sources to capture worker processes, ``sources_per_worker`` at a
+    time, so capture, decode and buffering never contend for the main
+    interpreter's GIL with Whisper and the asyncio orchestrator.
+    """
+
+    def __init__(self, sources_per_worker=1, ring_seconds=30.0):
+        self.sources_per_worker = max(1, sources_per_worker)
+        self.ring_seconds = ring_seconds
+        self.workers = []
+
+    def add_source(self, rtsp_url, callback, sample_rate=16000, channels=1, chunk_size=1024, latency_flags=None, reconnect_interval=20, sample_format='f32'):
+        loop = asyncio.get_running_loop()
+        worker = next((w for w in self.workers if w.is_alive() and w.has_capacity), None)
+        if worker is None:
+            worker = CaptureWorker(len(self.workers), self.sources_per_worker, loop)
+            self.workers.append(worker)
+        spec = {
+            "rtsp_url": rtsp_url,
+            "sample_rate": sample_rate,
+            "channels": channels,
+            "chunk_size": chunk_size,
+            "latency_flags": latency_flags,
+            "reconnect_interval": reconnect_interval,
+            "sample_format": sample_format,
+        }
+        dtype = get_sample_format(sample_format).dtype
+        source = worker.add(spec, callback, int(sample_rate * self.ring_seconds), dtype)
+        get_metrics().inc("capture_workers.sources")
+        logger.info(f"Attached {rtsp_url} to capture worker {worker.index}")
+        return source
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+
+    def stats(self):
+        return {
+            f"worker{w.index}": {
+                "pid": w.process.pid,
+                "alive": w.is_alive(),
+                "sources": len(w.sources),
+                "backlog_samples": {slot: s.buffer.total_written - s.cursor for slot, s in w.sources.items()},
+            }
+            for w in self.workers
+        }
+
+
+capture_pool = None
+
+
+def get_capture_pool():
+    """Get singleton capture worker pool"""
+    global capture_pool
+    if capture_pool is None:
+        from ..core import config
+        capture_pool = CaptureWorkerPool(config.CAPTURE_WORKER_SOURCES, config.SHM_RING_SECONDS)
+        get_metrics().register_collector("capture_workers", capture_pool.stats)
+    return capture_pool
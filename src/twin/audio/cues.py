@@ -0,0 +1,279 @@
+import io
+import time
+import shlex
+import asyncio
+import logging
+import threading
+import collections
+import base64
+import numpy as np
+import soundfile as sf
+from ..core import config
+from .replay import load_recording
+from .echo import get_playback_tracker, playback_room
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger("twin")
+
+REMOTE_CUE_DIR = "/tmp/twin-cues"
+
+
+class Cue:
+    """A cue decoded once: float32 mono samples plus a WAV copy for remote actuators"""
+
+    def __init__(self, name, path, sample_rate):
+        self.name = name
+        self.path = path
+        self.sample_rate = sample_rate
+        self.audio = np.ascontiguousarray(load_recording(path, sample_rate, 1, 'f32')[:, 0])
+        buf = io.BytesIO()
+        sf.write(buf, self.audio, sample_rate, format='WAV', subtype='PCM_16')
+        self.wav_bytes = buf.getvalue()
+
+    @property
+    def duration(self):
+        return self.audio.shape[0] / self.sample_rate
+
+
+class LocalCuePlayer:
+    """
+    One persistent sounddevice output stream that cues are mixed into.
+
+    The stream runs from startup, so a cue starts within one callback block
+    instead of after a ``paplay`` process start. ``play`` is thread-safe;
+    the returned futures resolve with the measured onset latency (request to
+    DAC, including the stream's output latency) and when the cue ends.
+    """
+
+    def __init__(self, sample_rate=48000, blocksize=256, device=None):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.device = device
+        self.stream = None
+        self._pending = collections.deque()
+        self._active = []
+
+    def start(self):
+        if self.stream is not None:
+            return
+        import sounddevice as sd
+        self.stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            blocksize=self.blocksize,
+            channels=1,
+            dtype='float32',
+            latency='low',
+            device=self.device,
+            callback=self._callback,
+        )
+        self.stream.start()
+        logger.info(f"Cue output stream open ({self.sample_rate} Hz, {self.stream.latency * 1000:.0f} ms output latency)")
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def play(self, audio, loop):
+        started, finished = loop.create_future(), loop.create_future()
+        self._pending.append([audio, 0, time.monotonic(), started, finished, loop])
+        return started, finished
+
+    def _callback(self, outdata, frames, time_info, status):
+        outdata.fill(0)
+        while self._pending:
+            self._active.append(self._pending.popleft())
+        if not self._active:
+            return
+        try:
+            output_latency = max(0.0, time_info.outputBufferDacTime - time_info.currentTime)
+        except AttributeError:
+            output_latency = 0.0
+        still_playing = []
+        for entry in self._active:
+            audio, pos, requested, started, finished, loop = entry
+            n = min(frames, audio.shape[0] - pos)
+            outdata[:n, 0] += audio[pos:pos + n]
+            if pos == 0:
+                latency = time.monotonic() - requested + output_latency
+                loop.call_soon_threadsafe(_resolve, started, latency)
+            entry[1] = pos + n
+            if entry[1] >= audio.shape[0]:
+                loop.call_soon_threadsafe(_resolve, finished, None)
+            else:
+                still_playing.append(entry)
+        self._active = still_playing
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+
+
+def _resolve(future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+class RemoteShell:
+    """
+    Long-lived ``ssh target sh`` channel to an actuator.
+
+    Commands are written to the remote shell's stdin and framed by echo
+    markers, so each cue costs a line over an open connection instead of a
+    new ssh process and handshake. The connection is re-established on
+    demand if it drops.
+    """
+
+    def __init__(self, target, connect_timeout=10, command=None):
+        self.target = target
+        self.connect_timeout = connect_timeout
+        self.command = command or [
+            'ssh', '-T',
+            '-o', 'StrictHostKeyChecking=no',
+            '-o', 'ServerAliveInterval=30',
+            '-o', f'ConnectTimeout={connect_timeout}',
+            target, 'sh',
+        ]
+        self.proc = None
+        self.uploaded = set()
+        self._lock = asyncio.Lock()
+        self._counter = 0
+
+    @property
+    def connected(self):
+        return self.proc is not None and self.proc.returncode is None
+
+    async def _ensure(self):
+        if self.connected:
+            return
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self.uploaded = set()
+        logger.info(f"Opened persistent cue channel to {self.target}")
+
+    async def run(self, script, on_start=None, timeout=15):
+        """Run ``script`` remotely; ``on_start`` is called when the remote shell begins it. Returns its exit status."""
+        async with self._lock:
+            await self._ensure()
+            self._counter += 1
+            marker = f"__twin_{self._counter}"
+            self.proc.stdin.write(f"echo {marker}_start\n{{\n{script}\n}} >/dev/null 2>&1\necho {marker}_done $?\n".encode())
+            try:
+                await self.proc.stdin.drain()
+                return await asyncio.wait_for(self._wait_for(marker, on_start), timeout)
+            except (asyncio.TimeoutError, ConnectionError, BrokenPipeError) as e:
+                self.close()
+                raise ConnectionError(f"Cue channel to {self.target} failed: {e or type(e).__name__}")
+
+    async def _wait_for(self, marker, on_start):
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                raise ConnectionError("channel closed")
+            line = line.decode(errors='replace').strip()
+            if line == f"{marker}_start" and on_start:
+                on_start()
+            elif line.startswith(f"{marker}_done"):
+                return int(line.split()[-1])
+
+    def close(self):
+        if self.connected:
+            self.proc.kill()
+        self.proc = None
+
+
+class CuePlayer:
+    """
+    Plays wake/sleep cues with the files decoded once at startup: locally
+    through a persistent output stream, remotely over a long-lived shell
+    channel per actuator (the cue WAV is uploaded once per connection).
+    Every cue's latency is logged and recorded under ``cues.*``.
+    """
+
+    def __init__(self, sample_rate=48000, blocksize=256):
+        self.sample_rate = sample_rate
+        self.cues = {}
+        self.local = LocalCuePlayer(sample_rate, blocksize)
+        self.channels = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, path):
+        cue = Cue(name, path, self.sample_rate)
+        self.cues[name] = cue
+        logger.info(f"Cached {name} cue from {path} ({cue.duration:.2f}s)")
+        return cue
+
+    def cue(self, name, path):
+        cue = self.cues.get(name)
+        if cue is None or cue.path != path:
+            cue = self.load(name, path)
+        return cue
+
+    def channel(self, target):
+        with self._lock:
+            channel = self.channels.get(target)
+            if channel is None:
+                channel = self.channels[target] = RemoteShell(target)
+            return channel
+
+    async def connect(self, target):
+        """Open ``target``'s channel ahead of the first cue"""
+        try:
+            await self.channel(target).run("true")
+        except Exception as e:
+            logger.warning(f"Could not pre-open cue channel to {target}: {e}")
+
+    async def play(self, name, path, room=None, ssh_target=None, beep_hz=800):
+        """Play a cue and wait for it to finish; raises if the cached path cannot play it"""
+        cue = self.cue(name, path)
+        room = room or playback_room()
+        requested = time.monotonic()
+        where = ssh_target or "local"
+        # Exact length is known, so the echo gate does not need an estimate
+        with get_playback_tracker().playing(room, name, duration=cue.duration + 0.5):
+            if ssh_target:
+                latency = await self._play_remote(cue, ssh_target, beep_hz, requested)
+            else:
+                self.local.start()
+                started, finished = self.local.play(cue.audio, asyncio.get_running_loop())
+                latency = await asyncio.wait_for(started, 5)
+                await asyncio.wait_for(finished, cue.duration + 5)
+        metrics = get_metrics()
+        metrics.observe("cues.latency_seconds", latency)
+        metrics.observe(f"cues.{'remote' if ssh_target else 'local'}.latency_seconds", latency)
+        logger.info(f"[Cue] {name} started {latency * 1000:.0f} ms after request ({where})")
+
+    async def _play_remote(self, cue, target, beep_hz, requested):
+        channel = self.channel(target)
+        remote_path = f"{REMOTE_CUE_DIR}/{cue.name}.wav"
+        if not channel.connected or cue.name not in channel.uploaded:
+            encoded = base64.b64encode(cue.wav_bytes).decode()
+            upload = f"mkdir -p {REMOTE_CUE_DIR} && base64 -d > {remote_path} <<'__TWIN_CUE__'\n{encoded}\n__TWIN_CUE__"
+            await channel.run(upload)
+            channel.uploaded.add(cue.name)
+        started = []
+        # Same fallbacks as the one-off command when the remote has no PulseAudio client
+        script = (
+            f"export DISPLAY=:0; paplay {shlex.quote(remote_path)} || pactl play-sample bell-window-system"
+            f" || speaker-test -t sine -f {beep_hz} -l 1 -s 1 || printf '\\a'"
+        )
+        await channel.run(script, on_start=lambda: started.append(time.monotonic()))
+        return (started[0] if started else time.monotonic()) - requested
+
+    def stop(self):
+        self.local.stop()
+        for channel in self.channels.values():
+            channel.close()
+
+
+cue_player = None
+
+
+def get_cue_player():
+    """Get singleton cue player"""
+    global cue_player
+    if cue_player is None:
+        cue_player = CuePlayer(sample_rate=config.CUE_SAMPLE_RATE, blocksize=config.CUE_BLOCKSIZE)
+    return cue_player
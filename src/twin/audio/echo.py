@@ -0,0 +1,124 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from ..core import config
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger("twin")
+
+
+class Playback:
+    """One sound twin plays in a room; ``end`` is an estimate until the playback reports it stopped"""
+
+    def __init__(self, room, kind, start, expected_end):
+        self.room = room
+        self.kind = kind
+        self.start = start
+        self.end = expected_end
+        self.stopped = False
+
+    def __repr__(self):
+        return f"Playback({self.kind} in {self.room or 'all rooms'}, {self.end - self.start:.2f}s{'' if self.stopped else ' expected'})"
+
+
+class PlaybackTracker:
+    """
+    Knows when twin is playing audio in which room, so that room's mics do
+    not transcribe twin's own wake/sleep cues and TTS.
+
+    Playback code brackets each sound with ``begin``/``end`` (or the
+    ``playing`` context manager). Until ``end`` arrives the sound is assumed
+    to last as long as that room's actuator usually takes for that kind of
+    sound (learned from past start/stop events), so fire-and-forget players
+    are covered too. Audio within ``tail`` seconds after the end is treated
+    as echo as well, for reverb and stream latency. A playback with room
+    None is heard everywhere; a query with room None matches any playback.
+    """
+
+    def __init__(self, tail=0.75, default_duration=2.0, smoothing=0.3, retention=120.0, clock=time.time):
+        self.tail = tail
+        self.default_duration = default_duration
+        self.smoothing = smoothing
+        self.retention = retention
+        self.clock = clock
+        self._playbacks = []
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, room, kind):
+        """Expected duration of a ``kind`` sound on ``room``'s actuator"""
+        return self._estimates.get((room, kind), self.default_duration)
+
+    def begin(self, room, kind, duration=None):
+        now = self.clock()
+        playback = Playback(room, kind, now, now + (duration if duration is not None else self.estimate(room, kind)))
+        with self._lock:
+            self._playbacks = [p for p in self._playbacks if p.end + self.tail > now - self.retention]
+            self._playbacks.append(playback)
+        get_metrics().inc(f"echo.playbacks.{kind}")
+        return playback
+
+    def end(self, playback):
+        now = self.clock()
+        playback.end = now
+        playback.stopped = True
+        observed = now - playback.start
+        key = (playback.room, playback.kind)
+        previous = self._estimates.get(key)
+        self._estimates[key] = observed if previous is None else previous + self.smoothing * (observed - previous)
+
+    @contextmanager
+    def playing(self, room, kind, duration=None):
+        playback = self.begin(room, kind, duration)
+        try:
+            yield playback
+        finally:
+            self.end(playback)
+
+    def _matching(self, room):
+        with self._lock:
+            playbacks = list(self._playbacks)
+        return [p for p in playbacks if room is None or p.room is None or p.room == room]
+
+    def overlaps(self, room, start, end):
+        """Whether audio captured in ``room`` between ``start`` and ``end`` may contain twin's playback"""
+        return any(p.start <= end and start <= p.end + self.tail for p in self._matching(room))
+
+    def active(self, room=None, at=None):
+        at = self.clock() if at is None else at
+        return self.overlaps(room, at, at)
+
+    def stats(self):
+        now = self.clock()
+        return {
+            "active": sorted({p.room or "*" for p in self._matching(None) if p.start <= now <= p.end + self.tail}),
+            "estimates": {f"{room or '*'}.{kind}": round(seconds, 2) for (room, kind), seconds in self._estimates.items()},
+        }
+
+
+def playback_room():
+    """
+    Room where twin's own cues are heard: PLAYBACK_ROOM if set, else the room
+    whose actuator is SSH_HOST_TARGET, else None (treated as every room).
+    """
+    if config.PLAYBACK_ROOM:
+        return config.PLAYBACK_ROOM
+    if config.SSH_HOST_TARGET:
+        from ..core.room_manager import get_room_manager
+        for room, actuator in get_room_manager().get_all_actuators().items():
+            if actuator.get("ssh_target") == config.SSH_HOST_TARGET:
+                return room
+    return None
+
+
+playback_tracker = None
+
+
+def get_playback_tracker():
+    """Get singleton playback tracker"""
+    global playback_tracker
+    if playback_tracker is None:
+        playback_tracker = PlaybackTracker(tail=config.ECHO_TAIL, default_duration=config.ECHO_DEFAULT_DURATION)
+        get_metrics().register_collector("echo", playback_tracker.stats)
+    return playback_tracker
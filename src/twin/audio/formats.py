@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def full_scale(dtype):
+    dtype = np.dtype(dtype)
+    return float(np.iinfo(dtype).max + 1) if dtype.kind == 'i' else 1.0
+
+
+class SampleFormat:
+    """How PCM samples are carried from ffmpeg through buffers to uploads"""
+
+    def __init__(self, name, dtype, ffmpeg_codec, ffmpeg_format, wav_subtype):
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.ffmpeg_codec = ffmpeg_codec
+        self.ffmpeg_format = ffmpeg_format
+        self.wav_subtype = wav_subtype
+        self.bytes_per_sample = self.dtype.itemsize
+        # Divisor that maps raw sample values onto the [-1, 1) float range
+        self.full_scale = full_scale(self.dtype)
+
+
+SAMPLE_FORMATS = {
+    'f32': SampleFormat('f32', np.float32, 'pcm_f32le', 'f32le', 'FLOAT'),
+    's16': SampleFormat('s16', np.int16, 'pcm_s16le', 's16le', 'PCM_16'),
+}
+
+
+def get_sample_format(name):
+    try:
+        return SAMPLE_FORMATS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown sample format '{name}', expected one of {sorted(SAMPLE_FORMATS)}")
+
+
+def to_float32(audio_data):
+    """Convert PCM of any supported dtype to float32 in [-1, 1); float32 input is returned as-is"""
+    audio_data = np.asarray(audio_data)
+    if audio_data.dtype == np.float32:
+        return audio_data
+    if audio_data.dtype.kind == 'i':
+        return audio_data.astype(np.float32) * np.float32(1.0 / full_scale(audio_data.dtype))
+    return audio_data.astype(np.float32)
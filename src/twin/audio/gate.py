@@ -0,0 +1,79 @@
+import math
+import numpy as np
+from .formats import full_scale
+
+
+def signal_rms(audio_data):
+    """RMS of a PCM array relative to full scale (so int16 and float32 compare directly)"""
+    audio_data = np.asarray(audio_data).reshape(-1)
+    if audio_data.shape[0] == 0:
+        return 0.0
+    sumsq = float(np.einsum('i,i->', audio_data, audio_data, dtype=np.float64))
+    return math.sqrt(sumsq / audio_data.shape[0]) / full_scale(audio_data.dtype)
+
+
+class NoiseGate:
+    """
+    Per-source SNR gate driven by the source's own noise floor.
+
+    The floor is the ``percentile`` of the recent block energies the ring
+    buffer already tracks, so a room with HVAC hum or street noise raises
+    its own bar while a quiet mic keeps a low one. Audio passes when its
+    level is ``snr_db`` above that floor and above the absolute ``min_rms``.
+    Every decision is counted so per-source gate-open rates can be reported.
+    """
+
+    def __init__(self, buffer, snr_db=6.0, percentile=10, min_rms=0.002, probe_seconds=0.5, sample_rate=16000):
+        self.buffer = buffer
+        self.snr_db = snr_db
+        self.snr_ratio = 10 ** (snr_db / 20.0)
+        self.percentile = percentile
+        self.min_rms = min_rms
+        self.probe_samples = max(1, int(probe_seconds * sample_rate))
+        self.checks = 0
+        self.opens = 0
+
+    def noise_floor(self):
+        """Current noise floor (full-scale RMS), or None before any block has completed"""
+        floor = self.buffer.noise_floor(self.percentile)
+        return None if math.isnan(floor) else floor
+
+    def threshold(self):
+        floor = self.noise_floor()
+        if floor is None:
+            return self.min_rms
+        return max(self.min_rms, floor * self.snr_ratio)
+
+    def check(self, level):
+        """Record a gate decision for a full-scale RMS ``level`` and return whether it passes"""
+        is_open = level >= self.threshold()
+        self.checks += 1
+        if is_open:
+            self.opens += 1
+        return is_open
+
+    def check_audio(self, audio_data):
+        return self.check(signal_rms(audio_data))
+
+    def check_recent(self):
+        """Gate on the newest ``probe_seconds`` of the buffer (O(1) from the block history)"""
+        level = self.buffer.recent_rms(self.probe_samples)
+        if math.isnan(level):
+            return False
+        return self.check(level)
+
+    @property
+    def open_rate(self):
+        return self.opens / self.checks if self.checks else 0.0
+
+    def stats(self):
+        """Per-source gate state for logging and metrics"""
+        floor = self.noise_floor()
+        return {
+            "noise_floor": floor,
+            "noise_floor_db": 20 * math.log10(floor) if floor else None,
+            "threshold": self.threshold(),
+            "checks": self.checks,
+            "opens": self.opens,
+            "open_rate": self.open_rate,
+        }
@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+import subprocess
+from urllib.parse import urlsplit
+from ..core import config
+
+logger = logging.getLogger("twin")
+
+
+def backoff_delay(failures, base=2.0, maximum=300.0, jitter=0.2):
+    """Exponential backoff for the n-th consecutive failure, randomized by +/- ``jitter``"""
+    delay = min(maximum, base * (2 ** max(0, failures - 1)))
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+def redact_url(url):
+    """``url`` without ``user:pass@`` credentials, for logs, metrics and anything persisted"""
+    parts = urlsplit(url)
+    if parts.username is None and parts.password is None:
+        return url
+    host = parts.hostname or ''
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    return parts._replace(netloc=netloc).geturl()
+
+
+def build_ffprobe_command(url, latency_flags=None):
+    cmd = ['ffprobe', '-v', 'error']
+    flags = latency_flags.split() if isinstance(latency_flags, str) else list(latency_flags or [])
+    if '-rtsp_transport' in flags:
+        # Probe over the same transport ffmpeg will use
+        i = flags.index('-rtsp_transport')
+        cmd.extend(flags[i:i + 2])
+    cmd.extend([
+        '-select_streams', 'a',
+        '-show_entries', 'stream=codec_name,sample_rate,channels',
+        '-of', 'json',
+        url,
+    ])
+    return cmd
+
+
+class StreamInfo:
+    """Cached result of probing one source URL"""
+
+    def __init__(self, reachable, has_audio=False, codec=None, sample_rate=None, channels=None, probed_at=None, error=None):
+        self.reachable = reachable
+        self.has_audio = has_audio
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.probed_at = probed_at if probed_at is not None else time.time()
+        self.error = error
+
+    def to_dict(self):
+        return {
+            "reachable": self.reachable,
+            "has_audio": self.has_audio,
+            "codec": self.codec,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "probed_at": self.probed_at,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        if not self.reachable:
+            return f"StreamInfo(unreachable: {self.error})"
+        if not self.has_audio:
+            return "StreamInfo(no audio)"
+        return f"StreamInfo({self.codec}, {self.sample_rate} Hz, {self.channels} ch)"
+
+
+def probe_stream(url, timeout=15, latency_flags=None):
+    """Probe ``url`` with ffprobe for its first audio stream"""
+    try:
+        result = subprocess.run(build_ffprobe_command(url, latency_flags), capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return StreamInfo(False, error=f"ffprobe timed out after {timeout}s")
+    except FileNotFoundError:
+        return StreamInfo(False, error="ffprobe not found")
+    if result.returncode != 0:
+        return StreamInfo(False, error=result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"ffprobe exit code {result.returncode}")
+    try:
+        streams = json.loads(result.stdout or '{}').get('streams', [])
+    except ValueError as e:
+        return StreamInfo(False, error=f"Unparseable ffprobe output: {e}")
+    if not streams:
+        return StreamInfo(True, has_audio=False)
+    stream = streams[0]
+    return StreamInfo(
+        True,
+        has_audio=True,
+        codec=stream.get('codec_name'),
+        sample_rate=int(stream['sample_rate']) if stream.get('sample_rate') else None,
+        channels=stream.get('channels'),
+    )
+
+
+class SourceHealth:
+    """Backoff and probe state for one source URL"""
+
+    def __init__(self, url):
+        self.url = url
+        self.info = None
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.parked = False
+        self.spawns = 0
+
+    @property
+    def state(self):
+        if self.parked:
+            return "parked"
+        if self.failures:
+            return "failing"
+        return "healthy" if self.info and self.info.has_audio else "unknown"
+
+
+class SourceHealthManager:
+    """
+    Tracks every RTSP source's capabilities and reconnect schedule.
+
+    Each URL is probed once and the result (has audio, codec, rate) is cached
+    on disk for ``probe_ttl`` seconds so restarts do not re-probe. State is
+    keyed by the URL without credentials, so none reach the cache file. Sources
+    without an audio track are parked and only re-probed every
+    ``park_interval`` seconds; failing sources are retried with jittered
+    exponential backoff instead of a fixed interval. Capture code reports
+    connection outcomes through ``record_success``/``record_failure`` so the
+    backoff is shared by every reconnect path. ``listener``, when set, is
+    called with (event, url, reason) for every spawn, success and failure;
+    capture worker processes use it to forward their outcomes to the main
+    process.
+    """
+
+    def __init__(self, cache_path=None, probe_ttl=86400, base_delay=2.0, max_delay=300.0, jitter=0.2, park_interval=3600, probe_timeout=15, latency_flags=None):
+        self.cache_path = cache_path
+        self.probe_ttl = probe_ttl
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.park_interval = park_interval
+        self.probe_timeout = probe_timeout
+        self.latency_flags = latency_flags
+        self.listener = None
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._load_cache()
+
+    def _source(self, url):
+        url = redact_url(url)
+        with self._lock:
+            source = self._sources.get(url)
+            if source is None:
+                source = self._sources[url] = SourceHealth(url)
+            return source
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable stream probe cache {self.cache_path}: {e}")
+            return
+        now = time.time()
+        for url, data in cached.items():
+            info = StreamInfo.from_dict(data)
+            if now - info.probed_at < self.probe_ttl:
+                self._source(url).info = info
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            # Only successful probes are worth remembering across restarts
+            data = {url: s.info.to_dict() for url, s in self._sources.items() if s.info and s.info.reachable}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            tmp = f"{self.cache_path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write stream probe cache {self.cache_path}: {e}")
+
+    def probe(self, url, force=False):
+        """
+        Return the cached StreamInfo for ``url``, probing it if needed.
+        Blocking (runs ffprobe); call from an executor in async code.
+        """
+        source = self._source(url)
+        cached = source.info
+        if cached is not None and cached.reachable and not force:
+            if cached.has_audio:
+                return cached
+            if not source.parked:
+                # Known audio-less from the disk cache: park without re-probing
+                self._park(source)
+                return cached
+            # Parked and the park interval has elapsed: probe again
+        info = probe_stream(url, self.probe_timeout, self.latency_flags)
+        source.info = info
+        if not info.reachable:
+            delay = self.record_failure(url, info.error)
+            logger.warning(f"Probe failed for {source.url}: {info.error}; retrying in {delay:.0f}s")
+        elif not info.has_audio:
+            self._park(source)
+        else:
+            source.parked = False
+            logger.info(f"Probed {source.url}: {info}")
+        self._save_cache()
+        return info
+
+    def cached_info(self, url):
+        """Last known StreamInfo for ``url`` without probing (None if unknown)"""
+        return self._source(url).info
+
+    def record_info(self, url, info):
+        """Store stream details learned some other way than ffprobe (e.g. a native reader's headers)"""
+        self._source(url).info = info
+        self._save_cache()
+
+    def _park(self, source):
+        source.parked = True
+        source.next_attempt = time.monotonic() + self.park_interval
+        logger.warning(f"No audio track on {source.url}; parked (re-probe in {self.park_interval:.0f}s)")
+
+    def delay(self, url):
+        """Seconds until ``url`` may be (re)connected; 0 when it may connect now"""
+        return max(0.0, self._source(url).next_attempt - time.monotonic())
+
+    def is_parked(self, url):
+        return self._source(url).parked
+
+    def _notify(self, event, url, reason=None):
+        if self.listener is not None:
+            try:
+                self.listener(event, url, reason)
+            except Exception as e:
+                logger.debug(f"Source health listener failed: {e}")
+
+    def record_spawn(self, url):
+        self._source(url).spawns += 1
+        self._notify("spawn", url)
+
+    def record_success(self, url):
+        source = self._source(url)
+        if source.failures:
+            logger.info(f"{url} recovered after {source.failures} failure(s)")
+        source.failures = 0
+        source.next_attempt = 0.0
+        self._notify("success", url)
+
+    def record_failure(self, url, reason=None):
+        """Schedule the next attempt with jittered exponential backoff; returns the delay"""
+        source = self._source(url)
+        source.failures += 1
+        delay = backoff_delay(source.failures, self.base_delay, self.max_delay, self.jitter)
+        source.next_attempt = time.monotonic() + delay
+        if source.failures >= 3 and source.info is not None and source.info.has_audio:
+            # Repeated failures may mean the stream changed; re-probe before the next attempt
+            source.info = None
+        self._notify("failure", url, reason)
+        return delay
+
+    def stats(self):
+        with self._lock:
+            sources = list(self._sources.values())
+        return {
+            s.url.split('://')[-1]: {  # Already without credentials; drop the scheme too
+                "state": s.state,
+                "failures": s.failures,
+                "spawns": s.spawns,
+                "retry_in": round(max(0.0, s.next_attempt - time.monotonic()), 1),
+                "codec": s.info.codec if s.info else None,
+                "sample_rate": s.info.sample_rate if s.info else None,
+            }
+            for s in sources
+        }
+
+
+source_health = None
+
+
+def get_source_health():
+    """Get singleton source health manager"""
+    global source_health
+    if source_health is None:
+        source_health = SourceHealthManager(
+            cache_path=config.RTSP_PROBE_CACHE or None,
+            probe_ttl=config.RTSP_PROBE_TTL,
+            base_delay=config.RTSP_BACKOFF_BASE,
+            max_delay=config.RTSP_BACKOFF_MAX,
+            park_interval=config.RTSP_PARK_INTERVAL,
+            latency_flags=config.RTSP_LATENCY_FLAGS,
+        )
+    return source_health
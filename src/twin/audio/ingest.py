@@ -0,0 +1,309 @@
+import os
+import time
+import logging
+import selectors
+import subprocess
+import threading
+import numpy as np
+from .ring_buffer import AudioRingBuffer
+from .formats import get_sample_format
+from .rtsp_audio import build_ffmpeg_command
+from .health import get_source_health
+
+logger = logging.getLogger("twin")
+
+
+class IngestSource:
+    """
+    One RTSP source served by the shared IngestEngine.
+
+    Exposes the same surface process_rtsp_source relies on from
+    RTSPAudioCapture (``buffer``, ``is_running``, ``stop()``), but owns no
+    threads: the engine reads its ffmpeg pipes and calls ``callback`` from
+    the single ingest thread. The ``indata`` handed to the callback is a view
+    into a reused chunk buffer, so callbacks must copy anything they keep.
+    """
+
+    def __init__(
+        self,
+        engine,
+        rtsp_url,
+        callback,
+        sample_rate=48000,
+        channels=1,
+        chunk_size=1024,
+        buffer_size=144000,
+        latency_flags=None,
+        reconnect_interval=20,
+        sample_format='f32'
+    ):
+        self.engine = engine
+        self.rtsp_url = rtsp_url
+        self.callback = callback
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_size = chunk_size
+        self.latency_flags = latency_flags or []
+        self.reconnect_interval = reconnect_interval
+        self.sample_format = get_sample_format(sample_format)
+        self.buffer = AudioRingBuffer(buffer_size, dtype=self.sample_format.dtype)
+
+        self._chunk_raw = bytearray(chunk_size * channels * self.sample_format.bytes_per_sample)
+        self._chunk_view = memoryview(self._chunk_raw)
+        self._chunk_array = np.frombuffer(self._chunk_raw, dtype=self.sample_format.dtype)
+        self._filled = 0
+        self._stderr_tail = b''
+
+        self.process = None
+        self.is_running = True
+        self.connected = False
+        self.connection_failures = 0
+        self.next_attempt = 0.0
+
+    def build_command(self):
+        return build_ffmpeg_command(self.rtsp_url, self.sample_rate, self.channels, self.latency_flags, self.sample_format.name)
+
+    def stop(self):
+        """Detach this source from the engine and terminate its ffmpeg process"""
+        self.engine.remove_source(self)
+
+
+class IngestEngine:
+    """
+    Reads every RTSP source's ffmpeg stdout/stderr from one selector loop.
+
+    The engine owns process spawning, reconnection, stderr draining and
+    dispatch into each source's ring buffer, so the number of threads stays
+    at one regardless of how many sources are attached.
+    """
+
+    def __init__(self, select_timeout=1.0, kill_timeout=5.0):
+        self.select_timeout = select_timeout
+        self.kill_timeout = kill_timeout
+        self._selector = selectors.DefaultSelector()
+        self._sources = []
+        self._pending = []
+        self._reaping = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self.is_running = False
+
+        # Self-pipe so add/remove from other threads wake the loop immediately
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, ("wake", None))
+
+    def add_source(self, rtsp_url, callback, **kwargs):
+        source = IngestSource(self, rtsp_url, callback, **kwargs)
+        self._submit("add", source)
+        self.start()
+        logger.info(f"Attached {rtsp_url} to shared ingest engine")
+        return source
+
+    def remove_source(self, source):
+        source.is_running = False
+        self._submit("remove", source)
+
+    @property
+    def source_count(self):
+        return len(self._sources)
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name="twin-ingest")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info("Shared ingest engine started")
+
+    def stop(self):
+        self.is_running = False
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        for source in list(self._sources):
+            self._disconnect(source, reconnect=False)
+        self._sources.clear()
+        self._reap(force=True)
+        logger.info("Shared ingest engine stopped")
+
+    def _submit(self, op, source):
+        with self._lock:
+            self._pending.append((op, source))
+        self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass  # A wakeup is already pending
+
+    def _apply_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for op, source in pending:
+            if op == "add":
+                self._sources.append(source)
+            elif source in self._sources:
+                self._disconnect(source, reconnect=False)
+                self._sources.remove(source)
+                logger.info(f"Detached {source.rtsp_url} from shared ingest engine")
+
+    def _run(self):
+        while self.is_running:
+            self._apply_pending()
+            now = time.monotonic()
+            timeout = self.select_timeout
+            for source in self._sources:
+                if source.process is None:
+                    if now >= source.next_attempt:
+                        self._spawn(source)
+                    else:
+                        timeout = min(timeout, source.next_attempt - now)
+            self._reap()
+
+            for key, _ in self._selector.select(max(0.0, timeout)):
+                kind, source = key.data
+                if kind == "wake":
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif kind == "stdout":
+                    self._read_stdout(source)
+                elif kind == "stderr":
+                    self._read_stderr(source)
+
+    def _spawn(self, source):
+        cmd = source.build_command()
+        logger.info(f"Starting FFmpeg process with command: {' '.join(cmd)}")
+        get_source_health().record_spawn(source.rtsp_url)
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        except Exception as e:
+            self._schedule_reconnect(source, f"Error starting FFmpeg process: {e}")
+            return
+        os.set_blocking(process.stdout.fileno(), False)
+        os.set_blocking(process.stderr.fileno(), False)
+        self._selector.register(process.stdout, selectors.EVENT_READ, ("stdout", source))
+        self._selector.register(process.stderr, selectors.EVENT_READ, ("stderr", source))
+        source.process = process
+        source.connected = False
+        source._filled = 0
+
+    def _read_stdout(self, source):
+        if source.process is None:
+            return
+        try:
+            nbytes = os.readv(source.process.stdout.fileno(), [source._chunk_view[source._filled:]])
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._disconnect(source, reason=f"Error reading RTSP audio: {e}")
+            return
+        if nbytes == 0:
+            code = source.process.poll()
+            self._disconnect(source, reason=f"End of RTSP stream or connection lost (ffmpeg exit code {code})")
+            return
+
+        if not source.connected:
+            source.connected = True
+            source.connection_failures = 0
+            get_source_health().record_success(source.rtsp_url)
+            logger.info(f"RTSP connection established successfully for {source.rtsp_url}")
+
+        source._filled += nbytes
+        if source._filled < len(source._chunk_raw):
+            return
+        source._filled = 0
+
+        audio_array = source._chunk_array
+        source.buffer.write(audio_array[::source.channels] if source.channels > 1 else audio_array)
+        if source.callback:
+            try:
+                source.callback(audio_array.reshape(-1, source.channels), source.chunk_size, {'current_time': time.time()}, None)
+            except Exception as e:
+                logger.error(f"Error in callback for {source.rtsp_url}: {e}")
+
+    def _read_stderr(self, source):
+        if source.process is None:
+            return
+        try:
+            data = os.read(source.process.stderr.fileno(), 4096)
+        except (BlockingIOError, OSError):
+            return
+        if not data:
+            # stdout EOF drives reconnection; stop polling the closed stderr
+            try:
+                self._selector.unregister(source.process.stderr)
+            except (KeyError, ValueError):
+                pass
+            return
+        lines = (source._stderr_tail + data).split(b'\n')
+        source._stderr_tail = lines.pop()[-4096:]
+        for line in lines:
+            stderr_line = line.decode('utf-8', errors='replace').strip()
+            if stderr_line:
+                logger.debug(f"FFmpeg [{source.rtsp_url}]: {stderr_line}")
+
+    def _disconnect(self, source, reason=None, reconnect=True):
+        process = source.process
+        if process is None:
+            return
+        for stream in (process.stdout, process.stderr):
+            try:
+                self._selector.unregister(stream)
+            except (KeyError, ValueError):
+                pass
+        source.process = None
+        source._stderr_tail = b''
+        try:
+            process.terminate()
+        except OSError:
+            pass
+        self._reaping.append((process, time.monotonic() + self.kill_timeout))
+        if reconnect and source.is_running:
+            self._schedule_reconnect(source, reason)
+
+    def _schedule_reconnect(self, source, reason):
+        source.connection_failures += 1
+        # Jittered exponential backoff shared with the probe/creation path
+        delay = get_source_health().record_failure(source.rtsp_url, reason)
+        source.next_attempt = time.monotonic() + delay
+        state = "lost" if source.connected else "failed"
+        logger.warning(f"RTSP connection {state} for {source.rtsp_url} (failure #{source.connection_failures}): {reason}. Reconnecting in {delay:.0f} seconds...")
+        source.connected = False
+
+    def _reap(self, force=False):
+        """Collect terminated ffmpeg processes without blocking the loop"""
+        still_running = []
+        now = time.monotonic()
+        for process, deadline in self._reaping:
+            if process.poll() is not None:
+                process.stdout.close()
+                process.stderr.close()
+                continue
+            if force or now >= deadline:
+                try:
+                    process.kill()
+                    process.wait(timeout=1)
+                except Exception:
+                    pass
+                continue
+            still_running.append((process, deadline))
+        self._reaping = still_running
+
+
+ingest_engine = None
+
+
+def get_ingest_engine():
+    """Get singleton ingest engine instance"""
+    global ingest_engine
+    if ingest_engine is None:
+        ingest_engine = IngestEngine()
+    return ingest_engine
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Audio-domain keyword spotter for wake words.
+
+Features are NumPy log-mel / MFCC frames; enrolled recordings of each wake
+phrase are kept as templates and matched against incoming audio with
+subsequence DTW, so asleep rooms can be screened without running Whisper.
+
+    python -m twin.audio.kws enroll --keyword "hey twin" hey_twin_*.wav
+    python -m twin.audio.kws report --positive wake_clips/ --negative background/
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+import numpy as np
+from .formats import to_float32
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger("twin")
+
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels=40, fmin=60.0, fmax=None):
+    """(n_mels, n_fft // 2 + 1) triangular filters on the mel scale"""
+    fmax = fmax or sample_rate / 2
+    mel = lambda hz: 2595.0 * np.log10(1.0 + hz / 700.0)
+    hz = lambda m: 700.0 * (10 ** (m / 2595.0) - 1.0)
+    edges = hz(np.linspace(mel(fmin), mel(fmax), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def dct_matrix(n_out, n_in):
+    """Orthonormal DCT-II basis, (n_out, n_in)"""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+
+class FeatureExtractor:
+    """25 ms / 10 ms log-mel and MFCC frames with the filterbank and DCT built once"""
+
+    def __init__(self, sample_rate=16000, n_mels=40, n_mfcc=13):
+        self.sample_rate = sample_rate
+        self.frame = int(FRAME_SECONDS * sample_rate)
+        self.hop = int(HOP_SECONDS * sample_rate)
+        self.n_fft = 1 << (self.frame - 1).bit_length()
+        self.window = np.hanning(self.frame).astype(np.float32)
+        self.filters = mel_filterbank(sample_rate, self.n_fft, n_mels)
+        self.dct = dct_matrix(n_mfcc, n_mels)
+
+    def log_mel(self, audio_data):
+        audio = to_float32(audio_data)
+        if audio.shape[0] < self.frame:
+            return np.zeros((0, self.filters.shape[0]), dtype=np.float32)
+        audio = np.append(audio[0], audio[1:] - 0.97 * audio[:-1])  # Pre-emphasis
+        frames = np.lib.stride_tricks.sliding_window_view(audio, self.frame)[::self.hop] * self.window
+        power = np.abs(np.fft.rfft(frames, self.n_fft)) ** 2
+        return np.log(power @ self.filters.T + 1e-8).astype(np.float32)
+
+    def mfcc(self, audio_data):
+        """
+        MFCCs without c0, so matching ignores level. No per-clip mean
+        normalization: a trimmed enrollment clip and a mostly-silent window
+        would get different means and stop lining up.
+        """
+        return (self.log_mel(audio_data) @ self.dct.T)[:, 1:]
+
+
+def _unit_rows(features):
+    return features / (np.linalg.norm(features, axis=1, keepdims=True) + 1e-8)
+
+
+def subsequence_dtw(template, query):
+    """
+    Match ``template`` anywhere in ``query``. Returns, for every query frame,
+    the mean cosine distance of the best alignment of the whole template
+    ending there. Each template frame advances the query by 0, 1 or 2
+    frames, so faster speech or speech up to twice as slow still aligns;
+    one row per template frame keeps it vectorized over the query.
+    """
+    cost = 1.0 - _unit_rows(template) @ _unit_rows(query).T
+    scores = cost[0].copy()
+    for row in cost[1:]:
+        best = scores.copy()
+        np.minimum(best[1:], scores[:-1], out=best[1:])
+        np.minimum(best[2:], scores[:-2], out=best[2:])
+        scores = row + best
+    return scores / template.shape[0]
+
+
+class KeywordHit:
+    def __init__(self, keyword, score, end_time):
+        self.keyword = keyword
+        self.score = score
+        self.end_time = end_time
+
+    def __repr__(self):
+        return f"KeywordHit({self.keyword!r}, score={self.score:.3f}, at {self.end_time:.2f}s)"
+
+
+class KeywordSpotter:
+    """
+    Template-matching wake word engine.
+
+    ``templates`` maps each keyword to the MFCC sequences of its enrolled
+    recordings; audio scores as the best (lowest) subsequence-DTW distance
+    to any template, and a score at or below ``threshold`` is a hit.
+    """
+
+    def __init__(self, templates, threshold=0.1, sample_rate=16000):
+        self.templates = templates
+        self.threshold = threshold
+        self.features = FeatureExtractor(sample_rate)
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def load(cls, path, threshold=None, sample_rate=16000):
+        data = np.load(path, allow_pickle=False)
+        templates = {}
+        for name in data.files:
+            if name.startswith('template:'):
+                keyword = name.split(':')[1]
+                templates.setdefault(keyword, []).append(data[name])
+        stored = float(data['threshold']) if 'threshold' in data.files else 0.1
+        if 'sample_rate' in data.files and int(data['sample_rate']) != sample_rate:
+            raise ValueError(f"{path} was enrolled at {int(data['sample_rate'])} Hz, pipeline runs at {sample_rate} Hz")
+        return cls(templates, stored if threshold is None else threshold, sample_rate)
+
+    def save(self, path):
+        arrays = {"threshold": np.float32(self.threshold), "sample_rate": np.int32(self.sample_rate)}
+        for keyword, sequences in self.templates.items():
+            for i, sequence in enumerate(sequences):
+                arrays[f"template:{keyword}:{i}"] = sequence
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez_compressed(path, **arrays)
+
+    def enroll(self, keyword, audio_data):
+        features = self.features.mfcc(audio_data)
+        if features.shape[0] < 10:
+            raise ValueError(f"Recording for {keyword!r} is too short to enroll")
+        self.templates.setdefault(keyword, []).append(features)
+        return features
+
+    def score_track(self, audio_data):
+        """(keyword, per-frame best score) for each keyword over ``audio_data``"""
+        query = self.features.mfcc(audio_data)
+        tracks = {}
+        for keyword, sequences in self.templates.items():
+            usable = [s for s in sequences if s.shape[0] <= 2 * query.shape[0]]
+            if usable:
+                tracks[keyword] = np.min([subsequence_dtw(s, query) for s in usable], axis=0)
+        return tracks
+
+    def detect(self, audio_data):
+        """Best hit in ``audio_data`` or None"""
+        started = time.monotonic()
+        best = None
+        for keyword, track in self.score_track(audio_data).items():
+            frame = int(np.argmin(track))
+            if track[frame] <= self.threshold and (best is None or track[frame] < best.score):
+                best = KeywordHit(keyword, float(track[frame]), frame * HOP_SECONDS + FRAME_SECONDS)
+        metrics = get_metrics()
+        metrics.observe("kws.seconds", time.monotonic() - started)
+        metrics.inc("kws.hits" if best else "kws.rejects")
+        return best
+
+    def count_hits(self, audio_data, threshold=None):
+        """Hits in a long recording, counting a run under the threshold once per template length"""
+        threshold = self.threshold if threshold is None else threshold
+        hits = 0
+        for keyword, track in self.score_track(audio_data).items():
+            gap = int(np.mean([s.shape[0] for s in self.templates[keyword]]))
+            frame = 0
+            while frame < track.shape[0]:
+                if track[frame] <= threshold:
+                    hits += 1
+                    frame += gap
+                else:
+                    frame += 1
+        return hits
+
+
+keyword_spotter = None
+
+
+def get_keyword_spotter():
+    """Get the singleton keyword spotter, or None if WAKE_ENGINE is not 'kws' or no templates are enrolled"""
+    global keyword_spotter
+    from ..core import config
+    if keyword_spotter is None and config.WAKE_ENGINE == 'kws':
+        if not os.path.exists(config.KWS_TEMPLATES):
+            logger.warning(f"WAKE_ENGINE=kws but {config.KWS_TEMPLATES} does not exist; enroll with 'python -m twin.audio.kws enroll'. Using text wake detection")
+            config.WAKE_ENGINE = 'text'
+            return None
+        keyword_spotter = KeywordSpotter.load(config.KWS_TEMPLATES, config.KWS_THRESHOLD, config.SAMPLE_RATE)
+        keywords = ", ".join(f"'{k}' x{len(v)}" for k, v in keyword_spotter.templates.items())
+        logger.info(f"Keyword spotter loaded from {config.KWS_TEMPLATES}: {keywords}, threshold {keyword_spotter.threshold:.3f}")
+    return keyword_spotter
+
+
+def _recordings(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(('.wav', '.flac', '.raw', '.pcm')):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def _load(path, sample_rate):
+    from .replay import load_recording
+    return load_recording(path, sample_rate, 1, 'f32')[:, 0]
+
+
+def enroll_command(args):
+    spotter = KeywordSpotter.load(args.templates, sample_rate=args.sample_rate) if os.path.exists(args.templates) and not args.replace \
+        else KeywordSpotter({}, sample_rate=args.sample_rate)
+    for path in _recordings(args.recordings):
+        features = spotter.enroll(args.keyword, _load(path, args.sample_rate))
+        print(f"Enrolled {path} as '{args.keyword}' ({features.shape[0]} frames)")
+
+    # Leave-one-out: how far each recording is from the other enrollments of its keyword
+    distances = []
+    for keyword, sequences in spotter.templates.items():
+        for i, sequence in enumerate(sequences):
+            others = [s for j, s in enumerate(sequences) if j != i]
+            if others:
+                distances.append(min(float(subsequence_dtw(s, sequence).min()) for s in others))
+    if args.threshold is not None:
+        spotter.threshold = args.threshold
+    elif distances:
+        # Margin for live audio (room noise, other mics) over clean enrollment clips; tune with 'report'
+        spotter.threshold = float(np.max(distances) * 1.5)
+        print(f"Leave-one-out distances: median {np.median(distances):.3f}, max {np.max(distances):.3f}")
+    spotter.save(args.templates)
+    print(f"Saved {sum(len(v) for v in spotter.templates.values())} templates to {args.templates} (threshold {spotter.threshold:.3f})")
+
+
+def report_command(args):
+    spotter = KeywordSpotter.load(args.templates, sample_rate=args.sample_rate)
+    positives = [(path, spotter.score_track(_load(path, args.sample_rate))) for path in _recordings(args.positive)]
+    positive_scores = np.array([min(float(t.min()) for t in tracks.values()) if tracks else np.inf for _, tracks in positives])
+    negatives = [_load(path, args.sample_rate) for path in _recordings(args.negative or [])]
+    negative_hours = sum(audio.shape[0] for audio in negatives) / args.sample_rate / 3600
+
+    thresholds = sorted({spotter.threshold, *np.round(np.linspace(0.1, 0.6, 11), 3)})
+    print(f"{len(positives)} keyword recordings, {len(negatives)} background recordings ({negative_hours * 60:.1f} min)")
+    print(f"{'threshold':>10} {'false reject':>13} {'false accepts':>14} {'FA/hour':>9}")
+    for threshold in thresholds:
+        false_rejects = float(np.mean(positive_scores > threshold)) if positives else 0.0
+        false_accepts = sum(spotter.count_hits(audio, threshold) for audio in negatives)
+        per_hour = false_accepts / negative_hours if negative_hours else 0.0
+        marker = "  <- current" if threshold == spotter.threshold else ""
+        print(f"{threshold:>10.3f} {false_rejects:>12.1%} {false_accepts:>14d} {per_hour:>9.1f}{marker}")
+    for (path, _), score in zip(positives, positive_scores):
+        if score > spotter.threshold:
+            print(f"  missed: {path} (score {score:.3f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enroll and evaluate wake-word templates for the keyword spotter")
+    parser.add_argument("--templates", default=os.getenv('KWS_TEMPLATES', 'config/kws_templates.npz'), help="Template file")
+    parser.add_argument("--sample-rate", type=int, default=int(os.getenv('SAMPLE_RATE', '16000')), help="Pipeline sample rate")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enroll = commands.add_parser("enroll", help="Add recordings of a wake phrase as templates")
+    enroll.add_argument("--keyword", required=True, help="Wake phrase the recordings contain, e.g. 'hey twin'")
+    enroll.add_argument("--threshold", type=float, help="Detection threshold (default: from leave-one-out distances)")
+    enroll.add_argument("--replace", action="store_true", help="Start a new template file instead of adding to it")
+    enroll.add_argument("recordings", nargs="+", help="WAV/FLAC/raw files or directories of tightly trimmed wake phrases")
+    enroll.set_defaults(func=enroll_command)
+
+    report = commands.add_parser("report", help="False-accept / false-reject rates over labelled recordings")
+    report.add_argument("--positive", nargs="+", required=True, help="Recordings that contain a wake phrase")
+    report.add_argument("--negative", nargs="+", help="Background recordings without a wake phrase")
+    report.set_defaults(func=report_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,482 @@
+import re
+import abc
+import ssl
+import time
+import base64
+import struct
+import asyncio
+import hashlib
+import logging
+import numpy as np
+from urllib.parse import urlsplit, unquote
+from .ring_buffer import AudioRingBuffer
+from .formats import get_sample_format
+from .health import StreamInfo, get_source_health, redact_url
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger("twin")
+
+# Uncompressed codecs (ffprobe names) read without ffmpeg, with their wire dtype
+NATIVE_CODECS = {
+    'pcm_s16le': np.dtype('<i2'),
+    'pcm_s16be': np.dtype('>i2'),
+}
+
+# Longest RTP gap filled with silence; larger sequence jumps are treated as a resync
+MAX_GAP_SECONDS = 1.0
+# Packets this far behind the newest one are late or duplicates and dropped
+MAX_REORDER_PACKETS = 64
+
+# Static RTP payload types for L16 (RFC 3551)
+STATIC_PAYLOADS = {10: ('L16', 44100, 2), 11: ('L16', 44100, 1)}
+RTP_CODEC_NAMES = {'l16': 'pcm_s16be', 'mpeg4-generic': 'aac', 'mp4a-latm': 'aac', 'pcmu': 'pcm_mulaw', 'pcma': 'pcm_alaw', 'opus': 'opus'}
+
+
+class UnsupportedStream(Exception):
+    """The stream is reachable but needs ffmpeg to decode; carries what was learned about it"""
+
+    def __init__(self, info, reason):
+        super().__init__(reason)
+        self.info = info
+
+
+def native_scheme(url):
+    """'http' or 'rtsp' when ``url`` could be read natively, else None"""
+    scheme = urlsplit(url).scheme.lower()
+    if scheme in ('http', 'https'):
+        return 'http'
+    if scheme == 'rtsp':
+        return 'rtsp'
+    return None
+
+
+def can_ingest_natively(info, sample_rate, channels):
+    """Whether a probed stream can skip ffmpeg: uncompressed 16-bit PCM at the pipeline's rate and layout"""
+    return (
+        info is not None
+        and info.codec in NATIVE_CODECS
+        and info.sample_rate == sample_rate
+        and info.channels == channels
+    )
+
+
+def parse_wav_header(data):
+    """
+    Parse a (possibly streaming) WAV header. Returns (codec, sample_rate,
+    channels, data_offset), or None when more bytes are needed. Chunk sizes
+    in the RIFF and data headers are ignored since live streams cannot know
+    them.
+    """
+    if len(data) < 12:
+        return None
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise ValueError("Not a WAV stream")
+    pos = 12
+    fmt = None
+    while True:
+        if len(data) < pos + 8:
+            return None
+        chunk_id, size = data[pos:pos + 4], struct.unpack('<I', data[pos + 4:pos + 8])[0]
+        pos += 8
+        if chunk_id == b'data':
+            break
+        if len(data) < pos + size:
+            return None
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', data[pos:pos + 16])
+        pos += size + (size & 1)
+    if fmt is None:
+        raise ValueError("WAV stream has no fmt chunk")
+    audio_format, channels, sample_rate, _, _, bits = fmt
+    if audio_format in (1, 0xFFFE) and bits == 16:
+        codec = 'pcm_s16le'
+    elif audio_format == 3:
+        codec = f'pcm_f{bits}le'
+    else:
+        codec = f'wav_{audio_format}_{bits}bit'
+    return codec, sample_rate, channels, pos
+
+
+def parse_rtp(packet):
+    """Returns (payload_type, sequence, payload) for one RTP packet"""
+    if len(packet) < 12 or packet[0] >> 6 != 2:
+        raise ValueError("Not an RTP packet")
+    csrc_count = packet[0] & 0x0F
+    payload_type = packet[1] & 0x7F
+    sequence = struct.unpack('!H', packet[2:4])[0]
+    start = 12 + 4 * csrc_count
+    if packet[0] & 0x10:
+        # Header extension: 16-bit profile, 16-bit length in words
+        ext_words = struct.unpack('!H', packet[start + 2:start + 4])[0]
+        start += 4 + 4 * ext_words
+    end = len(packet)
+    if packet[0] & 0x20:
+        end -= packet[-1]
+    return payload_type, sequence, packet[start:end]
+
+
+def parse_sdp_audio(sdp, base_url):
+    """
+    First audio media in an SDP description. Returns (payload_type, codec,
+    sample_rate, channels, control_url) using ffprobe codec names.
+    """
+    media = None
+    rtpmap = {}
+    control = None
+    for line in sdp.splitlines():
+        line = line.strip()
+        if line.startswith('m='):
+            if media is not None:
+                break
+            if line.startswith('m=audio'):
+                media = int(line.split()[3])
+        elif media is not None and line.startswith('a=rtpmap:'):
+            pt, encoding = line[len('a=rtpmap:'):].split(None, 1)
+            rtpmap[int(pt)] = encoding
+        elif media is not None and line.startswith('a=control:'):
+            control = line[len('a=control:'):]
+    if media is None:
+        return None
+    if media in rtpmap:
+        parts = rtpmap[media].split('/')
+        name, rate = parts[0], int(parts[1])
+        channels = int(parts[2]) if len(parts) > 2 else 1
+    elif media in STATIC_PAYLOADS:
+        name, rate, channels = STATIC_PAYLOADS[media]
+    else:
+        name, rate, channels = f'pt{media}', None, None
+    codec = RTP_CODEC_NAMES.get(name.lower(), name.lower())
+    if not control or control == '*':
+        control_url = base_url
+    elif control.startswith('rtsp://'):
+        control_url = control
+    else:
+        control_url = base_url.rstrip('/') + '/' + control
+    return media, codec, rate, channels, control_url
+
+
+def _credentials(url):
+    parts = urlsplit(url)
+    if parts.username is None:
+        return None
+    return unquote(parts.username), unquote(parts.password or '')
+
+
+class NativePCMSource(abc.ABC):
+    """
+    Reads an uncompressed 16-bit PCM stream on the event loop, without an
+    ffmpeg process.
+
+    Subclasses speak the transport (HTTP WAV, RTSP/RTP L16) and hand raw
+    payload bytes to ``_feed``, which assembles ``chunk_size`` frames,
+    converts them to the pipeline's sample format once, and delivers them
+    to the buffer and callback like RTSPAudioCapture does. When the stream
+    turns out to need a real decoder, the source records its details with
+    the health manager and stops so the next attempt uses ffmpeg.
+    """
+
+    def __init__(self, url, sample_rate=16000, channels=1, chunk_size=1024, buffer_size=144000, connect_timeout=10, read_timeout=10, sample_format='f32'):
+        self.url = url
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_size = chunk_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.sample_format = get_sample_format(sample_format)
+        self.buffer = AudioRingBuffer(buffer_size, dtype=self.sample_format.dtype)
+        self.wire_dtype = NATIVE_CODECS['pcm_s16le']
+        self.is_running = False
+        self.connected = False
+        self.unsupported = False
+        self.user_callback = None
+        self._task = None
+        self._pending = bytearray()
+        self._chunk_bytes = chunk_size * channels * 2
+        self._scale = np.float32(1.0 / 32768)
+
+    def start(self, callback):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.user_callback = callback
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Native PCM capture started for {redact_url(self.url)}")
+
+    def stop(self):
+        self.is_running = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        health = get_source_health()
+        while self.is_running:
+            wait = health.delay(self.url)
+            if wait > 0:
+                await asyncio.sleep(min(1, wait))
+                continue
+            self.connected = False
+            self._pending.clear()
+            try:
+                await self._stream()
+                if not self.is_running:
+                    return
+                reason = "end of stream"
+            except asyncio.CancelledError:
+                raise
+            except UnsupportedStream as e:
+                health.record_info(self.url, e.info)
+                logger.warning(f"{redact_url(self.url)} is {e}; falling back to ffmpeg")
+                self.unsupported = True
+                self.is_running = False
+                return
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, ConnectionError) as e:
+                reason = str(e) or type(e).__name__
+            delay = health.record_failure(self.url, reason)
+            logger.warning(f"Native capture of {redact_url(self.url)} ended ({reason}); reconnecting in {delay:.0f}s")
+
+    def _format_ready(self, codec, sample_rate, channels):
+        """Validate the announced format; raises UnsupportedStream when ffmpeg is needed"""
+        info = StreamInfo(True, has_audio=True, codec=codec, sample_rate=sample_rate, channels=channels)
+        if not can_ingest_natively(info, self.sample_rate, self.channels):
+            raise UnsupportedStream(info, f"{codec} at {sample_rate} Hz x{channels}")
+        self.wire_dtype = NATIVE_CODECS[codec]
+
+    def _feed(self, payload):
+        """Append raw PCM bytes and deliver every complete chunk"""
+        if not self.connected:
+            self.connected = True
+            get_source_health().record_success(self.url)
+            logger.info(f"Native PCM connection established for {redact_url(self.url)}")
+        get_metrics().inc("native_ingest.bytes", len(payload))
+        self._pending += payload
+        n = len(self._pending) // self._chunk_bytes * self._chunk_bytes
+        if n == 0:
+            return
+        samples = np.frombuffer(self._pending, dtype=self.wire_dtype, count=n // 2)
+        if self.sample_format.name == 's16':
+            samples = samples.astype(np.int16)  # Byte-swaps big-endian RTP payloads
+        else:
+            samples = samples.astype(np.float32) * self._scale
+        del self._pending[:n]
+        for start in range(0, samples.shape[0], self.chunk_size * self.channels):
+            chunk = samples[start:start + self.chunk_size * self.channels]
+            self.buffer.write(chunk[::self.channels] if self.channels > 1 else chunk)
+            if self.user_callback:
+                try:
+                    self.user_callback(chunk.reshape(-1, self.channels), self.chunk_size, {'current_time': time.time()}, None)
+                except Exception as e:
+                    logger.error(f"Error in native capture callback: {e}")
+
+    async def _open(self, default_port):
+        parts = urlsplit(self.url)
+        context = ssl.create_default_context() if parts.scheme == 'https' else None
+        return await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, parts.port or default_port, ssl=context),
+            self.connect_timeout,
+        )
+
+    @abc.abstractmethod
+    async def _stream(self):
+        """Connect, ``_feed`` payloads until the stream ends, then return or raise"""
+
+
+class HTTPWavSource(NativePCMSource):
+    """Streams WAV over HTTP (plain or chunked), e.g. scripts/http_mic_server.py"""
+
+    async def _stream(self):
+        parts = urlsplit(self.url)
+        reader, writer = await self._open(443 if parts.scheme == 'https' else 80)
+        try:
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            request = f"GET {path} HTTP/1.1\r\nHost: {parts.netloc.split('@')[-1]}\r\nUser-Agent: twin\r\nAccept: */*\r\nConnection: close\r\n"
+            credentials = _credentials(self.url)
+            if credentials:
+                token = base64.b64encode(f"{credentials[0]}:{credentials[1]}".encode()).decode()
+                request += f"Authorization: Basic {token}\r\n"
+            writer.write((request + "\r\n").encode())
+            await writer.drain()
+
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.read_timeout)
+            lines = head.decode('latin-1').split('\r\n')
+            status = lines[0].split(None, 2)
+            if len(status) < 2 or status[1] != '200':
+                raise ConnectionError(f"HTTP {' '.join(status[1:]) or 'error'}")
+            headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+            chunked = 'chunked' in headers.get('transfer-encoding', '').lower()
+
+            header = bytearray()
+            async for data in self._body(reader, chunked):
+                if header is not None:
+                    header += data
+                    parsed = parse_wav_header(header)
+                    if parsed is None:
+                        continue
+                    codec, sample_rate, channels, offset = parsed
+                    self._format_ready(codec, sample_rate, channels)
+                    data, header = bytes(header[offset:]), None
+                if data:
+                    self._feed(data)
+        finally:
+            writer.close()
+
+    async def _body(self, reader, chunked):
+        if not chunked:
+            while self.is_running:
+                data = await asyncio.wait_for(reader.read(self._chunk_bytes), self.read_timeout)
+                if not data:
+                    return
+                yield data
+            return
+        while self.is_running:
+            size_line = await asyncio.wait_for(reader.readuntil(b'\r\n'), self.read_timeout)
+            size = int(size_line.split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                return
+            data = await asyncio.wait_for(reader.readexactly(size + 2), self.read_timeout)
+            yield data[:-2]
+
+
+class RTPL16Source(NativePCMSource):
+    """
+    Minimal RTSP client for L16 audio (e.g. scripts/rtsp_mic_server.py via
+    mediamtx): DESCRIBE, SETUP with RTP interleaved over the TCP control
+    connection, PLAY, then depacketize big-endian PCM. Basic and Digest
+    authentication are supported.
+    """
+
+    def __init__(self, url, **kwargs):
+        super().__init__(url, **kwargs)
+        self._cseq = 0
+        self._session = None
+        self._auth = None
+        self._payload_type = None
+        self._last_seq = None
+
+    async def _request(self, reader, writer, method, url, headers=None):
+        for attempt in range(2):
+            self._cseq += 1
+            lines = [f"{method} {url} RTSP/1.0", f"CSeq: {self._cseq}", "User-Agent: twin"]
+            if self._session:
+                lines.append(f"Session: {self._session}")
+            if self._auth:
+                lines.append(f"Authorization: {self._auth(method, url)}")
+            lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+            await writer.drain()
+            status, response_headers, body = await self._read_response(reader)
+            if status == 401 and attempt == 0 and self._set_auth(response_headers.get('www-authenticate', '')):
+                continue
+            if status != 200:
+                raise ConnectionError(f"RTSP {method} failed with status {status}")
+            return response_headers, body
+
+    async def _read_response(self, reader, first=b''):
+        head = first + await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.read_timeout)
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+        length = int(headers.get('content-length', 0))
+        body = await reader.readexactly(length) if length else b''
+        return status, headers, body.decode('utf-8', errors='replace')
+
+    def _set_auth(self, challenge):
+        credentials = _credentials(self.url)
+        if not credentials:
+            return False
+        user, password = credentials
+        if challenge.lower().startswith('digest'):
+            params = dict(re.findall(r'(\w+)="?([^",]*)"?', challenge))
+            realm, nonce = params.get('realm', ''), params.get('nonce', '')
+            qop = 'auth' if 'auth' in params.get('qop', '').split(',') else None
+            ha1 = hashlib.md5(f"{user}:{realm}:{password}".encode()).hexdigest()
+            counter = [0]
+
+            def digest(method, uri):
+                ha2 = hashlib.md5(f"{method}:{uri}".encode()).hexdigest()
+                fields = f'username="{user}", realm="{realm}", nonce="{nonce}", uri="{uri}"'
+                if qop:
+                    counter[0] += 1
+                    nc, cnonce = f"{counter[0]:08x}", hashlib.md5(f"{time.time()}".encode()).hexdigest()[:16]
+                    response = hashlib.md5(f"{ha1}:{nonce}:{nc}:{cnonce}:{qop}:{ha2}".encode()).hexdigest()
+                    return f'Digest {fields}, response="{response}", qop={qop}, nc={nc}, cnonce="{cnonce}"'
+                response = hashlib.md5(f"{ha1}:{nonce}:{ha2}".encode()).hexdigest()
+                return f'Digest {fields}, response="{response}"'
+            self._auth = digest
+        else:
+            token = base64.b64encode(f"{user}:{password}".encode()).decode()
+            self._auth = lambda method, uri: f"Basic {token}"
+        return True
+
+    async def _stream(self):
+        self._cseq, self._session, self._auth, self._last_seq = 0, None, None, None
+        url = redact_url(self.url)
+        reader, writer = await self._open(554)
+        keepalive = None
+        try:
+            headers, sdp = await self._request(reader, writer, 'DESCRIBE', url, {"Accept": "application/sdp"})
+            audio = parse_sdp_audio(sdp, headers.get('content-base', url))
+            if audio is None:
+                raise UnsupportedStream(StreamInfo(True, has_audio=False), "a stream without audio")
+            self._payload_type, codec, sample_rate, channels, control_url = audio
+            self._format_ready(codec, sample_rate, channels)
+
+            headers, _ = await self._request(reader, writer, 'SETUP', control_url, {"Transport": "RTP/AVP/TCP;unicast;interleaved=0-1"})
+            session = headers.get('session', '')
+            self._session = session.split(';')[0]
+            timeout = re.search(r'timeout=(\d+)', session)
+            await self._request(reader, writer, 'PLAY', url, {"Range": "npt=0.000-"})
+            keepalive = asyncio.get_running_loop().create_task(self._keepalive(writer, url, int(timeout.group(1)) if timeout else 60))
+
+            while self.is_running:
+                marker = await asyncio.wait_for(reader.readexactly(1), self.read_timeout)
+                if marker != b'$':
+                    # An RTSP response (to a keepalive) interleaved with the media
+                    await self._read_response(reader, marker)
+                    continue
+                channel, length = struct.unpack('!BH', await reader.readexactly(3))
+                packet = await reader.readexactly(length)
+                if channel != 0:
+                    continue  # RTCP
+                payload_type, sequence, payload = parse_rtp(packet)
+                if payload_type != self._payload_type:
+                    continue
+                if self._last_seq is not None:
+                    if (self._last_seq - sequence) & 0xFFFF < MAX_REORDER_PACKETS:
+                        continue  # Late or duplicate packet; its span was already filled
+                    lost = (sequence - self._last_seq - 1) & 0xFFFF
+                    gap_bytes = lost * len(payload)
+                    if lost >= 0x8000 or gap_bytes > MAX_GAP_SECONDS * self.sample_rate * self.channels * 2:
+                        # A jump this large is a new sequence (e.g. the publisher restarted), not loss
+                        get_metrics().inc("native_ingest.rtp_resyncs")
+                        logger.info(f"RTP sequence jumped from {self._last_seq} to {sequence} on {redact_url(self.url)}; resynchronizing")
+                    elif lost:
+                        # Keep the timeline: silence for the missing packets, assuming this packet's duration
+                        get_metrics().inc("native_ingest.rtp_lost", lost)
+                        self._feed(bytes(gap_bytes))
+                self._last_seq = sequence
+                self._feed(payload)
+        finally:
+            if keepalive is not None:
+                keepalive.cancel()
+            writer.close()
+
+    async def _keepalive(self, writer, url, timeout):
+        # TCP alone does not keep every server's session alive; OPTIONS does
+        while True:
+            await asyncio.sleep(max(5, timeout / 2))
+            self._cseq += 1
+            lines = [f"OPTIONS {url} RTSP/1.0", f"CSeq: {self._cseq}", f"Session: {self._session}"]
+            if self._auth:
+                lines.append(f"Authorization: {self._auth('OPTIONS', url)}")
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+            await writer.drain()
+
+
+def create_native_source(url, **kwargs):
+    """HTTPWavSource or RTPL16Source for ``url``"""
+    if native_scheme(url) == 'http':
+        return HTTPWavSource(url, **kwargs)
+    return RTPL16Source(url, **kwargs)
@@ -0,0 +1,115 @@
+import time
+import threading
+import collections
+import queue
+
+QUEUE_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+
+class BoundedQueue:
+    """
+    Fixed-capacity FIFO between audio pipeline stages with an explicit
+    overflow policy:
+
+    - ``drop-oldest``: evict the head to make room (freshest audio wins)
+    - ``drop-newest``: discard the incoming item
+    - ``block``: wait for space (up to ``timeout``), i.e. backpressure
+
+    Depth, high-water mark, drops and queueing lag (time from put to get) are
+    tracked so a stalled consumer shows up in metrics instead of as memory
+    growth. ``put`` returns ``(accepted, evicted)`` so callers that recycle
+    pooled buffers get the evicted item back.
+    """
+
+    def __init__(self, maxsize, policy='drop-oldest'):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {list(QUEUE_POLICIES)}")
+        self.maxsize = int(maxsize)
+        self.policy = policy
+        self._items = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+        self.puts = 0
+        self.gets = 0
+        self.drops = 0
+        self.high_water = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lag_sum = 0.0
+
+    def put(self, item, timeout=None):
+        """
+        Enqueue ``item`` according to the policy. Returns ``(accepted, evicted)``
+        where ``evicted`` is the item dropped to make room (or the rejected
+        item itself when it was not accepted), else None.
+        """
+        with self._lock:
+            evicted = None
+            if len(self._items) >= self.maxsize:
+                if self.policy == 'drop-oldest':
+                    evicted = self._items.popleft()[1]
+                    self.drops += 1
+                elif self.policy == 'drop-newest':
+                    self.drops += 1
+                    return False, item
+                elif not self._not_full.wait_for(lambda: len(self._items) < self.maxsize, timeout):
+                    # Timed out under backpressure: the caller decides whether to retry or drop
+                    return False, item
+            self._items.append((time.monotonic(), item))
+            self.puts += 1
+            self.high_water = max(self.high_water, len(self._items))
+            self._not_empty.notify()
+            return True, evicted
+
+    def get(self, timeout=None):
+        """Dequeue the oldest item; raises queue.Empty after ``timeout`` seconds"""
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            enqueued_at, item = self._items.popleft()
+            lag = time.monotonic() - enqueued_at
+            self.gets += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._lag_sum += lag
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def drain(self):
+        """Remove and return every queued item"""
+        with self._lock:
+            items = [item for _, item in self._items]
+            self._items.clear()
+            self._not_full.notify_all()
+            return items
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def full(self):
+        return len(self._items) >= self.maxsize
+
+    def stats(self):
+        """Depth, drop and lag counters for metrics"""
+        return {
+            "policy": self.policy,
+            "depth": len(self._items),
+            "maxsize": self.maxsize,
+            "high_water": self.high_water,
+            "puts": self.puts,
+            "gets": self.gets,
+            "drops": self.drops,
+            "lag_last": self.last_lag,
+            "lag_max": self.max_lag,
+            "lag_mean": self._lag_sum / self.gets if self.gets else 0.0,
+        }
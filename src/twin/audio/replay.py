@@ -0,0 +1,246 @@
+import os
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+import soundfile as sf
+from .ring_buffer import AudioRingBuffer
+from .formats import get_sample_format
+from .queues import BoundedQueue
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger("twin")
+
+RECORDING_EXTENSIONS = ('.wav', '.flac', '.raw', '.pcm')
+
+
+def is_replay_url(url):
+    return isinstance(url, str) and url.startswith("file://")
+
+
+def replay_path(url):
+    """Filesystem path of a file:// source URL"""
+    return url[len("file://"):] if is_replay_url(url) else url
+
+
+def list_recordings(path):
+    """A single recording, or every recording in a directory in name order"""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(RECORDING_EXTENSIONS)
+        )
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Replay source not found: {path}")
+    return [path]
+
+
+def load_recording(path, sample_rate, channels=1, sample_format='f32'):
+    """
+    Load a WAV/FLAC (any rate, resampled if needed) or headerless raw file
+    (assumed to already be ``sample_rate`` in ``sample_format``) as a
+    (frames, channels) array of the pipeline's sample dtype.
+    """
+    fmt = get_sample_format(sample_format)
+    if path.lower().endswith(('.raw', '.pcm')):
+        audio = np.fromfile(path, dtype=fmt.dtype)
+        return audio[:audio.shape[0] // channels * channels].reshape(-1, channels)
+
+    audio, file_rate = sf.read(path, dtype='int16' if fmt.dtype == np.int16 else 'float32', always_2d=True)
+    if audio.shape[1] < channels:
+        audio = np.repeat(audio[:, :1], channels, axis=1)
+    audio = audio[:, :channels]
+    if file_rate != sample_rate:
+        logger.warning(f"Resampling {path} from {file_rate} Hz to {sample_rate} Hz (linear)")
+        n_out = int(round(audio.shape[0] * sample_rate / file_rate))
+        positions = np.arange(n_out) * (file_rate / sample_rate)
+        resampled = np.stack([np.interp(positions, np.arange(audio.shape[0]), audio[:, c]) for c in range(channels)], axis=1)
+        audio = np.round(resampled).astype(fmt.dtype) if fmt.dtype.kind == 'i' else resampled.astype(fmt.dtype)
+    return np.ascontiguousarray(audio)
+
+
+class FileAudioSource:
+    """
+    Plays recordings through the same callback interface as RTSPAudioCapture.
+
+    ``speed`` 1.0 paces chunks in real time, other positive values scale the
+    pace, and 0 replays as fast as the consumer keeps up: the source then
+    waits until the consumer has ``acknowledge()``d enough audio that the
+    ring buffer will not overwrite unread samples, so no audio is lost and
+    throughput is bounded only by the pipeline.
+    """
+
+    def __init__(
+        self,
+        path,
+        sample_rate=16000,
+        channels=1,
+        chunk_size=1024,
+        buffer_size=48000,
+        speed=1.0,
+        loop=False,
+        sample_format='f32'
+    ):
+        self.path = path
+        self.files = list_recordings(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk_size = chunk_size
+        self.speed = speed
+        self.loop = loop
+        self.sample_format = get_sample_format(sample_format)
+        self.buffer = AudioRingBuffer(buffer_size, dtype=self.sample_format.dtype)
+        self.is_running = False
+        self.finished = False
+        self.samples_played = 0
+        self.user_callback = None
+        self._thread = None
+        self._acknowledged = 0
+        self._ack_event = threading.Event()
+
+    @property
+    def backlogged(self):
+        """True while replaying as fast as possible and audio is waiting for the consumer"""
+        return self.speed == 0 and self.is_running and self.buffer.total_written > self._acknowledged
+
+    def acknowledge(self, position):
+        """Report the stream position (``buffer.total_written`` units) the consumer has processed"""
+        self._acknowledged = max(self._acknowledged, position)
+        self._ack_event.set()
+
+    def start(self, callback):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.user_callback = callback
+        self._thread = threading.Thread(target=self._play, name=f"twin-replay-{os.path.basename(self.path)}")
+        self._thread.daemon = True
+        self._thread.start()
+        mode = "as fast as possible" if self.speed == 0 else f"{self.speed:g}x real time"
+        logger.info(f"Replaying {len(self.files)} recording(s) from {self.path} at {mode}")
+
+    def stop(self):
+        self.is_running = False
+        self._ack_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def _play(self):
+        started = time.monotonic()
+        metrics = get_metrics()
+        try:
+            while self.is_running:
+                for path in self.files:
+                    if not self.is_running:
+                        break
+                    try:
+                        audio = load_recording(path, self.sample_rate, self.channels, self.sample_format.name)
+                    except Exception as e:
+                        logger.error(f"Could not load recording {path}: {e}")
+                        continue
+                    logger.info(f"Replaying {path} ({audio.shape[0] / self.sample_rate:.1f}s)")
+                    for offset in range(0, audio.shape[0], self.chunk_size):
+                        if not self.is_running:
+                            break
+                        chunk = audio[offset:offset + self.chunk_size]
+                        self._pace(started, chunk.shape[0])
+                        self.buffer.write(chunk[:, 0])
+                        self.samples_played += chunk.shape[0]
+                        metrics.inc("replay.samples", chunk.shape[0])
+                        if self.user_callback:
+                            try:
+                                self.user_callback(chunk, chunk.shape[0], {'current_time': time.time()}, None)
+                            except Exception as e:
+                                logger.error(f"Error in replay callback for {path}: {e}")
+                if not self.loop:
+                    break
+        finally:
+            elapsed = time.monotonic() - started
+            audio_seconds = self.samples_played / self.sample_rate
+            if elapsed > 0:
+                logger.info(f"Replay of {self.path} finished: {audio_seconds:.1f}s of audio in {elapsed:.1f}s ({audio_seconds / elapsed:.1f}x real time)")
+            self.finished = True
+            self.is_running = False
+
+    def _pace(self, started, frames):
+        if self.speed > 0:
+            due = started + self.samples_played / (self.sample_rate * self.speed)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            return
+        # As fast as possible, but never overwrite audio the consumer has not read yet
+        while self.is_running and self.buffer.total_written + frames - self._acknowledged > self.buffer.capacity:
+            self._ack_event.clear()
+            self._ack_event.wait(timeout=0.5)
+
+
+class AudioRecorder:
+    """
+    Records a live source (mono, as the pipeline consumes it) to WAV in the
+    pipeline's sample format, rotating to a new file every ``segment_seconds``
+    so recordings can be replayed with FileAudioSource. ``queue`` is handed
+    to audio_callback as its audio_queue and drained by a writer thread, so
+    disk I/O never runs on the capture thread.
+    """
+
+    def __init__(self, directory, name, sample_rate=16000, sample_format='f32', segment_seconds=600, queue_size=256):
+        self.directory = directory
+        self.name = name.replace('/', '_').replace('@', '_').replace(':', '_')
+        self.sample_rate = sample_rate
+        self.sample_format = get_sample_format(sample_format)
+        self.segment_frames = int(segment_seconds * sample_rate)
+        self.queue = BoundedQueue(queue_size, policy='drop-oldest')
+        self.is_running = False
+        self._file = None
+        self._file_frames = 0
+        self._segments = 0
+        self._thread = None
+
+    def start(self):
+        if self.is_running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.is_running = True
+        self._thread = threading.Thread(target=self._write_loop, name=f"twin-record-{self.name}")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Recording {self.name} to {self.directory}")
+
+    def stop(self):
+        self.is_running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        for chunk in self.queue.drain():
+            self._write(chunk)
+        self._close()
+
+    def _write_loop(self):
+        while self.is_running:
+            try:
+                chunk = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._write(chunk)
+            except Exception as e:
+                logger.error(f"Error recording {self.name}: {e}")
+
+    def _write(self, chunk):
+        if self._file is None or self._file_frames >= self.segment_frames:
+            self._close()
+            self._segments += 1
+            path = os.path.join(self.directory, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{self._segments:03d}.wav")
+            self._file = sf.SoundFile(path, mode='w', samplerate=self.sample_rate, channels=1, subtype=self.sample_format.wav_subtype, format='WAV')
+            self._file_frames = 0
+        self._file.write(chunk)
+        self._file_frames += chunk.shape[0]
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,231 @@
+import math
+import threading
+import numpy as np
+from .formats import full_scale
+
+
+def _sum_squares(x):
+    """Sum of squares accumulated in float64 regardless of the sample dtype"""
+    if x.shape[0] == 0:
+        return 0.0
+    return float(np.einsum('i,i->', x, x, dtype=np.float64))
+
+
+def _peak(x):
+    if x.shape[0] == 0:
+        return 0.0
+    return max(float(x.max()), -float(x.min()))
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity PCM ring buffer backed by a preallocated NumPy array.
+
+    Every sample is written twice (at ``i`` and ``i + capacity``) so the most
+    recent ``n`` samples always sit in one contiguous slice of the backing
+    store. ``latest(n, copy=False)`` therefore returns a view without any
+    concatenation, and ``copy=True`` costs exactly one memcpy.
+
+    Energy statistics are maintained incrementally as chunks arrive: a running
+    sum of squares over the buffered window (O(chunk) per write, O(1) to read)
+    and a history of per-block mean-square/peak values for windowed RMS, peak
+    and noise-floor estimates. Statistics are reported relative to full scale,
+    so int16 and float32 buffers share the same thresholds.
+    """
+
+    def __init__(self, capacity, dtype=np.float32, block_size=1024, history_blocks=None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._scale = full_scale(self.dtype)
+        self._data = np.zeros(self.capacity * 2, dtype=self.dtype)
+        self._pos = 0
+        self._size = 0
+        self._total_written = 0
+        self._lock = threading.Lock()
+
+        # Running window energy; resynced periodically to bound float drift
+        self._sumsq = 0.0
+        self._since_resync = 0
+
+        # Per-block energy history (mean square and peak of each completed block)
+        self.block_size = int(block_size)
+        if history_blocks is None:
+            history_blocks = math.ceil(self.capacity / self.block_size)
+        self.history_blocks = max(1, int(history_blocks))
+        self._block_ms = np.zeros(self.history_blocks, dtype=np.float64)
+        self._block_peak = np.zeros(self.history_blocks, dtype=np.float64)
+        self._block_pos = 0
+        self._block_count = 0
+        self._acc_sumsq = 0.0
+        self._acc_peak = 0.0
+        self._acc_fill = 0
+
+    def write(self, chunk):
+        """Append a 1-D chunk of samples, overwriting the oldest data when full."""
+        chunk = np.asarray(chunk).reshape(-1)
+        k = chunk.shape[0]
+        if k == 0:
+            return
+        with self._lock:
+            self._total_written += k
+            self._update_blocks(chunk)
+            if k >= self.capacity:
+                # Only the newest `capacity` samples survive
+                chunk = chunk[-self.capacity:]
+                self._data[:self.capacity] = chunk
+                self._data[self.capacity:] = chunk
+                self._pos = 0
+                self._size = self.capacity
+                self._resync()
+                return
+
+            cap = self.capacity
+            pos = self._pos
+            evicted = self._size + k - cap
+            if evicted > 0:
+                oldest = pos + cap - self._size
+                self._sumsq -= _sum_squares(self._data[oldest:oldest + evicted])
+            self._sumsq += _sum_squares(chunk)
+
+            first = min(k, cap - pos)
+            self._data[pos:pos + first] = chunk[:first]
+            self._data[pos + cap:pos + cap + first] = chunk[:first]
+            rest = k - first
+            if rest:
+                self._data[:rest] = chunk[first:]
+                self._data[cap:cap + rest] = chunk[first:]
+            self._pos = (pos + k) % cap
+            self._size = min(self._size + k, cap)
+
+            self._since_resync += k
+            if self._since_resync >= cap * 16:
+                self._resync()
+
+    def _resync(self):
+        end = self._pos + self.capacity
+        self._sumsq = _sum_squares(self._data[end - self._size:end])
+        self._since_resync = 0
+
+    def _update_blocks(self, chunk):
+        offset = 0
+        k = chunk.shape[0]
+        while offset < k:
+            take = min(self.block_size - self._acc_fill, k - offset)
+            part = chunk[offset:offset + take]
+            self._acc_sumsq += _sum_squares(part)
+            self._acc_peak = max(self._acc_peak, _peak(part))
+            self._acc_fill += take
+            offset += take
+            if self._acc_fill == self.block_size:
+                self._block_ms[self._block_pos] = self._acc_sumsq / self.block_size / self._scale ** 2
+                self._block_peak[self._block_pos] = self._acc_peak / self._scale
+                self._block_pos = (self._block_pos + 1) % self.history_blocks
+                self._block_count = min(self._block_count + 1, self.history_blocks)
+                self._acc_sumsq = 0.0
+                self._acc_peak = 0.0
+                self._acc_fill = 0
+
+    def latest(self, n=None, copy=True):
+        """
+        Return the newest ``n`` samples (all buffered samples if ``n`` is None).
+
+        With ``copy=False`` a read-only view into the backing store is returned;
+        it is only stable until the writer wraps around, so callers that hold
+        on to it across awaits should request a copy instead.
+        """
+        with self._lock:
+            n = self._size if n is None else max(0, min(int(n), self._size))
+            end = self._pos + self.capacity
+            window = self._data[end - n:end]
+            if copy:
+                return window.copy()
+        window = window.view()
+        window.flags.writeable = False
+        return window
+
+    def since(self, cursor):
+        """
+        Return a copy of the samples written after stream position ``cursor``
+        (a previous ``total_written`` value) and the new cursor. Samples that
+        were already overwritten are skipped, so slow readers lose the oldest
+        audio rather than blocking the writer.
+        """
+        with self._lock:
+            total = self._total_written
+            n = max(0, min(total - cursor, self._size))
+            end = self._pos + self.capacity
+            return self._data[end - n:end].copy(), total
+
+    def snapshot(self, copy=True):
+        """Return everything currently buffered, oldest sample first."""
+        return self.latest(None, copy=copy)
+
+    def clear(self):
+        with self._lock:
+            self._pos = 0
+            self._size = 0
+            self._sumsq = 0.0
+            self._since_resync = 0
+            self._block_pos = 0
+            self._block_count = 0
+            self._acc_sumsq = 0.0
+            self._acc_peak = 0.0
+            self._acc_fill = 0
+
+    def rms(self):
+        """RMS of the whole buffered window in O(1); NaN when empty."""
+        if self._size == 0:
+            return np.nan
+        return math.sqrt(max(self._sumsq, 0.0) / self._size) / self._scale
+
+    def block_energies(self, n_blocks=None):
+        """Mean-square energy of the newest completed blocks, oldest first."""
+        with self._lock:
+            count = self._block_count if n_blocks is None else max(0, min(int(n_blocks), self._block_count))
+            idx = (self._block_pos - count + np.arange(count)) % self.history_blocks
+            return self._block_ms[idx]
+
+    def recent_rms(self, n_samples):
+        """RMS over the newest completed blocks covering roughly ``n_samples``."""
+        energies = self.block_energies(max(1, math.ceil(n_samples / self.block_size)))
+        if energies.shape[0] == 0:
+            return np.nan
+        return math.sqrt(float(energies.mean()))
+
+    def peak(self, n_blocks=None):
+        """Peak absolute sample value over the newest completed blocks."""
+        with self._lock:
+            count = self._block_count if n_blocks is None else max(0, min(int(n_blocks), self._block_count))
+            if count == 0:
+                return 0.0
+            idx = (self._block_pos - count + np.arange(count)) % self.history_blocks
+            return float(self._block_peak[idx].max())
+
+    def noise_floor(self, percentile=10):
+        """RMS level of the given percentile of recent block energies."""
+        energies = self.block_energies()
+        if energies.shape[0] == 0:
+            return np.nan
+        return math.sqrt(float(np.percentile(energies, percentile)))
+
+    def energy_stats(self):
+        """Cheap summary for logging and metrics"""
+        return {
+            "rms": self.rms(),
+            "peak": self.peak(),
+            "noise_floor": self.noise_floor(),
+            "samples": self._size,
+            "total_written": self._total_written,
+        }
+
+    @property
+    def total_written(self):
+        """Monotonic count of samples ever written, useful as a stream clock."""
+        return self._total_written
+
+    def __len__(self):
+        return self._size
@@ -5,15 +5,51 @@ import queue
 import logging
 import time
 import os
+import collections
 from ..core import config
-from collections import deque
+from .formats import get_sample_format
+from .queues import BoundedQueue
+from .replay import FileAudioSource, is_replay_url, replay_path
+from .health import get_source_health
+from .native_ingest import native_scheme, can_ingest_natively, create_native_source
 
 logger = logging.getLogger("twin")
 
+def build_ffmpeg_command(rtsp_url, sample_rate, channels, latency_flags=None, sample_format='f32'):
+    """Build the FFmpeg command to extract audio from RTSP stream"""
+    fmt = get_sample_format(sample_format)
+    cmd = ['ffmpeg']
+    
+    # Add low-latency flags if specified
+    if isinstance(latency_flags, str):
+        # If it's a string, split it into arguments
+        for flag in latency_flags.split():
+            cmd.append(flag)
+    elif isinstance(latency_flags, list):
+        # If it's already a list, extend with it
+        cmd.extend(latency_flags)
+        
+    # Input URL
+    cmd.extend(['-i', rtsp_url])
+    
+    # Output format settings
+    cmd.extend([
+        '-vn',  # No video
+        '-acodec', fmt.ffmpeg_codec,  # Raw PCM (pcm_f32le or pcm_s16le)
+        '-ar', str(sample_rate),  # Sample rate
+        '-ac', str(channels),  # Number of channels
+        '-f', fmt.ffmpeg_format,  # Matching raw container format
+        'pipe:1'  # Output to stdout
+    ])
+    
+    logger.info(f"FFmpeg command: {' '.join(cmd)}")
+    return cmd
+
 class RTSPAudioCapture:
     """
     Captures audio from an RTSP stream using FFmpeg
-    and provides a callback-based interface similar to sounddevice
+    and provides a callback-based interface similar to sounddevice.
+    The callback owns the ring buffer; the capture keeps no copy of its own.
     """
     
     def __init__(
@@ -22,16 +58,31 @@ class RTSPAudioCapture:
         sample_rate=48000, 
         channels=1,
         chunk_size=1024,
-        buffer_size=144000,  # 3 seconds at 48kHz
         latency_flags=None,
-        reconnect_interval=20  # seconds
+        reconnect_interval=20,  # seconds
+        pool_size=32,
+        sample_format='f32',
+        queue_policy='drop-oldest'
     ):
         self.rtsp_url = rtsp_url
         self.sample_rate = sample_rate
         self.channels = channels
         self.chunk_size = chunk_size
-        self.buffer = deque(maxlen=buffer_size)
-        self.audio_queue = queue.Queue()
+        self.sample_format = get_sample_format(sample_format)
+        # Chunks travel to the callback thread as slot indices into a fixed pool
+        # of preallocated byte buffers. Slots cycle through a free list: the
+        # reader fills one, the callback thread holds one, and the bounded queue
+        # holds the rest, so a slot is never overwritten while in use. Slots
+        # evicted by the drop policy go straight back to the free list.
+        pool_size = max(3, pool_size)
+        self.pool_size = pool_size
+        self.audio_queue = BoundedQueue(pool_size - 2, policy=queue_policy)
+        self._bytes_per_chunk = chunk_size * channels * self.sample_format.bytes_per_sample
+        self._raw_slots = [bytearray(self._bytes_per_chunk) for _ in range(pool_size)]
+        self._slot_views = [memoryview(raw) for raw in self._raw_slots]
+        self._slot_arrays = [np.frombuffer(raw, dtype=self.sample_format.dtype) for raw in self._raw_slots]
+        self._free_slots = collections.deque(range(pool_size))
+        self._next_slot = self._free_slots.popleft()
         self.is_running = False
         self.process = None
         self.capture_thread = None
@@ -44,51 +95,26 @@ class RTSPAudioCapture:
         
     def _build_ffmpeg_command(self):
         """Build the FFmpeg command to extract audio from RTSP stream"""
-        cmd = ['ffmpeg']
-        
-        # Add low-latency flags if specified
-        if isinstance(self.latency_flags, str):
-            # If it's a string, split it into arguments
-            for flag in self.latency_flags.split():
-                cmd.append(flag)
-        elif isinstance(self.latency_flags, list):
-            # If it's already a list, extend with it
-            cmd.extend(self.latency_flags)
-            
-        # Input URL
-        cmd.extend(['-i', self.rtsp_url])
-        
-        # Output format settings
-        cmd.extend([
-            '-vn',  # No video
-            '-acodec', 'pcm_f32le',  # 32-bit float PCM
-            '-ar', str(self.sample_rate),  # Sample rate
-            '-ac', str(self.channels),  # Number of channels
-            '-f', 'f32le',  # 32-bit float format
-            'pipe:1'  # Output to stdout
-        ])
-        
-        logger.info(f"FFmpeg command: {' '.join(cmd)}")
-        return cmd
+        return build_ffmpeg_command(self.rtsp_url, self.sample_rate, self.channels, self.latency_flags, self.sample_format.name)
         
     def _capture_audio(self):
         """Capture audio from FFmpeg and put in queue with reconnection logic"""
         while self.is_running:
             try:
-                # Check if we should attempt reconnection
-                current_time = time.time()
-                if self.connection_failures > 0 and (current_time - self.last_reconnect_attempt) < self.reconnect_interval:
-                    time.sleep(1)
+                # Wait out the backoff scheduled by the source health manager
+                if get_source_health().delay(self.rtsp_url) > 0:
+                    time.sleep(min(1, get_source_health().delay(self.rtsp_url)))
                     continue
                 
                 cmd = self._build_ffmpeg_command()
+                get_source_health().record_spawn(self.rtsp_url)
                 
                 logger.info(f"Starting FFmpeg process with command: {' '.join(cmd)}")
                 self.process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
-                    bufsize=self.chunk_size * 4  # 4 bytes per float32 sample
+                    bufsize=self._bytes_per_chunk
                 )
                 
                 logger.info("Started FFmpeg RTSP audio capture process")
@@ -104,16 +130,15 @@ class RTSPAudioCapture:
                 stderr_thread.daemon = True
                 stderr_thread.start()
 
-                # Read audio data in chunks
-                bytes_per_chunk = self.chunk_size * self.channels * 4  # 4 bytes per float32 sample
                 connection_successful = False
                 
                 while self.is_running:
                     try:
-                        # Read a chunk of audio data
-                        audio_chunk = self.process.stdout.read(bytes_per_chunk)
+                        # Read straight into the next preallocated slot
+                        slot = self._next_slot
+                        nbytes = self.process.stdout.readinto(self._slot_views[slot])
                         
-                        if not audio_chunk:
+                        if not nbytes:
                             logger.warning(f"End of RTSP stream or connection lost for {self.rtsp_url}")
                             # Log FFmpeg return code
                             if self.process.poll() is not None:
@@ -124,22 +149,24 @@ class RTSPAudioCapture:
                         if not connection_successful:
                             connection_successful = True
                             self.connection_failures = 0
+                            get_source_health().record_success(self.rtsp_url)
                             logger.info(f"RTSP connection established successfully for {self.rtsp_url}")
                         
-                        # Convert to numpy array of float32
-                        audio_array = np.frombuffer(audio_chunk, dtype=np.float32)
+                        # A short read only happens at EOF; drop any trailing partial frame
+                        frames = nbytes // (self.sample_format.bytes_per_sample * self.channels)
+                        if frames == 0:
+                            continue
                         
-                        # Log audio data stats occasionally
-                        if hasattr(self, 'log_counter'):
-                            self.log_counter += 1
-                        else:
-                            self.log_counter = 0
-                            
-                        # if self.log_counter % 100 == 0:  # Log every 100 chunks
-                        #     logger.info(f"RTSP audio stats: min={np.min(audio_array):.4f}, max={np.max(audio_array):.4f}, mean={np.mean(audio_array):.4f}, shape={audio_array.shape}")
-                        
-                        # Put in the queue for the callback thread
-                        self.audio_queue.put(audio_array)
+                        # Hand the slot to the callback thread; a full queue is resolved by the drop policy
+                        while self.is_running:
+                            accepted, evicted = self.audio_queue.put((slot, frames), timeout=1)
+                            if accepted or self.audio_queue.policy != 'block':
+                                break
+                        if not accepted:
+                            continue  # Dropped: refill the same slot
+                        if evicted is not None:
+                            self._free_slots.append(evicted[0])
+                        self._next_slot = self._free_slots.popleft()
                         
                     except Exception as e:
                         logger.error(f"Error reading RTSP audio from {self.rtsp_url}: {e}")
@@ -147,22 +174,22 @@ class RTSPAudioCapture:
                         break
                 
                 # Connection failed or ended
+                self.connection_failures += 1
+                self.last_reconnect_attempt = time.time()
+                delay = get_source_health().record_failure(self.rtsp_url)
                 if not connection_successful:
-                    self.connection_failures += 1
-                    self.last_reconnect_attempt = time.time()
-                    logger.warning(f"RTSP connection failed for {self.rtsp_url} (failure #{self.connection_failures}). Reconnecting in {self.reconnect_interval} seconds...")
+                    logger.warning(f"RTSP connection failed for {self.rtsp_url} (failure #{self.connection_failures}). Reconnecting in {delay:.0f} seconds...")
                 else:
                     # Connection was working but lost
-                    self.connection_failures += 1
-                    self.last_reconnect_attempt = time.time()
-                    logger.warning(f"RTSP connection lost for {self.rtsp_url}. Reconnecting in {self.reconnect_interval} seconds...")
+                    logger.warning(f"RTSP connection lost for {self.rtsp_url}. Reconnecting in {delay:.0f} seconds...")
                 
                 self._cleanup()
                 
             except Exception as e:
                 self.connection_failures += 1
                 self.last_reconnect_attempt = time.time()
-                logger.error(f"Error starting FFmpeg process for {self.rtsp_url}: {e}. Reconnecting in {self.reconnect_interval} seconds...")
+                delay = get_source_health().record_failure(self.rtsp_url, str(e))
+                logger.error(f"Error starting FFmpeg process for {self.rtsp_url}: {e}. Reconnecting in {delay:.0f} seconds...")
                 self._cleanup()
                 
         logger.info(f"RTSP capture stopped for {self.rtsp_url}")
@@ -171,23 +198,23 @@ class RTSPAudioCapture:
         """Process audio chunks and call the user callback"""
         while self.is_running:
             try:
-                # Get audio chunk from queue
-                audio_array = self.audio_queue.get(timeout=1)
-                
-                # Add to buffer
-                for sample in audio_array:
-                    self.buffer.append(sample)
+                # Get the next filled slot from the capture thread
+                slot, frames = self.audio_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                audio_array = self._slot_arrays[slot][:frames * self.channels]
                 
-                # If there's a callback, call it
+                # The callback copies the view into its ring before the slot is reused
                 if self.user_callback:
                     # sounddevice callback format: callback(indata, frames, time, status)
-                    indata = np.array(list(self.buffer)[-self.chunk_size:]).reshape(-1, self.channels)
-                    self.user_callback(indata, self.chunk_size, {'current_time': time.time()}, None)
+                    indata = audio_array.reshape(-1, self.channels)
+                    self.user_callback(indata, frames, {'current_time': time.time()}, None)
                     
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.error(f"Error in callback processor: {e}")
+            finally:
+                self._free_slots.append(slot)
                 
     def _cleanup(self):
         """Clean up resources"""
@@ -250,16 +277,90 @@ def create_rtsp_audio_stream(callback_func, rtsp_url=None, reconnect_interval=No
     latency_flags = config.RTSP_LATENCY_FLAGS
     reconnect_interval = reconnect_interval or config.RTSP_RECONNECT_INTERVAL
     
+    if is_replay_url(rtsp_url):
+        # Recorded audio through the same interface, for offline load and throughput tests
+        stream = FileAudioSource(
+            replay_path(rtsp_url),
+            sample_rate=sample_rate,
+            channels=channels,
+            chunk_size=chunk_size,
+            buffer_size=int(sample_rate * config.BUFFER_DURATION),
+            speed=config.REPLAY_SPEED,
+            loop=config.REPLAY_LOOP,
+            sample_format=config.AUDIO_SAMPLE_FORMAT
+        )
+        stream.start(callback_func)
+        return stream
+    
+    if config.NATIVE_PCM_INGEST and native_scheme(rtsp_url):
+        # Uncompressed 16-bit PCM (HTTP WAV, RTP L16) is read directly; ffmpeg is only
+        # used once a probe or the stream's own headers show a codec that needs it
+        info = get_source_health().cached_info(rtsp_url)
+        if info is None or can_ingest_natively(info, sample_rate, channels):
+            stream = create_native_source(
+                rtsp_url,
+                sample_rate=sample_rate,
+                channels=channels,
+                chunk_size=chunk_size,
+                buffer_size=int(sample_rate * config.BUFFER_DURATION),
+                sample_format=config.AUDIO_SAMPLE_FORMAT
+            )
+            stream.start(callback_func)
+            return stream
+    
     logger.info(f"Creating RTSP audio capture with URL: {rtsp_url} (reconnect interval: {reconnect_interval}s)")
     
+    if config.RTSP_INGEST_MODE == 'process':
+        # Capture runs in worker processes and hands audio over through shared memory;
+        # the callback is invoked on the calling event loop
+        from .capture_worker import get_capture_pool
+        return get_capture_pool().add_source(
+            rtsp_url,
+            callback_func,
+            sample_rate=sample_rate,
+            channels=channels,
+            chunk_size=chunk_size,
+            latency_flags=latency_flags,
+            reconnect_interval=reconnect_interval,
+            sample_format=config.AUDIO_SAMPLE_FORMAT
+        )
+    
+    if config.RTSP_INGEST_MODE == 'shared':
+        # All sources share one selector thread instead of three threads each
+        from .ingest import get_ingest_engine
+        return get_ingest_engine().add_source(
+            rtsp_url,
+            callback_func,
+            sample_rate=sample_rate,
+            channels=channels,
+            chunk_size=chunk_size,
+            buffer_size=int(sample_rate * config.BUFFER_DURATION),
+            latency_flags=latency_flags,
+            reconnect_interval=reconnect_interval,
+            sample_format=config.AUDIO_SAMPLE_FORMAT
+        )
+    
     stream = RTSPAudioCapture(
         rtsp_url=rtsp_url,
         sample_rate=sample_rate,
         channels=channels,
         chunk_size=chunk_size,
         latency_flags=latency_flags,
-        reconnect_interval=reconnect_interval
+        reconnect_interval=reconnect_interval,
+        pool_size=config.AUDIO_QUEUE_SIZE + 2,
+        sample_format=config.AUDIO_SAMPLE_FORMAT,
+        queue_policy=config.AUDIO_QUEUE_POLICY
     )
     
     stream.start(callback_func)
-    return stream 
\ No newline at end of file
+    return stream 
+def stop_capture_backends():
+    """Stop the shared ingest engine and capture worker pool, if this process started either"""
+    from . import capture_worker, ingest
+    if capture_worker.capture_pool is not None:
+        # Closes and unlinks the shared-memory rings this process owns before the workers exit
+        capture_worker.capture_pool.stop()
+        capture_worker.capture_pool = None
+    if ingest.ingest_engine is not None:
+        ingest.ingest_engine.stop()
+        ingest.ingest_engine = None
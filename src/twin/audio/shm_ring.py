@@ -0,0 +1,138 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# Header slots (int64): sequence counter, capacity, closed flag, end of the write in progress
+_SEQ, _CAPACITY, _CLOSED, _WRITING = 0, 1, 2, 3
+HEADER_BYTES = 64
+
+
+class SharedAudioRing:
+    """
+    Single-writer, multi-reader PCM ring in ``multiprocessing.shared_memory``.
+
+    The layout mirrors AudioRingBuffer: every sample is stored at ``i`` and
+    ``i + capacity`` so the newest ``n`` samples are one contiguous slice.
+    There is no lock. Like a seqlock, the writer announces where its write
+    will end before touching any sample, copies, and then publishes the
+    samples by advancing the int64 sequence counter (total samples written).
+    A reader snapshots the counter, copies, and then re-reads both the
+    announced end and the counter. Everything the writer could have touched
+    meanwhile, published or still in progress, is trimmed from the head, so
+    a slow reader loses its oldest audio instead of seeing torn data.
+    """
+
+    def __init__(self, shm, capacity, dtype, owner):
+        self._shm = shm
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self._header = np.ndarray((HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+        self._data = np.ndarray((self.capacity * 2,), dtype=self.dtype, buffer=shm.buf, offset=HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity, dtype=np.float32, name=None):
+        dtype = np.dtype(dtype)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_BYTES + int(capacity) * 2 * dtype.itemsize)
+        ring = cls(shm, capacity, dtype, owner=True)
+        ring._header[:] = 0
+        ring._header[_CAPACITY] = ring.capacity
+        return ring
+
+    @classmethod
+    def attach(cls, name, dtype=np.float32):
+        try:
+            # The creating process owns the segment's lifetime
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: spawned workers share the creator's resource
+            # tracker, which already holds this name, so leave it registered
+            shm = shared_memory.SharedMemory(name=name)
+        capacity = int(np.ndarray((HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)[_CAPACITY])
+        return cls(shm, capacity, dtype, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def total_written(self):
+        return int(self._header[_SEQ])
+
+    @property
+    def closed(self):
+        return bool(self._header[_CLOSED])
+
+    def __len__(self):
+        return min(self.total_written, self.capacity)
+
+    def write(self, chunk):
+        """Append samples (writer process only)"""
+        chunk = np.asarray(chunk, dtype=self.dtype).reshape(-1)
+        k = chunk.shape[0]
+        if k == 0:
+            return
+        cap = self.capacity
+        total = int(self._header[_SEQ])
+        # Announce the span first so readers discard what this write may tear
+        self._header[_WRITING] = total + k
+        if k >= cap:
+            chunk = chunk[-cap:]
+            start = (total + k - cap) % cap
+            first = cap - start
+            self._data[start:cap] = chunk[:first]
+            self._data[:start] = chunk[first:]
+            self._data[cap:] = self._data[:cap]
+        else:
+            pos = total % cap
+            first = min(k, cap - pos)
+            self._data[pos:pos + first] = chunk[:first]
+            self._data[pos + cap:pos + cap + first] = chunk[:first]
+            rest = k - first
+            if rest:
+                self._data[:rest] = chunk[first:]
+                self._data[cap:cap + rest] = chunk[first:]
+        # Publish only after the samples are in place
+        self._header[_SEQ] = total + k
+
+    def _window(self, total, n):
+        end = total % self.capacity + self.capacity
+        return self._data[end - n:end]
+
+    def since(self, cursor):
+        """
+        Copy of the samples written after stream position ``cursor`` and the
+        new cursor. Audio the writer already overwrote is skipped.
+        """
+        total = int(self._header[_SEQ])
+        n = max(0, min(total - cursor, self.capacity))
+        data = self._window(total, n).copy()
+        written = max(int(self._header[_SEQ]), int(self._header[_WRITING]))
+        lapped = written - self.capacity - (total - n)
+        if lapped > 0:
+            data = data[lapped:]
+        return data, total
+
+    def latest(self, n=None, copy=True):
+        """Newest ``n`` samples; ``copy=False`` returns a read-only view that is only valid until overwritten"""
+        total = int(self._header[_SEQ])
+        n = min(total, self.capacity) if n is None else max(0, min(int(n), total, self.capacity))
+        window = self._window(total, n)
+        if copy:
+            return window.copy()
+        window = window.view()
+        window.flags.writeable = False
+        return window
+
+    def mark_closed(self):
+        self._header[_CLOSED] = 1
+
+    def close(self):
+        """Detach; the owner also unlinks the segment"""
+        self._header = None
+        self._data = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
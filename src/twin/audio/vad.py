@@ -0,0 +1,245 @@
+import math
+import time
+import logging
+import numpy as np
+from .ring_buffer import AudioRingBuffer
+from .formats import full_scale
+
+logger = logging.getLogger("twin")
+
+
+class SpeechSegment:
+    """One endpointed utterance: its audio plus stream-sample and wall-clock bounds"""
+
+    def __init__(self, audio, start_sample, end_sample, sample_rate, start_time, end_time, forced=False):
+        self.audio = audio
+        self.start_sample = start_sample
+        self.end_sample = end_sample
+        self.sample_rate = sample_rate
+        self.start_time = start_time
+        self.end_time = end_time
+        self.forced = forced  # True when cut at max_utterance rather than by silence
+
+    @property
+    def duration(self):
+        return (self.end_sample - self.start_sample) / self.sample_rate
+
+    def __repr__(self):
+        return f"SpeechSegment(start={self.start_time:.2f}, end={self.end_time:.2f}, duration={self.duration:.2f}s, forced={self.forced})"
+
+
+def classify_frames(frames, noise_rms, threshold_ratio, min_rms, max_zcr, scale=1.0):
+    """
+    Vectorized speech/non-speech decision for a (n_frames, frame_len) block.
+
+    A frame is speech when its RMS clears both the absolute floor and the
+    noise floor scaled by ``threshold_ratio``, and its zero-crossing rate is
+    low enough to rule out broadband hiss. ``scale`` is the full-scale value
+    of the sample dtype so levels are always compared in [-1, 1) units.
+    Returns (is_speech, frame_rms).
+    """
+    frame_len = frames.shape[1]
+    energy = np.einsum('ij,ij->i', frames, frames, dtype=np.float64) / frame_len
+    frame_rms = np.sqrt(energy) / scale
+    zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / frame_len
+    threshold = max(min_rms, noise_rms * threshold_ratio)
+    return (frame_rms > threshold) & (zcr < max_zcr), frame_rms
+
+
+class StreamingEndpointer:
+    """
+    Streaming voice-activity detection and endpointing.
+
+    Feed arbitrary-sized chunks; complete utterances come back as
+    SpeechSegment objects including ``pre_roll`` seconds of audio before the
+    detected onset and up to ``hangover`` seconds of trailing silence.
+    Utterances longer than ``max_utterance`` are cut and continued in a new
+    segment so a long command is never silently truncated.
+    """
+
+    def __init__(
+        self,
+        sample_rate=16000,
+        frame_duration=0.03,
+        threshold_db=8.0,
+        min_rms=0.0005,
+        max_zcr=0.35,
+        pre_roll=0.3,
+        hangover=0.6,
+        min_speech=0.25,
+        onset=0.09,
+        max_utterance=15.0,
+        noise_adapt_rate=0.02,
+        noise_rise_db=0.5,
+        dtype=np.float32
+    ):
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self._scale = full_scale(self.dtype)
+        self.frame_len = max(1, int(sample_rate * frame_duration))
+        self.threshold_ratio = 10 ** (threshold_db / 20.0)
+        self.min_rms = min_rms
+        self.max_zcr = max_zcr
+        self.pre_roll_samples = int(sample_rate * pre_roll)
+        self.hangover_frames = max(1, math.ceil(hangover * sample_rate / self.frame_len))
+        self.min_speech_samples = int(sample_rate * min_speech)
+        self.onset_frames = max(1, math.ceil(onset * sample_rate / self.frame_len))
+        self.max_utterance_samples = int(sample_rate * max_utterance)
+        self.noise_adapt_rate = noise_adapt_rate
+        # Per-frame growth factor that lets the floor rise noise_rise_db per second
+        self._noise_rise = 10 ** (noise_rise_db * frame_duration / 20.0)
+
+        # Enough history to cover pre-roll, a full utterance and the hangover tail
+        history = self.pre_roll_samples + self.max_utterance_samples + (self.hangover_frames + 2) * self.frame_len
+        self._history = AudioRingBuffer(history, dtype=self.dtype, block_size=self.frame_len)
+        self._pending = np.zeros(0, dtype=self.dtype)
+        self._clock_sample = 0
+        self._clock_time = time.time()
+        self.reset()
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=self.dtype)
+        self._classified = self._history.total_written
+        self._noise_rms = None
+        self._speech_run = 0
+        self._silence_run = 0
+        self._in_speech = False
+        self._segment_start = None
+        self._speech_onset = None
+        self._last_speech_end = None
+
+    @property
+    def in_speech(self):
+        return self._in_speech
+
+    @property
+    def noise_rms(self):
+        return self._noise_rms
+
+    def active_span(self):
+        """(start_sample, end_sample) of the utterance in progress, or None when idle"""
+        if not self._in_speech:
+            return None
+        return self._segment_start, self._classified
+
+    def audio_between(self, start_sample, end_sample):
+        """Copy of the retained audio between two stream positions"""
+        available = self._history.total_written - start_sample
+        return self._history.latest(available)[:end_sample - start_sample]
+
+    def feed(self, chunk, timestamp=None):
+        """
+        Consume new samples and return any utterances completed by them.
+
+        ``timestamp`` is the wall-clock time of the last sample in ``chunk``
+        (defaults to now) and anchors the segment start/end times.
+        """
+        chunk = np.asarray(chunk, dtype=self.dtype).reshape(-1)
+        if chunk.shape[0] == 0:
+            return []
+        self._history.write(chunk)
+        self._clock_sample = self._history.total_written
+        self._clock_time = timestamp if timestamp is not None else time.time()
+
+        pending = np.concatenate((self._pending, chunk)) if self._pending.shape[0] else chunk
+        n_frames = pending.shape[0] // self.frame_len
+        if n_frames == 0:
+            self._pending = pending
+            return []
+        frames = pending[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        self._pending = pending[n_frames * self.frame_len:].copy()
+
+        if self._noise_rms is None:
+            # Seed the floor from the quietest frames seen so far
+            _, seed_rms = classify_frames(frames, 0.0, 1.0, 0.0, 1.0, self._scale)
+            self._noise_rms = max(float(np.percentile(seed_rms, 10)), 1e-6)
+
+        is_speech, frame_rms = classify_frames(frames, self._noise_rms, self.threshold_ratio, self.min_rms, self.max_zcr, self._scale)
+        self._adapt_noise(is_speech, frame_rms)
+
+        segments = []
+        base = self._classified
+        for i, speech in enumerate(is_speech):
+            frame_end = base + (i + 1) * self.frame_len
+            segment = self._step(bool(speech), frame_end)
+            if segment is not None:
+                segments.append(segment)
+        self._classified = base + n_frames * self.frame_len
+        return segments
+
+    def flush(self):
+        """
+        End of input: the utterance in progress, cut at the last sample fed,
+        as a final segment (a list of zero or one, like ``feed``).
+        """
+        end = self._history.total_written
+        segment = self._emit(end, forced=False) if self._in_speech else None
+        self._in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._pending = np.zeros(0, dtype=self.dtype)
+        self._classified = end
+        return [segment] if segment is not None else []
+
+    def _adapt_noise(self, is_speech, frame_rms):
+        quiet = frame_rms[~is_speech]
+        if quiet.shape[0]:
+            target = float(quiet.mean())
+            weight = min(1.0, self.noise_adapt_rate * quiet.shape[0])
+            self._noise_rms = max((1 - weight) * self._noise_rms + weight * target, 1e-6)
+        else:
+            # Let the floor creep up slowly under sustained energy (e.g. HVAC switching on)
+            ceiling = float(frame_rms.min())
+            self._noise_rms = min(self._noise_rms * self._noise_rise ** frame_rms.shape[0], max(ceiling, self._noise_rms))
+
+    def _step(self, speech, frame_end):
+        frame_start = frame_end - self.frame_len
+        if not self._in_speech:
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self.onset_frames:
+                onset = frame_end - self._speech_run * self.frame_len
+                self._in_speech = True
+                self._speech_onset = onset
+                self._segment_start = max(onset - self.pre_roll_samples, self._history.total_written - self._history.capacity, 0)
+                self._last_speech_end = frame_end
+                self._silence_run = 0
+            return None
+
+        if speech:
+            self._silence_run = 0
+            self._last_speech_end = frame_end
+        else:
+            self._silence_run += 1
+
+        if self._silence_run >= self.hangover_frames:
+            segment = self._emit(frame_end, forced=False)
+            self._in_speech = False
+            self._speech_run = 0
+            return segment
+
+        if frame_end - self._segment_start >= self.max_utterance_samples:
+            segment = self._emit(frame_end, forced=True)
+            # Continue the utterance in a fresh segment starting right here
+            self._segment_start = frame_end
+            self._speech_onset = frame_end
+            self._last_speech_end = frame_end if speech else frame_start
+            return segment
+        return None
+
+    def _emit(self, end_sample, forced):
+        start = self._segment_start
+        if self._last_speech_end - self._speech_onset < self.min_speech_samples and not forced:
+            logger.debug("VAD: dropped blip shorter than min_speech")
+            return None
+        return SpeechSegment(
+            self.audio_between(start, end_sample),
+            start,
+            end_sample,
+            self.sample_rate,
+            self._time_of(start),
+            self._time_of(end_sample),
+            forced=forced,
+        )
+
+    def _time_of(self, sample):
+        return self._clock_time - (self._clock_sample - sample) / self.sample_rate
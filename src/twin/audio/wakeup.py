@@ -0,0 +1,49 @@
+import time
+import asyncio
+import threading
+from ..utils.metrics import get_metrics
+
+
+class ArrivalNotifier:
+    """
+    Wakes an asyncio consumer when a capture thread delivers audio.
+
+    ``notify()`` is safe to call from any thread (sounddevice, RTSP capture,
+    ingest or replay threads). Wakeups are coalesced: only the first block
+    after the consumer last woke schedules a ``call_soon_threadsafe``, and its
+    arrival time is kept so the consumer can report how long data waited
+    before processing started.
+    """
+
+    def __init__(self, name, loop=None):
+        self.name = name
+        self._loop = loop or asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._lock = threading.Lock()
+        self._first_arrival = None
+
+    def notify(self):
+        with self._lock:
+            if self._first_arrival is not None:
+                return
+            self._first_arrival = time.monotonic()
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout=None):
+        """
+        Wait until new data has arrived (or ``timeout`` seconds pass so the
+        caller can still do periodic housekeeping). Returns True on arrival.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        with self._lock:
+            arrived, self._first_arrival = self._first_arrival, None
+        if arrived is not None:
+            latency = time.monotonic() - arrived
+            metrics = get_metrics()
+            metrics.observe("pipeline.arrival_to_processing_seconds", latency)
+            metrics.observe(f"pipeline.{self.name}.arrival_to_processing_seconds", latency)
+        return True
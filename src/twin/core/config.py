@@ -10,20 +10,17 @@ load_dotenv(dotenv_path=env_path)
 # Set up logger
 logger = logging.getLogger("twin")
 
-# Debug output for .env loading
-env_silence_threshold = os.getenv('SILENCE_THRESHOLD')
-logger.warning(f"Loading SILENCE_THRESHOLD from .env: '{env_silence_threshold}'")
-
 # Audio settings
 SAMPLE_RATE = int(os.getenv('SAMPLE_RATE', '16000'))
 BUFFER_DURATION = float(os.getenv('BUFFER_DURATION', '3'))
 SMALL_BUFFER_DURATION = float(os.getenv('SMALL_BUFFER_DURATION', '0.2'))
 CHANNELS = int(os.getenv('CHANNELS', '1'))
 CHUNK_SIZE = int(os.getenv('CHUNK_SIZE', '1024'))
-SILENCE_THRESHOLD = float(os.getenv('SILENCE_THRESHOLD', '0.01')) # Default to 0.01
-
-# Debug output for loaded value
-logger.warning(f"Final SILENCE_THRESHOLD: {SILENCE_THRESHOLD}")
+AUDIO_SAMPLE_FORMAT = os.getenv('AUDIO_SAMPLE_FORMAT', 'f32').lower()  # 'f32' or 's16' (halves pipe, buffer and upload size)
+AUDIO_QUEUE_SIZE = int(os.getenv('AUDIO_QUEUE_SIZE', '30'))  # chunks buffered between capture and processing threads
+AUDIO_QUEUE_POLICY = os.getenv('AUDIO_QUEUE_POLICY', 'drop-oldest').lower()  # 'drop-oldest', 'drop-newest' or 'block'
+IDLE_WAKEUP_INTERVAL = float(os.getenv('IDLE_WAKEUP_INTERVAL', '1.0'))  # max seconds a source task sleeps without new audio
+ENERGY_BLOCK_DURATION = float(os.getenv('ENERGY_BLOCK_DURATION', '0.1'))  # seconds per energy-history block
 
 # RTSP Stream settings
 AUDIO_SOURCE = os.getenv('AUDIO_SOURCE', 'microphone')
@@ -31,11 +28,71 @@ RTSP_URL = os.getenv('RTSP_URL', '')
 RTSP_LATENCY_FLAGS = os.getenv('RTSP_LATENCY_FLAGS', '')
 RTSP_AUDIO_CODEC = os.getenv('RTSP_AUDIO_CODEC', 'aac')
 RTSP_RECONNECT_INTERVAL = int(os.getenv('RTSP_RECONNECT_INTERVAL', '20'))  # seconds
+RTSP_PROBE_CACHE = os.getenv('RTSP_PROBE_CACHE', 'data/rtsp_probe_cache.json')  # ffprobe results (audio track, codec, rate); empty disables
+RTSP_PROBE_TTL = float(os.getenv('RTSP_PROBE_TTL', '86400'))  # seconds a cached probe stays valid
+RTSP_BACKOFF_BASE = float(os.getenv('RTSP_BACKOFF_BASE', '2'))  # first reconnect delay, doubled per consecutive failure
+RTSP_BACKOFF_MAX = float(os.getenv('RTSP_BACKOFF_MAX', '300'))
+RTSP_PARK_INTERVAL = float(os.getenv('RTSP_PARK_INTERVAL', '3600'))  # re-probe interval for streams without audio
+RTSP_INGEST_MODE = os.getenv('RTSP_INGEST_MODE', 'shared').lower()  # 'shared' (one thread for all sources), 'threaded' or 'process'
+NATIVE_PCM_INGEST = os.getenv('NATIVE_PCM_INGEST', 'true').lower() == 'true'  # read HTTP WAV / RTP L16 sources without ffmpeg
+CAPTURE_WORKER_SOURCES = int(os.getenv('CAPTURE_WORKER_SOURCES', '1'))  # sources per capture process in 'process' mode
+SHM_RING_SECONDS = float(os.getenv('SHM_RING_SECONDS', '30'))  # shared-memory ring length per source in 'process' mode
+
+# Replay and recording (AUDIO_SOURCE=replay plays REPLAY_PATHS through the RTSP source pipeline)
+REPLAY_PATHS = [p.strip() for p in os.getenv('REPLAY_PATHS', '').split(',') if p.strip()]  # files or directories, one source each
+REPLAY_SPEED = float(os.getenv('REPLAY_SPEED', '1.0'))  # 1.0 = real time, 0 = as fast as the pipeline consumes
+REPLAY_LOOP = os.getenv('REPLAY_LOOP', 'false').lower() == 'true'
+RECORD_DIR = os.getenv('RECORD_DIR', '')  # when set, live sources are recorded here as WAV
+RECORD_SEGMENT_SECONDS = float(os.getenv('RECORD_SEGMENT_SECONDS', '600'))
 
 # Transcription settings
 LANGUAGE = os.getenv('LANGUAGE', 'en')
 SIMILARITY_THRESHOLD = int(os.getenv('SIMILARITY_THRESHOLD', '85'))
 WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'turbo')
+WHISPER_ASLEEP_MODEL = os.getenv('WHISPER_ASLEEP_MODEL', 'base')  # small model for asleep rooms (wake detection only); '' disables
+TRANSCRIBE_MODE = os.getenv('TRANSCRIBE_MODE', 'utterance').lower()  # 'utterance' (VAD endpointed), 'streaming' (incremental, local only) or 'window' (sliding buffer)
+STREAMING_HOP = float(os.getenv('STREAMING_HOP', '1.0'))  # seconds of new speech between incremental decodes
+TRANSCRIBE_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', '1'))  # concurrent local Whisper decodes (threads sharing one model)
+TRANSCRIBE_QUEUE_SIZE = int(os.getenv('TRANSCRIBE_QUEUE_SIZE', '8'))  # decodes waiting for a worker
+TRANSCRIBE_QUEUE_POLICY = os.getenv('TRANSCRIBE_QUEUE_POLICY', 'block').lower()  # 'block', 'drop-newest' or 'drop-oldest'
+TRANSCRIBE_BATCH_SIZE = int(os.getenv('TRANSCRIBE_BATCH_SIZE', '1'))  # >1 batches segments from all sources into one decode
+TRANSCRIBE_BATCH_WAIT = float(os.getenv('TRANSCRIBE_BATCH_WAIT', '0.15'))  # seconds a segment may wait for a batch to fill
+TRANSCRIBE_CACHE_SIZE = int(os.getenv('TRANSCRIBE_CACHE_SIZE', '64'))  # results kept by audio fingerprint (0 disables)
+TRANSCRIBE_CACHE_STEP_DB = float(os.getenv('TRANSCRIBE_CACHE_STEP_DB', '3.0'))  # envelope quantization; coarser matches more windows
+TRANSCRIBE_CASCADE = os.getenv('TRANSCRIBE_CASCADE', 'false').lower() == 'true'  # cheap decode first, re-decode only unsure segments (unbatched decodes)
+CASCADE_BEAM = int(os.getenv('CASCADE_BEAM', '1'))  # beam of the cheap pass (1 = greedy)
+CASCADE_FALLBACK_BEAM = int(os.getenv('CASCADE_FALLBACK_BEAM', '5'))  # beam of the re-decode
+CASCADE_MIN_LOGPROB = float(os.getenv('CASCADE_MIN_LOGPROB', '-0.7'))  # escalate segments with avg_logprob below this
+CASCADE_MAX_NO_SPEECH = float(os.getenv('CASCADE_MAX_NO_SPEECH', '0.5'))  # ... no_speech_prob above this
+CASCADE_MAX_COMPRESSION = float(os.getenv('CASCADE_MAX_COMPRESSION', '2.4'))  # ... or compression_ratio above this
+
+# Per-source noise gate: audio must clear the source's own noise floor by NOISE_GATE_SNR_DB
+NOISE_GATE_SNR_DB = float(os.getenv('NOISE_GATE_SNR_DB', '6'))
+NOISE_GATE_PERCENTILE = float(os.getenv('NOISE_GATE_PERCENTILE', '10'))  # percentile of block energies taken as the floor
+NOISE_GATE_MIN_RMS = float(os.getenv('NOISE_GATE_MIN_RMS', '0.002'))  # absolute RMS floor, low enough for quiet mics
+NOISE_FLOOR_WINDOW = float(os.getenv('NOISE_FLOOR_WINDOW', '30'))  # seconds of block energies the floor is estimated over
+
+# Self-echo gating: a room's mics ignore audio captured while twin plays sounds there
+ECHO_GATE_ENABLED = os.getenv('ECHO_GATE_ENABLED', 'true').lower() == 'true'
+ECHO_TAIL = float(os.getenv('ECHO_TAIL', '0.75'))  # seconds after playback still treated as echo (reverb, stream latency)
+ECHO_DEFAULT_DURATION = float(os.getenv('ECHO_DEFAULT_DURATION', '2.0'))  # assumed playback length until one is observed per actuator
+ECHO_BARGE_IN_DB = float(os.getenv('ECHO_BARGE_IN_DB', '0'))  # > 0: speech this far above the gate threshold passes during playback
+PLAYBACK_ROOM = os.getenv('PLAYBACK_ROOM', '')  # room where cues play; default: SSH_HOST_TARGET's room, else all rooms
+
+# Voice activity detection / endpointing (used when TRANSCRIBE_MODE=utterance)
+VAD_FRAME_DURATION = float(os.getenv('VAD_FRAME_DURATION', '0.03'))  # seconds
+VAD_THRESHOLD_DB = float(os.getenv('VAD_THRESHOLD_DB', '8'))  # dB above the tracked noise floor
+VAD_MIN_RMS = float(os.getenv('VAD_MIN_RMS', str(NOISE_GATE_MIN_RMS)))  # absolute floor for speech frames
+VAD_PRE_ROLL = float(os.getenv('VAD_PRE_ROLL', '0.3'))  # seconds kept before speech onset
+VAD_HANGOVER = float(os.getenv('VAD_HANGOVER', '0.6'))  # seconds of silence that end an utterance
+VAD_MIN_SPEECH = float(os.getenv('VAD_MIN_SPEECH', '0.25'))  # shorter blips are dropped
+VAD_MAX_UTTERANCE = float(os.getenv('VAD_MAX_UTTERANCE', '15'))  # longer speech is split
+
+# Cross-microphone arbitration: one transcription per utterance heard by several sources
+ARBITRATION_ENABLED = os.getenv('ARBITRATION_ENABLED', 'true').lower() == 'true'
+ARBITRATION_WINDOW = float(os.getenv('ARBITRATION_WINDOW', '0.5'))  # seconds to wait for other sources' copies
+ARBITRATION_MAX_OFFSET = float(os.getenv('ARBITRATION_MAX_OFFSET', '0.5'))  # tolerated stream latency difference (seconds)
+ARBITRATION_MIN_CORRELATION = float(os.getenv('ARBITRATION_MIN_CORRELATION', '0.5'))  # energy-envelope correlation
 
 # Inference and command settings
 RISK_THRESHOLD = float(os.getenv('RISK_THRESHOLD', '0.5'))
@@ -52,7 +109,13 @@ HIP_DISTANCE_THRESHOLD = float(os.getenv('HIP_DISTANCE_THRESHOLD', '1.1'))
 # Wake/sleep settings
 WAKE_TIMEOUT = int(os.getenv('WAKE_TIMEOUT', '24'))
 WAKE_SOUND_FILE = os.getenv('WAKE_SOUND_FILE', 'data/audio/wake.wav')
+WAKE_ENGINE = os.getenv('WAKE_ENGINE', 'text').lower()  # 'text' (Whisper + phrase search) or 'kws' (keyword spotter screens asleep rooms)
+KWS_TEMPLATES = os.getenv('KWS_TEMPLATES', 'config/kws_templates.npz')
+KWS_THRESHOLD = float(os.getenv('KWS_THRESHOLD')) if os.getenv('KWS_THRESHOLD') else None  # overrides the enrolled threshold
 SLEEP_SOUND_FILE = os.getenv('SLEEP_SOUND_FILE', 'data/audio/sleep.wav')
+CUE_PLAYBACK = os.getenv('CUE_PLAYBACK', 'cached').lower()  # 'cached' (decoded once, persistent output/SSH channel) or 'subprocess' (paplay/ssh per cue)
+CUE_SAMPLE_RATE = int(os.getenv('CUE_SAMPLE_RATE', '48000'))  # rate of the persistent cue output stream
+CUE_BLOCKSIZE = int(os.getenv('CUE_BLOCKSIZE', '256'))  # output callback block; smaller starts cues sooner
 
 # TTS settings
 TTS_PYTHON_PATH = os.getenv('TTS_PYTHON_PATH', '/home/andy/venvs/tts-env/bin/python')
@@ -62,6 +125,10 @@ TTS_SCRIPT_PATH = os.getenv('TTS_SCRIPT_PATH', '/home/andy/scripts/tts/tts.py')
 REMOTE_STORE_URL = os.getenv('REMOTE_STORE_URL', '')
 REMOTE_INFERENCE_URL = os.getenv('REMOTE_INFERENCE_URL', '')
 REMOTE_TRANSCRIBE_URL = os.getenv('REMOTE_TRANSCRIBE_URL', '')
+REMOTE_TRANSCRIBE_ENCODING = os.getenv('REMOTE_TRANSCRIBE_ENCODING', 'int16').lower()  # 'float', 'int16', 'flac' or 'opus'
+REMOTE_TRANSCRIBE_CONCURRENCY = int(os.getenv('REMOTE_TRANSCRIBE_CONCURRENCY', '4'))  # requests in flight (and pooled connections)
+REMOTE_TRANSCRIBE_TIMEOUT = float(os.getenv('REMOTE_TRANSCRIBE_TIMEOUT', '10.0'))  # per-request deadline, seconds
+REMOTE_TRANSCRIBE_KEEPALIVE = float(os.getenv('REMOTE_TRANSCRIBE_KEEPALIVE', '30.0'))  # idle seconds before a pooled connection closes
 SSH_HOST_TARGET = os.getenv('SSH_HOST_TARGET', None) # e.g., user@hostname
 
 # Compute type - dependent on available hardware
@@ -90,14 +157,68 @@ def get_config_dict():
         "SMALL_BUFFER_DURATION": SMALL_BUFFER_DURATION,
         "CHANNELS": CHANNELS,
         "CHUNK_SIZE": CHUNK_SIZE,
-        "SILENCE_THRESHOLD": SILENCE_THRESHOLD,
+        "AUDIO_SAMPLE_FORMAT": AUDIO_SAMPLE_FORMAT,
+        "AUDIO_QUEUE_SIZE": AUDIO_QUEUE_SIZE,
+        "AUDIO_QUEUE_POLICY": AUDIO_QUEUE_POLICY,
+        "IDLE_WAKEUP_INTERVAL": IDLE_WAKEUP_INTERVAL,
+        "ENERGY_BLOCK_DURATION": ENERGY_BLOCK_DURATION,
         "AUDIO_SOURCE": AUDIO_SOURCE,
         "RTSP_URL": RTSP_URL,
         "RTSP_LATENCY_FLAGS": RTSP_LATENCY_FLAGS,
         "RTSP_AUDIO_CODEC": RTSP_AUDIO_CODEC,
         "RTSP_RECONNECT_INTERVAL": RTSP_RECONNECT_INTERVAL,
+        "RTSP_PROBE_CACHE": RTSP_PROBE_CACHE,
+        "RTSP_PROBE_TTL": RTSP_PROBE_TTL,
+        "RTSP_BACKOFF_BASE": RTSP_BACKOFF_BASE,
+        "RTSP_BACKOFF_MAX": RTSP_BACKOFF_MAX,
+        "RTSP_PARK_INTERVAL": RTSP_PARK_INTERVAL,
+        "RTSP_INGEST_MODE": RTSP_INGEST_MODE,
+        "NATIVE_PCM_INGEST": NATIVE_PCM_INGEST,
+        "CAPTURE_WORKER_SOURCES": CAPTURE_WORKER_SOURCES,
+        "SHM_RING_SECONDS": SHM_RING_SECONDS,
+        "REPLAY_PATHS": REPLAY_PATHS,
+        "REPLAY_SPEED": REPLAY_SPEED,
+        "REPLAY_LOOP": REPLAY_LOOP,
+        "RECORD_DIR": RECORD_DIR,
+        "RECORD_SEGMENT_SECONDS": RECORD_SEGMENT_SECONDS,
         "LANGUAGE": LANGUAGE,
+        "WHISPER_ASLEEP_MODEL": WHISPER_ASLEEP_MODEL,
         "SIMILARITY_THRESHOLD": SIMILARITY_THRESHOLD,
+        "TRANSCRIBE_MODE": TRANSCRIBE_MODE,
+        "STREAMING_HOP": STREAMING_HOP,
+        "TRANSCRIBE_WORKERS": TRANSCRIBE_WORKERS,
+        "TRANSCRIBE_QUEUE_SIZE": TRANSCRIBE_QUEUE_SIZE,
+        "TRANSCRIBE_QUEUE_POLICY": TRANSCRIBE_QUEUE_POLICY,
+        "TRANSCRIBE_BATCH_SIZE": TRANSCRIBE_BATCH_SIZE,
+        "TRANSCRIBE_BATCH_WAIT": TRANSCRIBE_BATCH_WAIT,
+        "TRANSCRIBE_CACHE_SIZE": TRANSCRIBE_CACHE_SIZE,
+        "TRANSCRIBE_CACHE_STEP_DB": TRANSCRIBE_CACHE_STEP_DB,
+        "TRANSCRIBE_CASCADE": TRANSCRIBE_CASCADE,
+        "CASCADE_BEAM": CASCADE_BEAM,
+        "CASCADE_FALLBACK_BEAM": CASCADE_FALLBACK_BEAM,
+        "CASCADE_MIN_LOGPROB": CASCADE_MIN_LOGPROB,
+        "CASCADE_MAX_NO_SPEECH": CASCADE_MAX_NO_SPEECH,
+        "CASCADE_MAX_COMPRESSION": CASCADE_MAX_COMPRESSION,
+        "NOISE_GATE_SNR_DB": NOISE_GATE_SNR_DB,
+        "NOISE_GATE_PERCENTILE": NOISE_GATE_PERCENTILE,
+        "NOISE_GATE_MIN_RMS": NOISE_GATE_MIN_RMS,
+        "NOISE_FLOOR_WINDOW": NOISE_FLOOR_WINDOW,
+        "ECHO_GATE_ENABLED": ECHO_GATE_ENABLED,
+        "ECHO_TAIL": ECHO_TAIL,
+        "ECHO_DEFAULT_DURATION": ECHO_DEFAULT_DURATION,
+        "ECHO_BARGE_IN_DB": ECHO_BARGE_IN_DB,
+        "PLAYBACK_ROOM": PLAYBACK_ROOM,
+        "VAD_FRAME_DURATION": VAD_FRAME_DURATION,
+        "VAD_THRESHOLD_DB": VAD_THRESHOLD_DB,
+        "VAD_MIN_RMS": VAD_MIN_RMS,
+        "VAD_PRE_ROLL": VAD_PRE_ROLL,
+        "VAD_HANGOVER": VAD_HANGOVER,
+        "VAD_MIN_SPEECH": VAD_MIN_SPEECH,
+        "VAD_MAX_UTTERANCE": VAD_MAX_UTTERANCE,
+        "ARBITRATION_ENABLED": ARBITRATION_ENABLED,
+        "ARBITRATION_WINDOW": ARBITRATION_WINDOW,
+        "ARBITRATION_MAX_OFFSET": ARBITRATION_MAX_OFFSET,
+        "ARBITRATION_MIN_CORRELATION": ARBITRATION_MIN_CORRELATION,
         "RISK_THRESHOLD": RISK_THRESHOLD,
         "COOLDOWN_PERIOD": COOLDOWN_PERIOD,
         "HISTORY_BUFFER_SIZE": HISTORY_BUFFER_SIZE,
@@ -108,12 +229,22 @@ def get_config_dict():
         "HIP_DISTANCE_THRESHOLD": HIP_DISTANCE_THRESHOLD,
         "WAKE_TIMEOUT": WAKE_TIMEOUT,
         "WAKE_SOUND_FILE": WAKE_SOUND_FILE,
+        "WAKE_ENGINE": WAKE_ENGINE,
+        "KWS_TEMPLATES": KWS_TEMPLATES,
+        "KWS_THRESHOLD": KWS_THRESHOLD,
         "SLEEP_SOUND_FILE": SLEEP_SOUND_FILE,
+        "CUE_PLAYBACK": CUE_PLAYBACK,
+        "CUE_SAMPLE_RATE": CUE_SAMPLE_RATE,
+        "CUE_BLOCKSIZE": CUE_BLOCKSIZE,
         "TTS_PYTHON_PATH": TTS_PYTHON_PATH,
         "TTS_SCRIPT_PATH": TTS_SCRIPT_PATH,
         "REMOTE_STORE_URL": REMOTE_STORE_URL,
         "REMOTE_INFERENCE_URL": REMOTE_INFERENCE_URL,
         "REMOTE_TRANSCRIBE_URL": REMOTE_TRANSCRIBE_URL,
+        "REMOTE_TRANSCRIBE_ENCODING": REMOTE_TRANSCRIBE_ENCODING,
+        "REMOTE_TRANSCRIBE_CONCURRENCY": REMOTE_TRANSCRIBE_CONCURRENCY,
+        "REMOTE_TRANSCRIBE_TIMEOUT": REMOTE_TRANSCRIBE_TIMEOUT,
+        "REMOTE_TRANSCRIBE_KEEPALIVE": REMOTE_TRANSCRIBE_KEEPALIVE,
         "SSH_HOST_TARGET": SSH_HOST_TARGET,
         "DEVICE_TYPE": DEVICE_TYPE,
         "COMPUTE_TYPE": COMPUTE_TYPE,
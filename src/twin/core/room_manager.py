@@ -191,6 +191,14 @@ class RoomManager:
         
         return sorted(list(rooms))
     
+    def get_stream_sources(self) -> List[Dict]:
+        """Network audio sources (RTSP and HTTP(S) streams) from the source mappings, with their rooms"""
+        sources = []
+        for source_url, location in self.config.get("source_mappings", {}).items():
+            if source_url.lower().startswith(("rtsp://", "http://", "https://")):
+                sources.append({"url": source_url, "location": location})
+        return sources
+    
     def get_room_info(self, room: str) -> Dict:
         """Get comprehensive information about a room"""
         info = {
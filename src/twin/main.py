@@ -1,7 +1,6 @@
 from collections import deque
 from datetime import datetime
 import asyncio
-import queue
 import numpy as np
 import sounddevice as sd
 import json
@@ -15,14 +14,31 @@ from .audio.audio import (
     play_wake_sound,
     play_sleep_sound,
 )
-from .audio.rtsp_audio import create_rtsp_audio_stream
+from .audio.rtsp_audio import create_rtsp_audio_stream, stop_capture_backends
+from .audio.native_ingest import native_scheme
+from .audio.ring_buffer import AudioRingBuffer
+from .audio.vad import StreamingEndpointer
+from .audio.gate import NoiseGate, signal_rms
+from .audio.echo import get_playback_tracker
+from .audio.cues import get_cue_player
+from .audio.formats import get_sample_format
+from .audio.replay import AudioRecorder, is_replay_url, replay_path
+from .audio.arbitration import Arbiter
+from .audio.wakeup import ArrivalNotifier
+from .audio.health import get_source_health
 from .ai.transcribe import transcribe_audio, init_transcription_model
+from .ai.streaming import StreamingTranscriber
+from .ai.executor import get_transcription_executor, TranscriptionDropped
+from .ai.remote_client import get_remote_transcription_client
+from .ai.tiers import ModelTiers
+from .audio.kws import get_keyword_spotter
 from .ai.generator import process_user_text
 from .quality.quality_control import generate_quality_control_report
 from .web.webserver import start_webserver
 from .commands.command import execute_commands
 from .core.room_manager import get_room_manager
 from .core import config
+from .utils.metrics import get_metrics
 import uuid
 import os
 import logging
@@ -54,6 +70,10 @@ BUFFER_DURATION = config.BUFFER_DURATION
 BUFFER_SIZE = int(SAMPLE_RATE * BUFFER_DURATION)
 SMALL_BUFFER_DURATION = config.SMALL_BUFFER_DURATION
 SMALL_BUFFER_SIZE = int(SAMPLE_RATE * SMALL_BUFFER_DURATION)
+ENERGY_BLOCK_SIZE = max(1, int(SAMPLE_RATE * config.ENERGY_BLOCK_DURATION))
+SAMPLE_FORMAT = get_sample_format(config.AUDIO_SAMPLE_FORMAT)
+# Keep enough block energies for a noise-floor estimate longer than the transcription window
+NOISE_FLOOR_BLOCKS = max(1, int(config.NOISE_FLOOR_WINDOW / config.ENERGY_BLOCK_DURATION))
 LANGUAGE = config.LANGUAGE
 SIMILARITY_THRESHOLD = config.SIMILARITY_THRESHOLD
 COOLDOWN_PERIOD = config.COOLDOWN_PERIOD
@@ -61,7 +81,6 @@ RISK_THRESHOLD = config.RISK_THRESHOLD
 HISTORY_BUFFER_SIZE = config.HISTORY_BUFFER_SIZE
 HISTORY_MAX_CHARS = config.HISTORY_MAX_CHARS
 WAKE_TIMEOUT = config.WAKE_TIMEOUT
-SILENCE_THRESHOLD = config.SILENCE_THRESHOLD
 CHANNELS = config.CHANNELS
 CHUNK_SIZE = config.CHUNK_SIZE
 HISTORY_INCLUDE_CHUNKS = config.HISTORY_INCLUDE_CHUNKS
@@ -69,6 +88,7 @@ TTS_PYTHON_PATH = config.TTS_PYTHON_PATH
 TTS_SCRIPT_PATH = config.TTS_SCRIPT_PATH
 WAKE_SOUND_FILE = config.WAKE_SOUND_FILE
 SLEEP_SOUND_FILE = config.SLEEP_SOUND_FILE
+TRANSCRIBE_MODE = config.TRANSCRIBE_MODE
 
 parser = ArgumentParser(description="Live transcription with flexible inference and embedding options.")
 parser.add_argument("-e", "--execute", action="store_true", help="Execute the commands returned by the inference model")
@@ -77,19 +97,33 @@ parser.add_argument("--remote-store", help="Specify the URL for the vector store
 parser.add_argument("-s", "--silent", action="store_true", help="Disable TTS playback")
 parser.add_argument("--source", default=None, help="Manually set the audio source (index or name)")
 parser.add_argument("--whisper-model", default=config.WHISPER_MODEL, help="Specify the Whisper model size")
+parser.add_argument("--asleep-model", default=config.WHISPER_ASLEEP_MODEL, help="Smaller Whisper model for rooms that are asleep ('' to always use --whisper-model)")
 parser.add_argument("--remote-transcribe", help="Use remote transcription. Specify the URL for the transcription server.")
+parser.add_argument("--replay", nargs="+", help="Replay recordings (WAV/FLAC/raw files or directories) instead of live sources")
+parser.add_argument("--replay-speed", type=float, help="Replay pace: 1 = real time, 0 = as fast as the pipeline consumes")
+parser.add_argument("--record-dir", help="Record live sources as WAV into this directory")
 args = parser.parse_args()
 
+if args.replay:
+    config.AUDIO_SOURCE = 'replay'
+    config.REPLAY_PATHS = args.replay
+if args.replay_speed is not None:
+    config.REPLAY_SPEED = args.replay_speed
+if args.record_dir:
+    config.RECORD_DIR = args.record_dir
+
 # Use config values as defaults, command line args override them
 REMOTE_STORE_URL = args.remote_store or config.REMOTE_STORE_URL
 REMOTE_INFERENCE_URL = args.remote_inference or config.REMOTE_INFERENCE_URL
 REMOTE_TRANSCRIBE_URL = args.remote_transcribe or config.REMOTE_TRANSCRIBE_URL
 
-audio_buffer = deque(maxlen=BUFFER_SIZE)
-small_audio_buffer = deque(maxlen=SMALL_BUFFER_SIZE)
-audio_queue = queue.Queue()
+audio_buffer = AudioRingBuffer(BUFFER_SIZE, dtype=SAMPLE_FORMAT.dtype, block_size=ENERGY_BLOCK_SIZE, history_blocks=NOISE_FLOOR_BLOCKS)
 recent_transcriptions = deque(maxlen=10)
 history_buffer = deque(maxlen=HISTORY_BUFFER_SIZE)
+mic_state = None
+mic_notifier = None
+arbiter = None
+model_tiers = None
 running_log = deque(maxlen=1000)
 
 is_awake = False
@@ -115,10 +149,197 @@ def get_history_text():
             history_text = history_text[history_text.index(" ") + 1:]
     return history_text
 
-def calculate_rms(audio_data):
-    if len(audio_data) == 0:
-        return np.nan
-    return np.sqrt(np.mean(np.square(audio_data)))
+def create_endpointer():
+    """Build a streaming VAD/endpointer from the VAD_* settings"""
+    return StreamingEndpointer(
+        sample_rate=SAMPLE_RATE,
+        frame_duration=config.VAD_FRAME_DURATION,
+        threshold_db=config.VAD_THRESHOLD_DB,
+        min_rms=config.VAD_MIN_RMS,
+        pre_roll=config.VAD_PRE_ROLL,
+        hangover=config.VAD_HANGOVER,
+        min_speech=config.VAD_MIN_SPEECH,
+        max_utterance=config.VAD_MAX_UTTERANCE,
+        dtype=SAMPLE_FORMAT.dtype,
+    )
+
+class SourceState:
+    """Per-source audio pipeline state shared by the microphone and RTSP loops"""
+
+    def __init__(self, source_id, buffer, location=None, recent_transcriptions=None, history_buffer=None):
+        self.source_id = source_id
+        self.location = location
+        self.buffer = buffer
+        self.cursor = 0
+        self.endpointer = create_endpointer() if TRANSCRIBE_MODE in ('utterance', 'streaming') else None
+        self.gate = NoiseGate(
+            buffer,
+            snr_db=config.NOISE_GATE_SNR_DB,
+            percentile=config.NOISE_GATE_PERCENTILE,
+            min_rms=config.NOISE_GATE_MIN_RMS,
+            probe_seconds=SMALL_BUFFER_DURATION,
+            sample_rate=SAMPLE_RATE,
+        )
+        self.streamer = None
+        self.recent_transcriptions = recent_transcriptions if recent_transcriptions is not None else deque(maxlen=10)
+        self.history_buffer = history_buffer if history_buffer is not None else deque(maxlen=HISTORY_BUFFER_SIZE)
+
+def collect_audio_windows(state, final=False):
+    """
+    Decide what audio to transcribe this tick.
+
+    With an endpointer the samples that arrived since the last tick are fed
+    to the VAD and only completed speech segments are returned, so each
+    utterance is transcribed once; ``final`` (the source ended) also flushes
+    the utterance still in progress. In 'window' mode the whole buffer is
+    returned whenever its recent level is open on the source's noise gate.
+    Segments that do not clear the gate's SNR are dropped either way.
+    """
+    metrics = get_metrics()
+    if state.endpointer is not None:
+        new_audio, state.cursor = state.buffer.since(state.cursor)
+        completed = state.endpointer.feed(new_audio)
+        if final:
+            completed += state.endpointer.flush()
+        segments = []
+        for segment in completed:
+            logger.debug(f"[VAD] {state.source_id}: {segment}")
+            metrics.inc("vad.utterances")
+            metrics.observe("vad.utterance_seconds", segment.duration)
+            if not state.gate.check_audio(segment.audio):
+                logger.debug(f"[Gate] {state.source_id}: dropped segment below {state.gate.threshold():.4f} RMS")
+                metrics.inc(f"gate.{state.source_id}.dropped")
+                continue
+            if is_self_echo(state, segment.start_time, segment.end_time, signal_rms(segment.audio)):
+                logger.debug(f"[Echo] {state.source_id}: dropped segment overlapping twin's own playback")
+                metrics.inc(f"echo.{state.source_id}.suppressed")
+                metrics.inc("echo.suppressed_seconds", segment.duration)
+                continue
+            segments.append(segment)
+        return segments
+
+    if len(state.buffer) == 0 or not state.gate.check_recent():
+        return []
+    now = time.time()
+    if is_self_echo(state, now - SMALL_BUFFER_DURATION, now, state.buffer.recent_rms(state.gate.probe_samples)):
+        metrics.inc(f"echo.{state.source_id}.suppressed")
+        return []
+    # One memcpy: the snapshot must stay stable while transcription awaits
+    return [state.buffer.snapshot()]
+
+def is_self_echo(state, start_time, end_time, level):
+    """
+    Whether audio this source captured between ``start_time`` and
+    ``end_time`` overlaps twin's own playback in the source's room. With
+    ECHO_BARGE_IN_DB set, speech that far above the gate threshold still
+    passes so the user can talk over a cue.
+    """
+    if not config.ECHO_GATE_ENABLED or not get_playback_tracker().overlaps(state.location, start_time, end_time):
+        return False
+    if config.ECHO_BARGE_IN_DB > 0 and level >= state.gate.threshold() * 10 ** (config.ECHO_BARGE_IN_DB / 20):
+        get_metrics().inc("echo.barge_in")
+        return False
+    return True
+
+async def keyword_hit(spotter, state, window):
+    """Whether an asleep room's window contains a wake word and so is worth transcribing"""
+    # MFCC + DTW is CPU work, so it runs on the transcription workers rather than the event loop
+    try:
+        hit = await get_transcription_executor().run(spotter.detect, window.audio if state.endpointer is not None else window, source=state.source_id)
+    except TranscriptionDropped:
+        logger.warning(f"Transcription queue full; {state.source_id} skipped a keyword check")
+        return False
+    if hit is not None:
+        logger.info(f"[KWS] {state.source_id}: {hit}")
+        get_metrics().inc(f"kws.{state.source_id}.hits")
+    return hit is not None
+
+async def transcribe_source(state, transcription_model, use_remote_transcription, remote_transcribe_url, final=False):
+    """Transcribe whatever new audio this source has and return the resulting texts"""
+    windows = collect_audio_windows(state, final)
+    # With the keyword spotter, an asleep room's audio only reaches Whisper when it contains a wake word
+    spotter = get_keyword_spotter()
+    # Same wake state the command handling uses
+    screened = spotter is not None and not is_awake
+    if screened:
+        windows = [window for window in windows if await keyword_hit(spotter, state, window)]
+    # Asleep rooms only need wake detection, so they decode with the small model
+    model, tier = model_tiers.select(state.location) if model_tiers is not None and transcription_model is not None else (transcription_model, 'full')
+
+    if TRANSCRIBE_MODE == 'streaming' and transcription_model is not None:
+        # Hop-based decoding of the utterance in progress; text is released once committed
+        if state.streamer is None:
+            state.streamer = StreamingTranscriber(
+                model,
+                sample_rate=SAMPLE_RATE,
+                hop=config.STREAMING_HOP,
+                language=LANGUAGE,
+            )
+        elif state.streamer.utterance_start is None:
+            state.streamer.model = model  # Tier changes take effect between utterances
+        transcriptions = []
+        # Decodes run on a transcription worker; one update per source is in flight at a time
+        executor = get_transcription_executor()
+        try:
+            for segment in windows:
+                transcriptions.extend(await executor.run(state.streamer.update, segment.start_sample, segment.audio, final=True, source=state.source_id))
+            span = state.endpointer.active_span()
+            if span and not screened and state.streamer.due(*span) and not (config.ECHO_GATE_ENABLED and get_playback_tracker().active(state.location)):
+                transcriptions.extend(await executor.run(state.streamer.update, span[0], state.endpointer.audio_between(*span), source=state.source_id))
+            elif span is None and state.streamer.utterance_start is not None:
+                # The utterance ended but its segment was gated out as noise
+                state.streamer.discard()
+        except TranscriptionDropped:
+            logger.warning(f"Transcription queue full; {state.source_id} skipped a streaming decode")
+        for text in transcriptions:
+            state.recent_transcriptions.append(text)
+            state.history_buffer.append(text)
+        return transcriptions
+
+    transcriptions = []
+    for window in windows:
+        if arbiter is not None and state.endpointer is not None:
+            # Several mics may have heard this utterance; only the best-SNR copy is transcribed
+            winner = await arbiter.submit(arbiter.candidate(state.source_id, state.location, window, state.gate.noise_floor()))
+            if winner.source_id != state.source_id:
+                logger.debug(f"[Arbiter] {state.source_id}: duplicate of {winner.source_id}'s utterance, skipped")
+                continue
+        audio_data = window.audio if state.endpointer is not None else window
+        texts, decode_seconds = await transcribe_audio(
+            model=model,
+            audio_data=audio_data,
+            language="en",
+            similarity_threshold=SIMILARITY_THRESHOLD,
+            recent_transcriptions=state.recent_transcriptions,
+            history_buffer=state.history_buffer,
+            history_max_chars=HISTORY_MAX_CHARS,
+            use_remote=use_remote_transcription,
+            remote_url=remote_transcribe_url,
+            sample_rate=config.SAMPLE_RATE,
+            source=state.source_id,
+            # Cascade escalations on an asleep room's small model go to the full model
+            fallback_model=model_tiers.full if tier == 'small' else None
+        )
+        if model_tiers is not None and not use_remote_transcription:
+            model_tiers.record(tier, audio_data.shape[0] / SAMPLE_RATE, decode_seconds)
+        transcriptions.extend(texts)
+    return transcriptions
+
+def get_source_id(source_url, location):
+    """Short, credential-free identifier for a source used in logs and metrics"""
+    if is_replay_url(source_url):
+        return f"{location}@replay:{os.path.basename(os.path.normpath(replay_path(source_url)))}"
+    if "192.168.1.200" in source_url:
+        return f"office-cam@192.168.1.200"
+    elif "192.168.1.43" in source_url:
+        return f"office-desktop@192.168.1.43"
+    elif "192.168.1.101" in source_url:
+        return f"kitchen@192.168.1.101"
+    elif "192.168.1.102" in source_url:
+        return f"living_room@192.168.1.102"
+    elif "192.168.1.103" in source_url:
+        return f"bedroom@192.168.1.103"
+    return f"{location}@{source_url.split('://')[1].split(':')[0]}"
 
 async def pause_media_players():
     """
@@ -215,8 +436,12 @@ async def process_buffer(transcription_model, use_remote_transcription, remote_t
     Periodically transcribes audio from audio_buffer and dispatches the text
     to process_user_text, with optional history-based context if awake.
     """
-    await asyncio.sleep(0.1)
-    global is_awake, wake_start_time, did_inference
+    global is_awake, wake_start_time, did_inference, mic_state
+    # Runs when the audio callback signals new blocks; the timeout keeps commands and sleep checks ticking
+    if mic_notifier is not None:
+        await mic_notifier.wait(timeout=config.IDLE_WAKEUP_INTERVAL)
+    else:
+        await asyncio.sleep(0.1)
 
     # Process any queued external commands first
     if not command_queue.empty():
@@ -227,6 +452,8 @@ async def process_buffer(transcription_model, use_remote_transcription, remote_t
         if result["woke_up"]:
             is_awake = True
             wake_start_time = time.time()
+            if model_tiers is not None:
+                model_tiers.wake()
             await pause_media_players()
             asyncio.create_task(play_wake_sound(WAKE_SOUND_FILE))
             context['session_data'] = {
@@ -247,43 +474,25 @@ async def process_buffer(transcription_model, use_remote_transcription, remote_t
                 wake_start_time = time.time()
         return
 
-    # Read small buffer to gauge silence
-    small_audio_data = np.array(list(small_audio_buffer), dtype=np.float32)
-    small_rms = calculate_rms(small_audio_data)
-    
-    # Debug logging for audio levels
-    if len(small_audio_buffer) > 0 and time.time() % 5 < 0.2:  # Log every ~5 seconds
-        logger.debug(f"Small buffer RMS: {small_rms}, threshold: {SILENCE_THRESHOLD}, small buffer size: {len(small_audio_buffer)}")
-
-    audio_data = np.array(list(audio_buffer), dtype=np.float32)
-    if len(audio_data) == 0:
+    if len(audio_buffer) == 0:
         return
 
-    rms = calculate_rms(audio_data)
+    # Energy stats are maintained by the buffer as chunks arrive: O(1) reads
+    small_rms = audio_buffer.recent_rms(SMALL_BUFFER_SIZE)
+    rms = audio_buffer.rms()
     
-    # Debug logging for main buffer
+    # Debug logging for audio levels
     if time.time() % 5 < 0.2:  # Log every ~5 seconds
+        threshold = mic_state.gate.threshold() if mic_state else None
+        logger.debug(f"Small buffer RMS: {small_rms}, gate threshold: {threshold}")
         logger.debug(f"Main buffer RMS: {rms}, main buffer size: {len(audio_buffer)}")
 
-    # --- Silence Check --- 
-    # Only transcribe if audio level is above the threshold
-    if rms < SILENCE_THRESHOLD:
-        return # Skip transcription if below silence threshold
-    
-    # --- Proceed with Transcription --- 
-    # Transcribe the current chunk
-    transcriptions, _ = await transcribe_audio(
-        model=transcription_model,
-        audio_data=audio_data,
-        language="en",
-        similarity_threshold=SIMILARITY_THRESHOLD,
-        recent_transcriptions=recent_transcriptions,
-        history_buffer=history_buffer,
-        history_max_chars=HISTORY_MAX_CHARS,
-        use_remote=use_remote_transcription,
-        remote_url=remote_transcribe_url,
-        sample_rate=config.SAMPLE_RATE
-    )
+    # --- Silence Check / Endpointing / Transcription --- 
+    # Only completed utterances (or, in window mode, audio above the threshold) are transcribed
+    if mic_state is None:
+        mic_state = SourceState("microphone", audio_buffer, recent_transcriptions=recent_transcriptions, history_buffer=history_buffer)
+        get_metrics().register_collector("gate.microphone", mic_state.gate.stats)
+    transcriptions = await transcribe_source(mic_state, transcription_model, use_remote_transcription, remote_transcribe_url)
 
     # Process each recognized utterance
     for text in transcriptions:
@@ -321,6 +530,8 @@ async def process_buffer(transcription_model, use_remote_transcription, remote_t
         if result["woke_up"] and not is_awake:
             is_awake = True # Set awake *now*
             wake_start_time = time.time()
+            if model_tiers is not None:
+                model_tiers.wake()
             await pause_media_players()
             asyncio.create_task(play_wake_sound(WAKE_SOUND_FILE))
             # Initialize session data on wake-up
@@ -382,101 +593,124 @@ async def process_buffer(transcription_model, use_remote_transcription, remote_t
                  logger.debug("[Wake] Timer reset due to non-command transcription while awake.")
 
     # Check if we should sleep
-    if is_awake and wake_start_time and (time.time() - wake_start_time) > WAKE_TIMEOUT:
-        logger.info(f"[Wake] System asleep after {WAKE_TIMEOUT} seconds of inactivity.")
-        if not did_inference:
-            asyncio.create_task(play_sleep_sound(SLEEP_SOUND_FILE))
-        if context['session_data']:
-            context['session_data']['end_time'] = datetime.now().isoformat()
-            context['session_data']['duration'] = time.time() - wake_start_time
-            # Save the entire buffer as final transcript
-            context['session_data']['complete_transcription'] = " ".join(history_buffer)
-            await generate_quality_control_report(context['session_data'], context)
-            context['session_data'] = None
-        is_awake = False
-        did_inference = False
+    await check_sleep(context)
+
+async def check_sleep(context):
+    """Put the system (and every room's model tier) back to sleep after WAKE_TIMEOUT seconds of inactivity"""
+    global is_awake, did_inference
+    if not (is_awake and wake_start_time and (time.time() - wake_start_time) > WAKE_TIMEOUT):
+        return
+    logger.info(f"[Wake] System asleep after {WAKE_TIMEOUT} seconds of inactivity.")
+    # Flip the shared state first: every source task runs this check and the report below awaits
+    is_awake = False
+    session_data, context['session_data'] = context.get('session_data'), None
+    if model_tiers is not None:
+        model_tiers.sleep()
+    if not did_inference:
+        room = session_data.get('source_location') if session_data else None
+        ssh_target = session_data.get('actuator_target') if session_data else None
+        asyncio.create_task(play_sleep_sound(SLEEP_SOUND_FILE, room=room, ssh_target=ssh_target))
+    did_inference = False
+    if session_data:
+        session_data['end_time'] = datetime.now().isoformat()
+        session_data['duration'] = time.time() - wake_start_time
+        # Save the entire buffer as final transcript
+        session_data['complete_transcription'] = " ".join(history_buffer)
+        await generate_quality_control_report(session_data, context)
 
 async def process_rtsp_source(source_id, source_url, location, transcription_model, use_remote_transcription, remote_transcribe_url, context):
     """Process a single RTSP source with independent transcription and location-aware actuators"""
     global is_awake, wake_start_time, did_inference
     
     # Create source-specific buffers
-    source_buffer = deque(maxlen=int(SAMPLE_RATE * BUFFER_DURATION))
-    source_small_buffer = deque(maxlen=int(SAMPLE_RATE * SMALL_BUFFER_DURATION))
-    source_queue = queue.Queue()
-    source_recent_transcriptions = deque(maxlen=10)
-    source_history_buffer = deque(maxlen=HISTORY_BUFFER_SIZE)
+    source_buffer = AudioRingBuffer(int(SAMPLE_RATE * BUFFER_DURATION), dtype=SAMPLE_FORMAT.dtype, block_size=ENERGY_BLOCK_SIZE, history_blocks=NOISE_FLOOR_BLOCKS)
+    get_metrics().register_collector(f"audio.{source_id}", source_buffer.energy_stats)
+    source_state = SourceState(source_id, source_buffer, location=location)
+    get_metrics().register_collector(f"gate.{source_id}", source_state.gate.stats)
+    if arbiter is not None:
+        arbiter.register(source_id)
+    
+    # Optionally record live audio so it can be replayed offline later
+    recorder = None
+    if config.RECORD_DIR and not is_replay_url(source_url):
+        recorder = AudioRecorder(config.RECORD_DIR, source_id, SAMPLE_RATE, SAMPLE_FORMAT.name, config.RECORD_SEGMENT_SECONDS)
+        recorder.start()
+    
+    # Capture threads wake this task when audio arrives instead of it polling
+    notifier = ArrivalNotifier(source_id)
     
     def source_callback(indata, frames, time_info, status):
         """Audio callback for this specific source"""
-        audio_callback(indata, frames, time_info, status, source_queue, source_buffer, source_small_buffer)
+        audio_callback(indata, frames, time_info, status, recorder.queue if recorder else None, source_buffer)
+        notifier.notify()
     
     logger.info(f"🎙️ {source_id} processing started")
     
-    # Main processing loop with stream reconnection handling
+    # Main processing loop; reconnect pacing and audio-less parking come from the shared health manager
     stream = None
-    stream_reconnect_interval = config.RTSP_RECONNECT_INTERVAL
-    last_stream_creation = 0
-    stream_creation_failures = 0
+    health = get_source_health()
+    loop = asyncio.get_running_loop()
     
     try:
         while True:
             # Create or recreate RTSP stream if needed
             if stream is None:
-                current_time = time.time()
-                
-                # Check if we should wait before attempting reconnection
-                if stream_creation_failures > 0 and (current_time - last_stream_creation) < stream_reconnect_interval:
-                    await asyncio.sleep(1)
-                    continue
+                if not is_replay_url(source_url):
+                    # Parked (no audio track) and failing sources wait out their backoff here
+                    wait = health.delay(source_url)
+                    if wait > 0:
+                        await asyncio.sleep(min(wait, 60))
+                        continue
+                    # Probed once and cached: has audio, codec and rate. HTTP WAV sources describe
+                    # themselves (and a single-client ffmpeg server would exit after a probe)
+                    if not (config.NATIVE_PCM_INGEST and native_scheme(source_url) == 'http'):
+                        info = await loop.run_in_executor(None, health.probe, source_url)
+                        if not info.reachable or not info.has_audio:
+                            continue
                 
                 try:
                     logger.info(f"Creating RTSP stream for {source_id}: {source_url}")
                     stream = create_rtsp_audio_stream(source_callback, rtsp_url=source_url)
-                    stream_creation_failures = 0
-                    last_stream_creation = current_time
+                    if hasattr(stream, 'audio_queue'):
+                        # Threaded capture hands chunks over a bounded queue; expose its depth/drops/lag
+                        get_metrics().register_collector(f"queue.{source_id}", stream.audio_queue.stats)
                     logger.info(f"✅ RTSP stream created successfully for {source_id}")
                 except Exception as e:
-                    stream_creation_failures += 1
-                    last_stream_creation = current_time
-                    logger.error(f"Failed to create stream for {source_id} (attempt #{stream_creation_failures}): {e}")
+                    delay = health.record_failure(source_url, str(e))
+                    logger.error(f"Failed to create stream for {source_id}: {e}. Retrying in {delay:.0f}s")
                     stream = None
-                    await asyncio.sleep(1)
                     continue
-            await asyncio.sleep(0.1)
+            # Wait for the capture thread to deliver audio (a fast replay with a backlog does not wait);
+            # the timeout still lets stream health be checked while a source is silent
+            if not getattr(stream, 'backlogged', False):
+                await notifier.wait(timeout=config.IDLE_WAKEUP_INTERVAL)
+            else:
+                await asyncio.sleep(0)
+            
+            # A finished replay is drained once more and then ends this source
+            replay_finished = getattr(stream, 'finished', False)
             
             # Check if stream is still running
-            if stream and hasattr(stream, 'is_running') and not stream.is_running:
+            if stream and hasattr(stream, 'is_running') and not stream.is_running and not replay_finished:
                 logger.warning(f"Stream for {source_id} is no longer running, will recreate")
                 if hasattr(stream, 'stop'):
                     stream.stop()
                 stream = None
                 continue
             
-            # Check if we have audio data
-            if len(source_buffer) == 0:
-                continue
-                
-            audio_data = np.array(list(source_buffer), dtype=np.float32)
-            rms = calculate_rms(audio_data)
-            
-            if rms < SILENCE_THRESHOLD:
+            # Endpoint new audio (or gate the window on the buffer's O(1) running RMS) and transcribe it
+            # A finished replay flushes its last utterance, which may not be followed by a full hangover of silence
+            transcriptions = await transcribe_source(source_state, transcription_model, use_remote_transcription, remote_transcribe_url, final=replay_finished)
+            if hasattr(stream, 'acknowledge'):
+                stream.acknowledge(source_state.cursor if source_state.endpointer is not None else source_buffer.total_written)
+            # Sources can be the only input, so they run the inactivity timeout too
+            await check_sleep(context)
+            if replay_finished and not transcriptions:
+                logger.info(f"Replay for {source_id} complete")
+                break
+            if not transcriptions:
                 continue
             
-            # Transcribe audio from this specific source
-            transcriptions, _ = await transcribe_audio(
-                model=transcription_model,
-                audio_data=audio_data,
-                language="en",
-                similarity_threshold=SIMILARITY_THRESHOLD,
-                recent_transcriptions=source_recent_transcriptions,
-                history_buffer=source_history_buffer,
-                history_max_chars=HISTORY_MAX_CHARS,
-                use_remote=use_remote_transcription,
-                remote_url=remote_transcribe_url,
-                sample_rate=config.SAMPLE_RATE
-            )
-            
             # Process transcriptions from this specific source
             for text in transcriptions:
                 logger.info(f"[{source_id}] {get_timestamp()} {text}")
@@ -497,6 +731,9 @@ async def process_rtsp_source(source_id, source_url, location, transcription_mod
                 if result["woke_up"] and not is_awake:
                     is_awake = True
                     wake_start_time = time.time()
+                    # Wake state is global (any room's commands are handled), so every room gets the full model
+                    if model_tiers is not None:
+                        model_tiers.wake()
                     
                     # Get location-specific actuator for wake actions
                     room_manager = context["ROOM_MANAGER"]
@@ -511,7 +748,8 @@ async def process_rtsp_source(source_id, source_url, location, transcription_mod
                         config.SSH_HOST_TARGET = ssh_target
                     
                     await pause_media_players()
-                    asyncio.create_task(play_wake_sound(WAKE_SOUND_FILE))
+                    # The cue task runs after the target is restored, so pass it explicitly
+                    asyncio.create_task(play_wake_sound(WAKE_SOUND_FILE, room=location, ssh_target=ssh_target or original_ssh_target))
                     
                     # Restore original SSH target
                     config.SSH_HOST_TARGET = original_ssh_target
@@ -572,9 +810,35 @@ async def process_rtsp_source(source_id, source_url, location, transcription_mod
         # Clean up this source's stream
         if stream and hasattr(stream, 'stop'):
             stream.stop()
+        if recorder:
+            recorder.stop()
+        get_metrics().unregister_collector(f"audio.{source_id}")
+        get_metrics().unregister_collector(f"gate.{source_id}")
+        get_metrics().unregister_collector(f"queue.{source_id}")
+        if arbiter is not None:
+            arbiter.unregister(source_id)
         logger.info(f"🛑 {source_id} processing stopped")
 
+async def prepare_cues(room_manager):
+    """Decode the cue files once and open the outputs they play on, so the first cue is as quick as the rest"""
+    player = get_cue_player()
+    for name, path in (('wake', WAKE_SOUND_FILE), ('sleep', SLEEP_SOUND_FILE)):
+        try:
+            player.load(name, path)
+        except Exception as e:
+            logger.warning(f"Could not cache {name} cue {path}: {e}")
+    if not config.SSH_HOST_TARGET:
+        try:
+            player.local.start()
+        except Exception as e:
+            logger.warning(f"Could not open the cue output stream: {e}")
+    targets = {actuator.get("ssh_target") for actuator in room_manager.get_all_actuators().values()}
+    targets.add(config.SSH_HOST_TARGET)
+    for target in filter(None, targets):
+        asyncio.create_task(player.connect(target))
+
 async def main():
+    global arbiter, mic_notifier, model_tiers
     # Debug the SSH target value as read from config
     logger.info(f"*** STARTUP INFO: SSH_HOST_TARGET = '{config.SSH_HOST_TARGET}' ***")
     
@@ -582,9 +846,11 @@ async def main():
     devices = sd.query_devices()
     input_device = None  # Changed from empty string to None
 
-    # Skip device detection if using RTSP
+    # Skip device detection if using RTSP or replaying recordings
     if config.AUDIO_SOURCE.lower() == 'rtsp':
         logger.info(f"Using RTSP audio source: {config.RTSP_URL}")
+    elif config.AUDIO_SOURCE.lower() == 'replay':
+        logger.info(f"Replaying recorded audio: {', '.join(config.REPLAY_PATHS)}")
     else:
         # Try to find the specified input device
         if args.source:
@@ -624,7 +890,7 @@ async def main():
                 for test_id in [13, 14, 0, "default"]:
                     try:
                         logger.info(f"Testing audio device {test_id}")
-                        with sd.InputStream(device=test_id, channels=1, samplerate=SAMPLE_RATE, blocksize=CHUNK_SIZE, dtype="float32"):
+                        with sd.InputStream(device=test_id, channels=1, samplerate=SAMPLE_RATE, blocksize=CHUNK_SIZE, dtype=str(SAMPLE_FORMAT.dtype)):
                             logger.info(f"Found working audio device: {test_id}")
                             input_device = test_id
                             break
@@ -637,14 +903,14 @@ async def main():
                         try:
                             if device.get("max_input_channels", 0) > 0:
                                 logger.info(f"Trying device {i}: {device.get('name', 'Unknown')} with {device.get('max_input_channels')} input channels")
-                                with sd.InputStream(device=i, channels=1, samplerate=SAMPLE_RATE, blocksize=CHUNK_SIZE, dtype="float32"):
+                                with sd.InputStream(device=i, channels=1, samplerate=SAMPLE_RATE, blocksize=CHUNK_SIZE, dtype=str(SAMPLE_FORMAT.dtype)):
                                     logger.info(f"Found working audio device: {i}")
                                     input_device = i
                                     break
                         except Exception as e:
                             logger.warning(f"Device {i} failed: {e}")
         
-        if input_device is None and config.AUDIO_SOURCE.lower() != 'rtsp':
+        if input_device is None and config.AUDIO_SOURCE.lower() not in ('rtsp', 'replay'):
             logger.error("No suitable audio device found. Exiting.")
             return
 
@@ -654,8 +920,16 @@ async def main():
     transcription_model = (
         None
         if use_remote_transcription
-        else init_transcription_model(args.whisper_model, DEVICE_TYPE, COMPUTE_TYPE)
+        else init_transcription_model(args.whisper_model, DEVICE_TYPE, COMPUTE_TYPE, num_workers=config.TRANSCRIBE_WORKERS)
     )
+    if transcription_model is not None:
+        asleep_model = None
+        if args.asleep_model and args.asleep_model != args.whisper_model:
+            logger.info(f"Asleep rooms transcribe with '{args.asleep_model}', awake rooms with '{args.whisper_model}'")
+            asleep_model = init_transcription_model(args.asleep_model, DEVICE_TYPE, COMPUTE_TYPE, num_workers=config.TRANSCRIBE_WORKERS)
+        model_tiers = ModelTiers(transcription_model, asleep_model)
+        get_metrics().register_collector("asr_tiers", model_tiers.stats)
+    get_keyword_spotter()  # Loads the templates up front (WAKE_ENGINE=kws)
 
     # Get room manager first
     room_manager = get_room_manager()
@@ -663,30 +937,24 @@ async def main():
     # Get ALL available RTSP sources for multi-source monitoring
     all_rtsp_sources = []
     if config.AUDIO_SOURCE.lower() == 'rtsp':
-        source_mappings = room_manager.config.get("source_mappings", {})
-        for source_url, location in source_mappings.items():
-            if source_url.startswith("rtsp://"):
-                all_rtsp_sources.append({"url": source_url, "location": location})
+        # RTSP and HTTP(S) streams; HTTP WAV is read natively with NATIVE_PCM_INGEST, otherwise through ffmpeg
+        all_rtsp_sources = room_manager.get_stream_sources()
         
-        logger.info(f"🎯 Multi-source monitoring enabled: {len(all_rtsp_sources)} RTSP sources")
+        logger.info(f"🎯 Multi-source monitoring enabled: {len(all_rtsp_sources)} stream sources")
         for source in all_rtsp_sources:
-            if "192.168.1.200" in source["url"]:
-                source_id = f"office-cam@192.168.1.200"
-            elif "192.168.1.43" in source["url"]:
-                source_id = f"office-desktop@192.168.1.43"
-            elif "192.168.1.101" in source["url"]:
-                source_id = f"kitchen@192.168.1.101"
-            elif "192.168.1.102" in source["url"]:
-                source_id = f"living_room@192.168.1.102"
-            elif "192.168.1.103" in source["url"]:
-                source_id = f"bedroom@192.168.1.103"
-            else:
-                source_id = f"{source['location']}@{source['url'].split('://')[1].split(':')[0]}"
+            source_id = get_source_id(source["url"], source["location"])
             logger.info(f"   📡 {source_id}: {source['url']} → {source['location']}")
         
         # Use first source for primary context (backwards compatibility)
         current_source = all_rtsp_sources[0]["url"]
         detected_location = all_rtsp_sources[0]["location"]
+    elif config.AUDIO_SOURCE.lower() == 'replay':
+        # Each recording (or directory of recordings) replays as its own source
+        for path in config.REPLAY_PATHS:
+            all_rtsp_sources.append({"url": f"file://{path}", "location": room_manager.get_location_from_source(path)})
+        logger.info(f"🎯 Replay: {len(all_rtsp_sources)} recorded sources")
+        current_source = all_rtsp_sources[0]["url"]
+        detected_location = all_rtsp_sources[0]["location"]
     else:
         # For microphone input (single source)
         current_source = args.source or input_device
@@ -718,12 +986,26 @@ async def main():
 
     os.makedirs(context['QC_REPORT_DIR'], exist_ok=True)
     runner = await start_webserver(context)
+    if config.CUE_PLAYBACK == 'cached':
+        await prepare_cues(room_manager)
 
+    audio_stream = None  # Only the microphone path opens one
     try:
         # Choose audio source based on configuration
-        if config.AUDIO_SOURCE.lower() == 'rtsp' and all_rtsp_sources:
+        if config.AUDIO_SOURCE.lower() in ('rtsp', 'replay') and all_rtsp_sources:
             logger.info(f"🎙️ Starting multi-source RTSP monitoring for {len(all_rtsp_sources)} sources...")
             
+            # Overlapping mics arbitrate endpointed utterances so each is transcribed once
+            if config.ARBITRATION_ENABLED and TRANSCRIBE_MODE == 'utterance' and len(all_rtsp_sources) > 1:
+                arbiter = Arbiter(
+                    window=config.ARBITRATION_WINDOW,
+                    max_offset=config.ARBITRATION_MAX_OFFSET,
+                    min_correlation=config.ARBITRATION_MIN_CORRELATION,
+                )
+                logger.info(f"Cross-microphone arbitration enabled for {len(all_rtsp_sources)} sources")
+            
+            get_metrics().register_collector("sources", get_source_health().stats)
+            
             # Create per-source processing tasks
             source_tasks = []
             for source in all_rtsp_sources:
@@ -731,18 +1013,7 @@ async def main():
                 location = source["location"]
                 
                 # Extract identifier for logging
-                if "192.168.1.200" in source_url:
-                    source_id = f"office-cam@192.168.1.200"
-                elif "192.168.1.43" in source_url:
-                    source_id = f"office-desktop@192.168.1.43"
-                elif "192.168.1.101" in source_url:
-                    source_id = f"kitchen@192.168.1.101"
-                elif "192.168.1.102" in source_url:
-                    source_id = f"living_room@192.168.1.102"
-                elif "192.168.1.103" in source_url:
-                    source_id = f"bedroom@192.168.1.103"
-                else:
-                    source_id = f"{location}@{source_url.split('://')[1].split(':')[0]}"
+                source_id = get_source_id(source_url, location)
                 
                 logger.info(f"   📡 Starting {source_id}")
                 
@@ -779,15 +1050,19 @@ async def main():
         else:
             # Use traditional microphone input with sounddevice
             logger.info(f"Using microphone audio input device: {input_device}")
+            mic_notifier = ArrivalNotifier("microphone")
+            
+            def mic_callback(indata, frames, time_info, status):
+                audio_callback(indata, frames, time_info, status, None, audio_buffer)
+                mic_notifier.notify()
+            
             audio_stream = sd.InputStream(
-                callback=lambda indata, frames, time_info, status: audio_callback(
-                    indata, frames, time_info, status, audio_queue, audio_buffer, small_audio_buffer
-                ),
+                callback=mic_callback,
                 channels=CHANNELS,
                 samplerate=SAMPLE_RATE,
                 blocksize=CHUNK_SIZE,
                 device=input_device,
-                dtype="float32",
+                dtype=str(SAMPLE_FORMAT.dtype),
             )
             audio_stream.start()
             
@@ -811,6 +1086,14 @@ async def main():
                 audio_stream.stop()
             elif hasattr(audio_stream, 'close'):
                 audio_stream.close()
+        # Source tasks stopped their streams; the shared capture backends (ffmpeg processes, shared memory) go last
+        stop_capture_backends()
+                
+        if config.CUE_PLAYBACK == 'cached':
+            get_cue_player().stop()
+        get_transcription_executor().shutdown()
+        if use_remote_transcription:
+            await get_remote_transcription_client(REMOTE_TRANSCRIBE_URL).close()
                 
         # Clean up web server
         await runner.cleanup()
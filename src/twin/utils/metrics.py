@@ -0,0 +1,87 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger("twin")
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics: counters, gauges, timing summaries and
+    collectors (callables polled only when a snapshot is taken, so hot paths
+    never pay for stats nobody reads).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+        self._collectors = {}
+        self.started_at = time.time()
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        """Record one sample of a duration or size (count/sum/max/last)"""
+        with self._lock:
+            stat = self._timings.get(name)
+            if stat is None:
+                stat = self._timings[name] = {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0}
+            stat["count"] += 1
+            stat["sum"] += value
+            stat["max"] = max(stat["max"], value)
+            stat["last"] = value
+
+    def register_collector(self, name, collector):
+        """Register (or replace) a callable returning a dict of current values"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def unregister_collector(self, name):
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def get_counter(self, name):
+        return self._counters.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {
+                name: dict(stat, mean=stat["sum"] / stat["count"] if stat["count"] else 0.0)
+                for name, stat in self._timings.items()
+            }
+            collectors = dict(self._collectors)
+
+        collected = {}
+        for name, collector in collectors.items():
+            try:
+                collected[name] = collector()
+            except Exception as e:
+                logger.debug(f"Metrics collector {name} failed: {e}")
+        return {
+            "uptime": time.time() - self.started_at,
+            "counters": counters,
+            "gauges": gauges,
+            "timings": timings,
+            "collectors": collected,
+        }
+
+
+metrics = None
+
+
+def get_metrics():
+    """Get singleton metrics registry"""
+    global metrics
+    if metrics is None:
+        metrics = MetricsRegistry()
+    return metrics
@@ -4,6 +4,7 @@ from aiohttp import web
 import logging
 import socket
 from ..ai.generator import process_user_text
+from ..utils.metrics import get_metrics
 
 logger = logging.getLogger('twin')
 
@@ -22,6 +23,9 @@ async def handle_command(request):
     else:
         return web.Response(text='No text provided', status=400)
 
+async def handle_metrics(request):
+    return web.json_response(get_metrics().snapshot())
+
 def is_port_available(port):
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         return s.connect_ex(('0.0.0.0', port)) != 0
@@ -30,6 +34,7 @@ async def start_webserver(context):
     app = web.Application()
     app['context'] = context
     app.router.add_post('/command', handle_command)
+    app.router.add_get('/metrics', handle_metrics)
     runner = web.AppRunner(app)
     await runner.setup()
 
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the RTSP capture chunk path.
+
+Feeds synthetic pcm_f32le through a subprocess pipe (standing in for ffmpeg)
+and reports samples processed per CPU-second of this process, for the legacy
+per-sample deque path and for the current RTSPAudioCapture implementation.
+
+    python tests/bench_rtsp_capture.py --seconds 120 --sample-rate 16000
+"""
+import argparse
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.rtsp_audio import RTSPAudioCapture
+from twin.audio.ring_buffer import AudioRingBuffer
+
+
+def generator_command(total_samples):
+    """A child process that writes `total_samples` float32 samples to stdout as fast as possible"""
+    script = (
+        "import sys\n"
+        f"remaining = {total_samples * 4}\n"
+        "block = bytes(65536)\n"
+        "out = sys.stdout.buffer\n"
+        "while remaining > 0:\n"
+        "    n = min(remaining, len(block))\n"
+        "    out.write(block[:n])\n"
+        "    remaining -= n\n"
+        "out.flush()\n"
+    )
+    return [sys.executable, '-c', script]
+
+
+def bench_legacy(total_samples, chunk_size, buffer_size):
+    """The original path: read() -> frombuffer -> queue -> per-sample append -> list rebuild"""
+    buffer = deque(maxlen=buffer_size)
+    audio_queue = queue.Queue()
+    processed = 0
+
+    def callback_processor():
+        nonlocal processed
+        while True:
+            audio_array = audio_queue.get()
+            if audio_array is None:
+                return
+            for sample in audio_array:
+                buffer.append(sample)
+            indata = np.array(list(buffer)[-chunk_size:]).reshape(-1, 1)
+            processed += indata.shape[0]
+
+    worker = threading.Thread(target=callback_processor, daemon=True)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    worker.start()
+    proc = subprocess.Popen(generator_command(total_samples), stdout=subprocess.PIPE, bufsize=chunk_size * 4)
+    while True:
+        audio_chunk = proc.stdout.read(chunk_size * 4)
+        if not audio_chunk:
+            break
+        audio_queue.put(np.frombuffer(audio_chunk, dtype=np.float32))
+    audio_queue.put(None)
+    worker.join()
+    proc.wait()
+    return processed, time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+
+class _BenchCapture(RTSPAudioCapture):
+    def __init__(self, total_samples, **kwargs):
+        super().__init__(rtsp_url='bench://synthetic', **kwargs)
+        self._total_samples = total_samples
+
+    def _build_ffmpeg_command(self):
+        return generator_command(self._total_samples)
+
+
+def bench_current(total_samples, chunk_size, buffer_size):
+    """The current RTSPAudioCapture: readinto preallocated slots, views to a callback that fills the ring buffer"""
+    done = threading.Event()
+    processed = 0
+    buffer = AudioRingBuffer(buffer_size)
+
+    def callback(indata, frames, time_info, status):
+        nonlocal processed
+        buffer.write(indata[:, 0])
+        processed += frames
+        if processed >= total_samples:
+            done.set()
+
+    capture = _BenchCapture(total_samples, chunk_size=chunk_size, reconnect_interval=3600, queue_policy='block')
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    capture.start(callback)
+    done.wait(timeout=600)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    capture.stop()
+    return processed, cpu, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RTSP capture chunk-path throughput benchmark")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of audio to push through each path")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--buffer-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    total_samples = int(args.seconds * args.sample_rate)
+    buffer_size = int(args.buffer_seconds * args.sample_rate)
+
+    print(f"Pushing {total_samples} samples ({args.seconds:.0f}s @ {args.sample_rate} Hz), chunk={args.chunk_size}")
+    for name, bench in (("legacy", bench_legacy), ("current", bench_current)):
+        processed, cpu, wall = bench(total_samples, args.chunk_size, buffer_size)
+        per_core = processed / cpu if cpu > 0 else float('inf')
+        realtime = processed / args.sample_rate / cpu if cpu > 0 else float('inf')
+        print(f"{name:>8}: {processed} samples, cpu={cpu:.3f}s wall={wall:.3f}s "
+              f"-> {per_core:,.0f} samples/s per core ({realtime:,.0f}x real-time)")
+
+
+if __name__ == "__main__":
+    main()
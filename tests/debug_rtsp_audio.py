@@ -1,16 +1,22 @@
 import numpy as np
 import os
+import sys
 import time
 import logging
 import subprocess
 import json
 import asyncio
 from collections import deque
-import config
 import argparse
 import soundfile as sf
-import rtsp_audio
-from audio import audio_callback as orig_audio_callback
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.core import config
+from twin.audio import rtsp_audio
+from twin.audio.audio import audio_callback as orig_audio_callback
+from twin.audio.queues import BoundedQueue
+from twin.audio.ring_buffer import AudioRingBuffer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] [%(levelname)s] [%(filename)s] %(message)s")
@@ -30,7 +36,9 @@ class DebugAudioCapture:
         self.rtsp_url = config.RTSP_URL
         self.latency_flags = config.RTSP_LATENCY_FLAGS
         self.raw_buffer = deque(maxlen=int(self.sample_rate * self.duration))
-        self.processed_buffer = deque(maxlen=int(self.sample_rate * self.duration))
+        # What the pipeline's callback produces: chunks on a bounded queue and samples in the ring
+        self.processed_queue = BoundedQueue(1000)
+        self.processed_buffer = AudioRingBuffer(int(self.sample_rate * self.duration))
         self.last_save_time = 0
         
     def debug_audio_callback(self, indata, frames, time_info, status):
@@ -43,18 +51,9 @@ class DebugAudioCapture:
         for sample in flattened:
             self.raw_buffer.append(sample)
             
-        # Call original callback with a mock audio queue and buffers
-        mock_audio_queue = deque(maxlen=1000)
-        mock_audio_buffer = deque(maxlen=int(self.sample_rate * 3))
-        mock_small_buffer = deque(maxlen=int(self.sample_rate * 0.2))
+        # Call the pipeline's callback with a queue and ring buffer of our own
+        orig_audio_callback(indata, frames, time_info, status, self.processed_queue, self.processed_buffer)
         
-        orig_audio_callback(indata, frames, time_info, status, 
-                           mock_audio_queue, mock_audio_buffer, mock_small_buffer)
-        
-        # Save the processed data
-        for item in mock_audio_buffer:
-            self.processed_buffer.append(item)
-            
         # Periodically save snapshots
         current_time = time.time()
         if current_time - self.last_save_time >= self.interval:
@@ -77,8 +76,8 @@ class DebugAudioCapture:
             logger.info(f"Raw audio stats: min={np.min(raw_data):.4f}, max={np.max(raw_data):.4f}, mean={np.mean(raw_data):.4f}, rms={rms:.6f}")
         
         # Save processed audio
-        if self.processed_buffer:
-            proc_data = np.array(list(self.processed_buffer), dtype=np.float32)
+        if len(self.processed_buffer):
+            proc_data = self.processed_buffer.latest()
             proc_file = f"debug_audio/processed_{timestamp}.wav"
             sf.write(proc_file, proc_data, self.sample_rate)
             logger.info(f"Saved processed audio: {proc_file}")
@@ -183,7 +182,7 @@ async def main():
             "latency_flags": str(debug_capture.latency_flags),
             "buffer_duration": config.BUFFER_DURATION,
             "small_buffer_duration": config.SMALL_BUFFER_DURATION,
-            "silence_threshold": config.SILENCE_THRESHOLD,
+            "noise_gate_snr_db": config.NOISE_GATE_SNR_DB,
         }
         
         with open("debug_audio/summary.json", "w") as f:
@@ -0,0 +1,67 @@
+import os
+import sys
+import asyncio
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.arbitration import Arbiter, energy_envelope, envelope_correlation
+from twin.audio.vad import SpeechSegment
+
+SR = 16000
+
+
+def speech(seconds, seed, gain=1.0, noise=0.002, delay=0.0, words=1):
+    """Randomly placed syllable bursts (pattern chosen by ``words``) over a source-specific noise bed"""
+    pattern = np.random.default_rng(words)
+    t = np.arange(int(SR * seconds)) / SR
+    envelope = np.zeros_like(t)
+    for start in np.sort(pattern.uniform(0, seconds - 0.3, 6)):
+        length = pattern.uniform(0.08, 0.25)
+        mask = (t >= start + delay) & (t < start + delay + length)
+        envelope[mask] = np.sin(np.pi * (t[mask] - start - delay) / length)
+    voice = gain * 0.1 * envelope * np.sin(2 * np.pi * 180 * t)
+    noise_bed = np.random.default_rng(seed).normal(0, noise, t.shape[0])
+    return (voice + noise_bed).astype(np.float32)
+
+
+def segment(audio, start_time):
+    return SpeechSegment(audio, 0, audio.shape[0], SR, start_time, start_time + audio.shape[0] / SR)
+
+
+def test_envelope_correlation_finds_latency_offset():
+    near = energy_envelope(speech(2, seed=1), SR)
+    far = energy_envelope(speech(2, seed=2, gain=0.3, delay=0.2), SR)
+    corr, lag = envelope_correlation(near, 100.0, far, 100.0, max_lag=0.5)
+    assert corr > 0.8
+    assert abs(lag - 0.2) < 0.03
+
+
+def test_best_snr_copy_wins_and_duplicates_are_suppressed():
+    async def scenario():
+        arbiter = Arbiter(window=0.05, max_offset=0.5)
+        for source in ("desk-mic", "office-cam", "kitchen"):
+            arbiter.register(source)
+        desk = arbiter.candidate("desk-mic", "office", segment(speech(2, seed=1), 100.0), 0.002)
+        cam = arbiter.candidate("office-cam", "office", segment(speech(2, seed=2, gain=0.2, delay=0.15), 100.1), 0.002)
+        # Unrelated speech in another room at the same time must not be merged
+        other = arbiter.candidate("kitchen", "kitchen", segment(speech(2, seed=3, words=7), 100.0), 0.002)
+        return await asyncio.gather(arbiter.submit(desk), arbiter.submit(cam), arbiter.submit(other))
+
+    desk_result, cam_result, kitchen_result = asyncio.run(scenario())
+    assert desk_result.source_id == "desk-mic"
+    assert cam_result.source_id == "desk-mic"
+    assert kitchen_result.source_id == "kitchen"
+
+
+def test_non_overlapping_utterances_are_not_grouped():
+    async def scenario():
+        arbiter = Arbiter(window=0.05)
+        first = arbiter.candidate("a", "office", segment(speech(1, seed=1), 100.0), 0.002)
+        later = arbiter.candidate("b", "office", segment(speech(1, seed=1), 105.0), 0.002)
+        return await asyncio.gather(arbiter.submit(first), arbiter.submit(later))
+
+    first, later = asyncio.run(scenario())
+    assert first.source_id == "a"
+    assert later.source_id == "b"
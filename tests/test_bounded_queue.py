@@ -0,0 +1,101 @@
+import os
+import sys
+import queue
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.queues import BoundedQueue
+from twin.audio.rtsp_audio import RTSPAudioCapture
+
+
+def test_drop_oldest_keeps_freshest_items():
+    q = BoundedQueue(3, policy='drop-oldest')
+    evicted = [q.put(i)[1] for i in range(5)]
+    assert evicted == [None, None, None, 0, 1]
+    assert q.drain() == [2, 3, 4]
+    stats = q.stats()
+    assert stats["drops"] == 2
+    assert stats["high_water"] == 3
+    assert stats["depth"] == 0
+
+
+def test_drop_newest_rejects_incoming():
+    q = BoundedQueue(2, policy='drop-newest')
+    assert q.put('a') == (True, None)
+    assert q.put('b') == (True, None)
+    assert q.put('c') == (False, 'c')
+    assert [q.get_nowait(), q.get_nowait()] == ['a', 'b']
+    with pytest.raises(queue.Empty):
+        q.get_nowait()
+    assert q.stats()["drops"] == 1
+
+
+def test_block_policy_applies_backpressure_and_tracks_lag():
+    q = BoundedQueue(1, policy='block')
+    q.put('first')
+    assert q.put('late', timeout=0.01) == (False, 'late')
+    assert q.stats()["drops"] == 0
+
+    def consumer():
+        time.sleep(0.05)
+        q.get()
+
+    worker = threading.Thread(target=consumer)
+    worker.start()
+    assert q.put('second', timeout=2) == (True, None)
+    worker.join()
+    assert q.get() == 'second'
+    stats = q.stats()
+    assert stats["gets"] == 2
+    assert stats["lag_max"] >= 0.04
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        BoundedQueue(4, policy='drop-random')
+
+
+class _RampCapture(RTSPAudioCapture):
+    """Capture fed by a child process writing an int16 ramp instead of ffmpeg"""
+
+    def _build_ffmpeg_command(self):
+        script = (
+            "import sys, numpy as np\n"
+            "out = sys.stdout.buffer\n"
+            "for i in range(200):\n"
+            "    out.write((np.arange(i * 256, (i + 1) * 256) % 32768).astype('<i2').tobytes())\n"
+            "out.flush()\n"
+        )
+        return [sys.executable, '-c', script]
+
+
+def test_capture_drop_oldest_never_corrupts_slots():
+    chunks = []
+    done = threading.Event()
+
+    def slow_callback(indata, frames, time_info, status):
+        snapshot = indata[:, 0].copy()
+        time.sleep(0.002)  # Slower than the producer, so the queue overflows
+        # The slot must not have been overwritten while we held it
+        assert np.array_equal(indata[:, 0], snapshot)
+        chunks.append(snapshot)
+        if snapshot[-1] == (200 * 256 - 1) % 32768:
+            done.set()
+
+    capture = _RampCapture('test://ramp', sample_rate=16000, chunk_size=256,
+                           reconnect_interval=3600, pool_size=6, sample_format='s16', queue_policy='drop-oldest')
+    capture.start(slow_callback)
+    done.wait(timeout=10)
+    capture.stop()
+
+    assert chunks and done.is_set()
+    for chunk in chunks:
+        assert np.array_equal(np.diff(chunk.astype(np.int32)) % 32768, np.ones(255))
+    stats = capture.audio_queue.stats()
+    assert stats["drops"] > 0
+    assert stats["high_water"] <= 4
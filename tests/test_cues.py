@@ -0,0 +1,62 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio import cues
+from twin.audio.cues import Cue, CuePlayer, LocalCuePlayer, RemoteShell
+
+
+def test_cue_is_decoded_and_resampled_once(tmp_path):
+    path = str(tmp_path / "wake.wav")
+    sf.write(path, 0.5 * np.sin(np.linspace(0, 200, 8000)), 16000, subtype='PCM_16')
+    cue = Cue("wake", path, 48000)
+    assert cue.audio.dtype == np.float32 and cue.audio.shape == (24000,)
+    assert abs(cue.duration - 0.5) < 1e-3
+    assert cue.wav_bytes[:4] == b'RIFF'
+
+
+def test_local_player_mixes_cues_into_persistent_stream():
+    async def run():
+        loop = asyncio.get_running_loop()
+        player = LocalCuePlayer(sample_rate=16000, blocksize=4)
+        started, finished = player.play(np.full(6, 0.25, dtype=np.float32), loop)
+        blocks = []
+        for _ in range(3):
+            out = np.ones((4, 1), dtype=np.float32)
+            player._callback(out, 4, SimpleNamespace(currentTime=1.0, outputBufferDacTime=1.02), None)
+            blocks.append(out[:, 0].copy())
+        latency = await asyncio.wait_for(started, 1)
+        await asyncio.wait_for(finished, 1)
+        return blocks, latency
+
+    blocks, latency = asyncio.run(run())
+    assert np.concatenate(blocks).tolist() == [0.25] * 6 + [0.0] * 6  # silence between cues, never stale data
+    assert 0.02 <= latency < 0.5  # includes the stream's output latency
+
+
+def test_remote_channel_uploads_once_and_reuses_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(cues, "REMOTE_CUE_DIR", str(tmp_path / "remote"))
+    path = str(tmp_path / "sleep.wav")
+    sf.write(path, np.zeros(1600), 16000, subtype='PCM_16')
+
+    async def run():
+        player = CuePlayer(sample_rate=16000)
+        cue = player.cue("sleep", path)
+        channel = player.channels["edge"] = RemoteShell("edge", command=["sh"])  # Local shell stands in for ssh
+        await player._play_remote(cue, "edge", 400, 0.0)
+        proc = channel.proc
+        await player._play_remote(cue, "edge", 400, 0.0)
+        assert channel.proc is proc and channel.uploaded == {"sleep"}
+        assert await channel.run("false") == 1
+        player.stop()
+        return cue
+
+    cue = asyncio.run(run())
+    with open(tmp_path / "remote" / "sleep.wav", "rb") as f:
+        assert f.read() == cue.wav_bytes
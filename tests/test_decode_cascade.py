@@ -0,0 +1,64 @@
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.ai.cascade import DecodeCascade
+from twin.ai.transcribe import decode_segments
+
+Segment = namedtuple("Segment", "start end text avg_logprob no_speech_prob compression_ratio")
+SR = 16000
+
+
+class FakeModel:
+    """Greedy decodes get the second half wrong; beam searches get it right"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def transcribe(self, audio, beam_size=5, **kwargs):
+        self.calls.append((audio.shape[0] / SR, beam_size))
+        duration = audio.shape[0] / SR
+        if beam_size > 1:
+            return iter([Segment(0.2, duration - 0.2, f"{self.name} lights", -0.2, 0.05, 1.3)]), None
+        return iter([
+            Segment(0.0, 1.0, "turn on", -0.1, 0.02, 1.2),
+            Segment(1.0, 2.0, "the the the the", -1.2, 0.1, 3.1),
+        ]), None
+
+
+def test_confident_segments_stay_on_the_cheap_path():
+    cascade = DecodeCascade(beam_size=1, fallback_beam=5)
+    model = FakeModel("small")
+    segments, _ = cascade.decode(decode_segments, model, np.zeros(2 * SR, dtype=np.float32), fallback_model=None)
+
+    # One greedy pass over the window, then one beam pass over the flagged span only
+    assert model.calls[0] == (2.0, 1)
+    assert model.calls[1][1] == 5 and abs(model.calls[1][0] - 1.2) < 1e-6
+    assert [s.text for s in segments] == ["turn on", "small lights"]
+    # The re-decoded segment is back on the window's timeline
+    assert abs(segments[1].start - 1.0) < 1e-6
+
+    stats = cascade.stats()
+    assert stats["cheap_segments"] == 1 and stats["escalated_segments"] == 1
+    assert stats["escalation_rate"] == 0.5
+
+
+def test_escalation_uses_fallback_model():
+    cascade = DecodeCascade()
+    small, full = FakeModel("small"), FakeModel("full")
+    segments, _ = cascade.decode(decode_segments, small, np.zeros(2 * SR, dtype=np.float32), fallback_model=full)
+    assert len(small.calls) == 1 and len(full.calls) == 1
+    assert segments[-1].text == "full lights"
+
+
+def test_flag_reasons():
+    cascade = DecodeCascade(min_logprob=-0.7, max_no_speech=0.5, max_compression=2.4)
+    assert cascade.flag(Segment(0, 1, "", -0.3, 0.1, 1.5)) is None
+    assert cascade.flag(Segment(0, 1, "", -0.9, 0.1, 1.5)) == "logprob"
+    assert cascade.flag(Segment(0, 1, "", -0.3, 0.8, 1.5)) == "no_speech"
+    assert cascade.flag(Segment(0, 1, "", -0.3, 0.1, 2.8)) == "compression"
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.echo import PlaybackTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_playback_gates_its_room_until_tail_expires():
+    clock = FakeClock()
+    tracker = PlaybackTracker(tail=0.5, default_duration=2.0, clock=clock)
+    with tracker.playing("office", "wake"):
+        clock.now += 1.0
+        assert tracker.active("office")
+        assert not tracker.active("kitchen")
+        assert tracker.active(None)  # A source without a room hears everything
+    clock.now += 0.4
+    assert tracker.active("office")
+    clock.now += 0.2
+    assert not tracker.active("office")
+    # An utterance that started during the tail still overlaps
+    assert tracker.overlaps("office", clock.now - 0.3, clock.now)
+    assert not tracker.overlaps("office", clock.now - 0.05, clock.now)
+
+
+def test_unfinished_playback_uses_learned_actuator_duration():
+    clock = FakeClock()
+    tracker = PlaybackTracker(tail=0.0, default_duration=2.0, smoothing=0.5, clock=clock)
+    playback = tracker.begin("office", "tts")
+    assert playback.end - playback.start == 2.0
+    clock.now += 4.0
+    tracker.end(playback)
+    assert tracker.estimate("office", "tts") == 4.0
+    assert tracker.estimate("kitchen", "tts") == 2.0
+
+    # Stop event never arrives: the estimate bounds the gate
+    tracker.begin("office", "tts")
+    clock.now += 3.9
+    assert tracker.active("office")
+    clock.now += 0.2
+    assert not tracker.active("office")
+
+
+def test_playback_without_room_is_heard_everywhere():
+    clock = FakeClock()
+    tracker = PlaybackTracker(tail=0.5, clock=clock)
+    with tracker.playing(None, "sleep"):
+        assert tracker.active("kitchen") and tracker.active("office")
+    assert tracker.stats()["estimates"] == {"*.sleep": 0.0}
@@ -0,0 +1,77 @@
+import os
+import sys
+import math
+import importlib.util
+from array import array
+from types import SimpleNamespace
+
+spec = importlib.util.spec_from_file_location(
+    "rtsp_mic_server", os.path.join(os.path.dirname(__file__), '..', 'scripts', 'rtsp_mic_server.py'))
+rtsp_mic_server = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(rtsp_mic_server)
+
+SR = 16000
+FRAME = 480  # 30 ms
+
+
+def frame(amplitude, seed=0):
+    samples = array('h', [int(amplitude * math.sin(0.3 * (i + seed * FRAME))) for i in range(FRAME)])
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples.tobytes()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(amplitudes):
+    clock = FakeClock()
+    sent = []
+    vad = rtsp_mic_server.EdgeVAD(SR, threshold_db=9.0, min_rms=150, hangover=0.3)
+    gate = rtsp_mic_server.EdgeGate(vad, sent.append, preroll=0.09, marker=0.3, keepalive=1.0, clock=clock)
+    for i, amplitude in enumerate(amplitudes):
+        clock.now = i * 0.03
+        gate.feed(frame(amplitude, i))
+    return gate, sent
+
+
+def test_silent_room_sends_only_keepalives():
+    gate, sent = run([40] * 1000)  # 30 s of quiet background
+    stats = gate.stats()
+    assert stats["bursts"] == 0 and stats["speech_duty_cycle"] == 0
+    assert all(f == bytes(FRAME * 2) for f in sent)
+    assert 25 <= len(sent) <= 31  # ~one frame per keepalive second
+    assert stats["bytes_sent"] < 0.05 * stats["bytes_continuous"]
+
+
+def test_speech_burst_is_forwarded_with_preroll_and_silence_marker():
+    amplitudes = [40] * 100 + [4000] * 30 + [40] * 100
+    gate, sent = run(amplitudes)
+    speech = [f for f in sent if f != bytes(FRAME * 2)]
+    # Speech starts on the second loud frame: pre-roll covers the onset frame and the two
+    # quiet frames before it, then the rest of the burst and 0.3 s of hangover
+    assert speech == [frame(a, i) for i, a in enumerate(amplitudes)][98:139]
+    marker_start = sent.index(speech[-1]) + 1
+    assert sent[marker_start:marker_start + 10] == [bytes(FRAME * 2)] * 10
+    assert gate.stats()["bursts"] == 1
+    assert 0.1 < gate.stats()["speech_duty_cycle"] < 0.25
+
+
+def test_edge_publisher_stderr_is_drained(monkeypatch):
+    # A chatty publisher: far more stderr than a pipe buffer holds, then it exits
+    chatty = "import sys\nfor i in range(5000):\n    sys.stderr.write('RTSP reconnect attempt %d\\n' % i)\nsys.exit(1)"
+    server = rtsp_mic_server.AudioStreamingServer(edge_vad=True)
+    monkeypatch.setattr(server, "build_ffmpeg_command", lambda: [sys.executable, '-c', chatty])
+    monkeypatch.setattr(server, "start_edge_gate", lambda: None)
+    # Let the publisher die instead of sleeping through the connect wait
+    monkeypatch.setattr(rtsp_mic_server, "time", SimpleNamespace(sleep=lambda seconds: server.ffmpeg_process.wait(timeout=10)))
+
+    assert server.start_streaming() is False
+    stdout, stderr = server.publisher_output()
+    assert stdout == ""
+    assert stderr.splitlines() == ['RTSP reconnect attempt %d' % i for i in range(4980, 5000)]
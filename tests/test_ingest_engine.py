@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio import ingest
+from twin.audio.health import SourceHealthManager
+from twin.audio.ingest import IngestEngine
+
+CHUNK = 256
+
+# Stand-ins for ffmpeg: each writes float32 PCM of one constant value to stdout
+STREAMING = "import array, sys, time\nb = array.array('f', [{value}] * 1024).tobytes()\nfor _ in range(16):\n    sys.stdout.buffer.write(b); sys.stdout.flush(); time.sleep(0.03)\ntime.sleep(30)"
+ENDING = "import array, sys\nsys.stdout.buffer.write(array.array('f', [{value}] * 512).tobytes())"
+
+
+def fake_ffmpeg(rtsp_url, sample_rate, channels, latency_flags=None, sample_format='f32'):
+    kind, value = rtsp_url.split('://')[1].split('/')
+    script = STREAMING if kind == 'stream' else ENDING
+    return [sys.executable, '-c', script.format(value=value)]
+
+
+def test_sources_are_demultiplexed_and_eof_does_not_stall_others(monkeypatch):
+    health = SourceHealthManager()
+    monkeypatch.setattr(ingest, "get_source_health", lambda: health)
+    monkeypatch.setattr(ingest, "build_ffmpeg_command", fake_ffmpeg)
+
+    received = {}
+
+    def collector(url):
+        def callback(indata, frames, time_info, status):
+            received.setdefault(url, []).append((time.monotonic(), indata[:, 0].copy()))
+        return callback
+
+    urls = ["rtsp://stream/1.0", "rtsp://ending/2.0", "rtsp://stream/3.0"]
+    engine = IngestEngine(select_timeout=0.1)
+    try:
+        sources = {url: engine.add_source(url, collector(url), sample_rate=16000, chunk_size=CHUNK, buffer_size=32000) for url in urls}
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline and not all(sum(len(c) for _, c in received.get(url, [])) >= 16000 for url in urls[::2]):
+            time.sleep(0.05)
+    finally:
+        engine.stop()
+
+    for url in urls:
+        value = float(url.rsplit('/', 1)[1])
+        samples = np.concatenate([chunk for _, chunk in received[url]])
+        # Every chunk went to its own source's callback and ring, never a neighbour's
+        assert np.all(samples == value)
+        assert np.all(sources[url].buffer.latest(256) == value)
+
+    # The ending source hit EOF and was scheduled for reconnection...
+    assert health.stats()["ending/2.0"]["failures"] >= 1
+    assert sum(len(c) for _, c in received[urls[1]]) >= 512
+    # ...while the streaming sources kept delivering after it went away
+    eof_time = received[urls[1]][-1][0]
+    for url in urls[::2]:
+        assert sum(len(c) for _, c in received[url]) >= 16000
+        assert received[url][-1][0] > eof_time + 0.1
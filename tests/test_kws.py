@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.kws import KeywordSpotter, FeatureExtractor, main as kws_main
+
+SR = 16000
+KEYWORD = [300, 500, 800, 400, 650]  # Stand-in "phrase": a sequence of harmonic tones
+OTHER = [700, 350, 900, 250, 550]
+
+
+def phrase(freqs, rate=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    parts = []
+    for f in freqs:
+        t = np.arange(int(0.15 * SR / rate)) / SR
+        parts.append(sum(np.sin(2 * np.pi * f * k * t) / k for k in (1, 2, 3)) * 0.2)
+    audio = np.concatenate(parts)
+    return (audio + 0.01 * rng.standard_normal(audio.shape[0])).astype(np.float32)
+
+
+def in_background(audio, seed=0, seconds=2.0):
+    background = (0.01 * np.random.default_rng(seed).standard_normal(int(seconds * SR))).astype(np.float32)
+    background[5000:5000 + audio.shape[0]] += audio
+    return background
+
+
+def test_features_shape():
+    features = FeatureExtractor(SR)
+    audio = phrase(KEYWORD)
+    assert features.log_mel(audio).shape == (1 + (audio.shape[0] - 400) // 160, 40)
+    assert features.mfcc(audio).shape[1] == 12
+
+
+def test_spotter_separates_keyword_from_other_speech():
+    spotter = KeywordSpotter({}, threshold=0.1, sample_rate=SR)
+    for i, rate in enumerate((0.9, 1.0, 1.1)):
+        spotter.enroll("hey twin", phrase(KEYWORD, rate, seed=i))
+
+    hit = spotter.detect(in_background(phrase(KEYWORD, 0.8, seed=10)))
+    assert hit is not None and hit.keyword == "hey twin"
+    assert 0.3 < hit.end_time < 1.5
+    assert spotter.detect(in_background(phrase(OTHER, seed=11))) is None
+    assert spotter.detect(in_background(np.zeros(0, dtype=np.float32))) is None
+
+
+def test_enroll_and_report_cli(tmp_path, capsys):
+    for i, rate in enumerate((0.9, 1.0, 1.1)):
+        sf.write(tmp_path / f"enroll_{i}.wav", phrase(KEYWORD, rate, seed=i), SR)
+    positives, negatives = tmp_path / "positive", tmp_path / "negative"
+    positives.mkdir()
+    negatives.mkdir()
+    for i in range(3):
+        sf.write(positives / f"{i}.wav", in_background(phrase(KEYWORD, 0.85 + 0.1 * i, seed=20 + i), seed=i), SR)
+        sf.write(negatives / f"{i}.wav", in_background(phrase(OTHER, seed=30 + i), seed=10 + i, seconds=4.0), SR)
+    templates = str(tmp_path / "kws.npz")
+
+    kws_main(["--templates", templates, "enroll", "--keyword", "hey twin", str(tmp_path / "enroll_0.wav"), str(tmp_path / "enroll_1.wav"), str(tmp_path / "enroll_2.wav")])
+    spotter = KeywordSpotter.load(templates, sample_rate=SR)
+    assert len(spotter.templates["hey twin"]) == 3
+    assert 0 < spotter.threshold < 1
+
+    capsys.readouterr()
+    kws_main(["--templates", templates, "report", "--positive", str(positives), "--negative", str(negatives)])
+    report = capsys.readouterr().out
+    current = next(line for line in report.splitlines() if "<- current" in line).split()
+    assert current[1] == "0.0%"  # No false rejects at the enrolled threshold
+    assert current[2] == "0"  # No false accepts
@@ -0,0 +1,66 @@
+import os
+import sys
+import asyncio
+import importlib
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+SR = 16000
+
+
+class SilentModel:
+    def transcribe(self, audio, **kwargs):
+        return iter([]), None
+
+
+class FakeRunner:
+    cleaned = False
+
+    async def cleanup(self):
+        self.cleaned = True
+
+
+def test_replay_source_runs_main_to_a_clean_exit(tmp_path, monkeypatch):
+    pytest.importorskip("sounddevice")
+    pytest.importorskip("torch")
+    recording = tmp_path / "office.wav"
+    sf.write(recording, np.zeros(SR, dtype=np.int16), SR, subtype='PCM_16')
+
+    monkeypatch.setattr(sys, "argv", ["twin"])
+    main = importlib.import_module("twin.main")
+    from twin.ai import executor as executor_module
+    from twin.core import config
+
+    monkeypatch.setattr(config, "AUDIO_SOURCE", "replay")
+    monkeypatch.setattr(config, "REPLAY_PATHS", [str(recording)])
+    monkeypatch.setattr(config, "REPLAY_SPEED", 0.0)
+    monkeypatch.setattr(config, "REPLAY_LOOP", False)
+    monkeypatch.setattr(config, "RECORD_DIR", "")
+    monkeypatch.setattr(config, "CUE_PLAYBACK", "subprocess")
+    monkeypatch.setattr(config, "WAKE_ENGINE", "text")
+    monkeypatch.setattr(config, "QC_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(main.args, "asleep_model", "")
+    monkeypatch.setattr(main.args, "remote_transcribe", None)
+    monkeypatch.setattr(main, "log_available_audio_devices", lambda: None)
+    monkeypatch.setattr(main.sd, "query_devices", lambda: [])
+    monkeypatch.setattr(main, "init_transcription_model", lambda *args, **kwargs: SilentModel())
+    runner = FakeRunner()
+
+    async def start_webserver(context):
+        return runner
+    monkeypatch.setattr(main, "start_webserver", start_webserver)
+
+    executor = executor_module.TranscriptionExecutor(workers=1)
+    shutdowns = []
+    original_shutdown = executor.shutdown
+    monkeypatch.setattr(executor, "shutdown", lambda: (shutdowns.append(True), original_shutdown()))
+    monkeypatch.setattr(executor_module, "transcription_executor", executor)
+
+    # The replay ends, its source task returns and main() must get through its whole cleanup
+    asyncio.run(asyncio.wait_for(main.main(), 30))
+    assert shutdowns == [True]
+    assert runner.cleaned
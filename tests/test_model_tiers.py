@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.ai.tiers import ModelTiers
+from twin.ai.cache import TranscriptionCache
+
+
+def test_rooms_switch_models_independently():
+    tiers = ModelTiers("full", "small")
+    assert tiers.select("office") == ("small", "small")
+    tiers.wake("office")
+    assert tiers.select("office") == ("full", "full")
+    assert tiers.select("kitchen") == ("small", "small")
+    tiers.wake()  # Local mic or external command: every room
+    assert tiers.select("kitchen") == ("full", "full")
+    tiers.sleep()
+    assert tiers.select("office") == ("small", "small")
+    assert tiers.stats()["awake"] == []
+
+
+def test_without_small_model_everything_uses_full():
+    tiers = ModelTiers("full")
+    assert tiers.select("office") == ("full", "full")
+
+
+def test_cache_keys_do_not_cross_models():
+    import numpy as np
+    cache = TranscriptionCache()
+    audio = np.zeros(16000, dtype=np.float32)
+    small, full = object(), object()
+    cache.put(cache.key(audio, namespace=f"local.{id(small)}"), ["small text"], 0.1)
+    assert cache.get(cache.key(audio, namespace=f"local.{id(full)}")) is None
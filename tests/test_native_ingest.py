@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import asyncio
+import struct
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio import native_ingest
+from twin.audio.health import SourceHealthManager
+from twin.audio.native_ingest import HTTPWavSource, NativePCMSource, RTPL16Source, parse_sdp_audio, parse_wav_header
+from twin.core.room_manager import RoomManager
+
+SR = 16000
+
+
+def wav_header(sample_rate=SR, channels=1, bits=16, audio_format=1):
+    fmt = struct.pack('<HHIIHH', audio_format, channels, sample_rate, sample_rate * channels * bits // 8, channels * bits // 8, bits)
+    # Streaming writers cannot know the sizes up front
+    return b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'LIST' + struct.pack('<I', 4) + b'INFO' + b'data' + struct.pack('<I', 0xFFFFFFFF)
+
+
+def ramp(n):
+    return (np.arange(n) % 2000 - 1000).astype(np.int16)
+
+
+async def collect(source, frames, timeout=5):
+    received = []
+    source.start(lambda indata, n, time_info, status: received.append(indata[:, 0].copy()))
+    deadline = asyncio.get_running_loop().time() + timeout
+    while sum(len(r) for r in received) < frames and source.is_running and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    source.stop()
+    return np.concatenate(received) if received else np.zeros(0, dtype=np.int16)
+
+
+def use_private_health(monkeypatch):
+    health = SourceHealthManager(cache_path=None)
+    monkeypatch.setattr(native_ingest, "get_source_health", lambda: health)
+    return health
+
+
+def test_parse_wav_header_skips_extra_chunks():
+    header = wav_header()
+    assert parse_wav_header(header[:30]) is None
+    codec, sample_rate, channels, offset = parse_wav_header(header + b'\x01\x00')
+    assert (codec, sample_rate, channels, offset) == ('pcm_s16le', SR, 1, len(header))
+
+
+def test_parse_sdp_audio():
+    sdp = "v=0\r\nm=video 0 RTP/AVP 96\r\na=control:trackID=0\r\nm=audio 0 RTP/AVP 97\r\na=rtpmap:97 L16/16000/1\r\na=control:trackID=1\r\n"
+    assert parse_sdp_audio(sdp, "rtsp://h:8554/mic/") == (97, 'pcm_s16be', SR, 1, "rtsp://h:8554/mic/trackID=1")
+
+
+def test_http_chunked_wav(monkeypatch):
+    use_private_health(monkeypatch)
+    audio = ramp(SR)
+
+    async def handle(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: audio/wav\r\nTransfer-Encoding: chunked\r\n\r\n")
+        payload = wav_header() + audio.tobytes()
+        for i in range(0, len(payload), 777):  # Chunk boundaries split the header and samples
+            part = payload[i:i + 777]
+            writer.write(b"%x\r\n" % len(part) + part + b"\r\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        source = HTTPWavSource(f"http://127.0.0.1:{port}/", sample_rate=SR, chunk_size=1000, sample_format='s16')
+        received = await collect(source, 15000)
+        server.close()
+        return received
+
+    received = asyncio.run(run())
+    assert len(received) >= 15000 and np.array_equal(received, audio[:len(received)])
+
+
+def test_http_wav_in_other_format_falls_back_to_ffmpeg(monkeypatch):
+    health = use_private_health(monkeypatch)
+
+    async def handle(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        writer.write(b"HTTP/1.0 200 OK\r\n\r\n" + wav_header(sample_rate=48000) + bytes(4000))
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+        source = HTTPWavSource(url, sample_rate=SR)
+        await collect(source, 1, timeout=2)
+        server.close()
+        return source, url
+
+    source, url = asyncio.run(run())
+    assert source.unsupported and not source.is_running
+    info = health.cached_info(url)
+    assert info.codec == 'pcm_s16le' and info.sample_rate == 48000
+    assert not native_ingest.can_ingest_natively(info, SR, 1)
+
+
+def test_native_source_requires_a_transport():
+    with pytest.raises(TypeError):
+        NativePCMSource("http://127.0.0.1/")
+
+
+def test_http_sources_come_from_source_mappings(tmp_path):
+    path = tmp_path / "source_locations.json"
+    path.write_text(json.dumps({"source_mappings": {
+        "rtsp://cam:8554/office": "office",
+        "http://pi.local:8080/mic.wav": "kitchen",
+        "HTTPS://pi.local/mic.wav": "garage",
+        "hw:1,0": "bedroom",
+    }}))
+    sources = RoomManager(str(path)).get_stream_sources()
+    assert [(s["url"], s["location"]) for s in sources] == [
+        ("rtsp://cam:8554/office", "office"),
+        ("http://pi.local:8080/mic.wav", "kitchen"),
+        ("HTTPS://pi.local/mic.wav", "garage"),
+    ]
+
+
+def test_rtsp_l16_over_interleaved_tcp(monkeypatch):
+    rtsp_l16_session(monkeypatch)
+
+
+def test_lost_rtp_packets_are_filled_with_silence(monkeypatch):
+    # Packets 5 and 6 never arrive; a duplicate of packet 8 arrives late
+    rtsp_l16_session(monkeypatch, lost={5, 6}, late=8)
+
+
+def test_sequence_jump_resyncs_without_filling(monkeypatch):
+    # The publisher restarts with a new initial sequence number, ahead of or behind the old one
+    rtsp_l16_session(monkeypatch, jump=(10, 30000))
+    rtsp_l16_session(monkeypatch, jump=(10, -20000))
+
+
+def rtsp_l16_session(monkeypatch, lost=(), late=None, jump=None):
+    use_private_health(monkeypatch)
+    audio = ramp(8000)
+    sdp = "v=0\r\nm=audio 0 RTP/AVP 97\r\na=rtpmap:97 L16/16000/1\r\na=control:trackID=0\r\n"
+    methods = []
+
+    async def handle(reader, writer):
+        while True:
+            head = (await reader.readuntil(b'\r\n\r\n')).decode()
+            method = head.split()[0]
+            methods.append(method)
+            cseq = [line for line in head.split('\r\n') if line.startswith('CSeq')][0]
+            if method == 'DESCRIBE':
+                writer.write(f"RTSP/1.0 200 OK\r\n{cseq}\r\nContent-Type: application/sdp\r\nContent-Length: {len(sdp)}\r\n\r\n{sdp}".encode())
+            elif method == 'SETUP':
+                writer.write(f"RTSP/1.0 200 OK\r\n{cseq}\r\nSession: abc;timeout=60\r\nTransport: RTP/AVP/TCP;interleaved=0-1\r\n\r\n".encode())
+            elif method == 'PLAY':
+                writer.write(f"RTSP/1.0 200 OK\r\n{cseq}\r\nSession: abc\r\n\r\n".encode())
+                big_endian = audio.astype('>i2').tobytes()
+                packets = []
+                for seq, i in enumerate(range(0, len(big_endian), 640)):
+                    sequence = (seq + jump[1]) & 0xFFFF if jump and seq >= jump[0] else seq
+                    packets.append(struct.pack('!BBHII', 0x80, 97, sequence, seq * 320, 1234) + big_endian[i:i + 640])
+                    if seq in lost:
+                        continue
+                    writer.write(b'$' + struct.pack('!BH', 0, len(packets[seq])) + packets[seq])
+                    if late is not None and seq == late + 2:
+                        writer.write(b'$' + struct.pack('!BH', 0, len(packets[late])) + packets[late])
+                    if seq == 3:
+                        rtcp = b'\x80\xc8' + bytes(26)
+                        writer.write(b'$' + struct.pack('!BH', 1, len(rtcp)) + rtcp)
+                await writer.drain()
+                await asyncio.sleep(5)
+                return
+
+    async def run():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        source = RTPL16Source(f"rtsp://user:pw@127.0.0.1:{port}/mic", sample_rate=SR, chunk_size=400, sample_format='f32')
+        received = await collect(source, 8000)
+        server.close()
+        return received
+
+    received = asyncio.run(run())
+    assert methods == ['DESCRIBE', 'SETUP', 'PLAY']
+    expected = audio.astype(np.float32) / 32768
+    for seq in lost:
+        expected[seq * 320:(seq + 1) * 320] = 0
+    np.testing.assert_allclose(received, expected)
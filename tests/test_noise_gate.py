@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.ring_buffer import AudioRingBuffer
+from twin.audio.gate import NoiseGate, signal_rms
+
+SR = 16000
+
+
+def noise(level, seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return (level * rng.standard_normal(int(SR * seconds))).astype(np.float32)
+
+
+def test_floor_tracks_each_source():
+    hum = AudioRingBuffer(SR * 3, block_size=1600, history_blocks=300)
+    quiet = AudioRingBuffer(SR * 3, block_size=1600, history_blocks=300)
+    hum.write(noise(0.05, 10))
+    quiet.write(noise(0.001, 10))
+
+    hum_gate = NoiseGate(hum, snr_db=6, min_rms=0.0005, sample_rate=SR)
+    quiet_gate = NoiseGate(quiet, snr_db=6, min_rms=0.0005, sample_rate=SR)
+
+    # The same moderate voice level is noise in the loud room but speech on the quiet mic
+    voice = 0.03
+    assert not hum_gate.check(voice)
+    assert quiet_gate.check(voice)
+    assert hum_gate.threshold() > 0.05
+    assert quiet_gate.threshold() < 0.01
+
+
+def test_gate_open_rate_and_int16_audio():
+    buffer = AudioRingBuffer(SR * 3, dtype=np.int16, block_size=1600, history_blocks=300)
+    buffer.write((noise(0.01, 10) * 32768).astype(np.int16))
+    gate = NoiseGate(buffer, snr_db=6, min_rms=0.0005, sample_rate=SR)
+
+    assert not gate.check_recent()
+    loud = (noise(0.1, 1, seed=1) * 32768).astype(np.int16)
+    assert abs(signal_rms(loud) - 0.1) < 0.01
+    assert gate.check_audio(loud)
+
+    stats = gate.stats()
+    assert stats["checks"] == 2
+    assert stats["opens"] == 1
+    assert stats["open_rate"] == 0.5
+    assert 0.005 < stats["noise_floor"] < 0.02
+
+
+def test_empty_buffer_uses_absolute_floor():
+    gate = NoiseGate(AudioRingBuffer(SR), min_rms=0.002)
+    assert gate.noise_floor() is None
+    assert gate.threshold() == 0.002
+    assert not gate.check_recent()
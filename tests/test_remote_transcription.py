@@ -0,0 +1,130 @@
+import io
+import os
+import sys
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+import soundfile as sf
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.ai import remote_client
+from twin.ai.remote_client import RemoteTranscriptionClient, RemoteTranscriptionError, encode_upload
+
+
+def speech(seconds=1.0, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("encoding", ["int16", "flac", "opus"])
+def test_compressed_uploads_decode_and_shrink(encoding):
+    audio = speech()
+    payload, filename, _ = encode_upload(audio, 16000, encoding)
+    float_payload, _, _ = encode_upload(audio, 16000, 'float')
+    assert len(payload) < len(float_payload) * 0.51
+    decoded, sample_rate = sf.read(io.BytesIO(payload), dtype='float32')
+    assert sample_rate == 16000
+    assert abs(decoded.shape[0] - audio.shape[0]) < 1000
+    assert filename.endswith({'int16': '.wav', 'flac': '.flac', 'opus': '.ogg'}[encoding])
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_post('/transcribe', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/transcribe"
+
+
+def test_pooled_requests_respect_concurrency_and_reuse_connections():
+    peers, active, peak = set(), [0], [0]
+
+    async def handler(request):
+        peers.add(request.transport.get_extra_info('peername'))
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        form = await request.post()
+        await asyncio.sleep(0.05)
+        active[0] -= 1
+        return web.json_response({"transcription": f" {form['file'].filename} "})
+
+    async def scenario():
+        runner, url = await serve(handler)
+        client = RemoteTranscriptionClient(url, encoding='flac', max_concurrency=2)
+        try:
+            results = await asyncio.gather(*(client.transcribe(speech(0.2)) for _ in range(6)))
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == ["audio.flac"] * 6
+    assert peak[0] == 2
+    assert len(peers) <= 2  # Keep-alive: six requests over at most two connections
+
+
+def test_deadline_and_encoding_fallback():
+    async def slow(request):
+        await asyncio.sleep(1.0)
+        return web.json_response({"transcription": "late"})
+
+    async def wav_only(request):
+        form = await request.post()
+        if not form['file'].filename.endswith('.wav'):
+            return web.Response(status=415)
+        return web.json_response({"transcription": "hello"})
+
+    async def scenario():
+        runner, url = await serve(slow)
+        client = RemoteTranscriptionClient(url, timeout=0.2)
+        try:
+            with pytest.raises(RemoteTranscriptionError):
+                await client.transcribe(speech(0.2))
+            assert client.timeouts == 1
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+        runner, url = await serve(wav_only)
+        client = RemoteTranscriptionClient(url, encoding='opus')
+        try:
+            assert await client.transcribe(speech(0.2)) == "hello"
+            assert client.encoding == 'int16'
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_encoding_runs_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def recording_encode(*args):
+        threads.append(threading.current_thread())
+        return encode_upload(*args)
+    monkeypatch.setattr(remote_client, "encode_upload", recording_encode)
+
+    async def handler(request):
+        await request.post()
+        return web.json_response({"transcription": "ok"})
+
+    async def scenario():
+        runner, url = await serve(handler)
+        client = RemoteTranscriptionClient(url, encoding='flac')
+        try:
+            assert await client.transcribe(speech(0.2)) == "ok"
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.replay import AudioRecorder, FileAudioSource, list_recordings, load_recording
+
+SR = 16000
+
+
+def ramp(n, start=0):
+    return ((np.arange(start, start + n) % 20000) - 10000).astype(np.int16)
+
+
+def test_fast_replay_of_directory_loses_nothing(tmp_path):
+    sf.write(tmp_path / "a.wav", ramp(SR), SR, subtype='PCM_16')
+    sf.write(tmp_path / "b.flac", ramp(SR // 2, start=SR), SR, subtype='PCM_16')
+    ramp(SR // 4, start=SR + SR // 2).tofile(tmp_path / "c.raw")
+    (tmp_path / "notes.txt").write_text("ignored")
+    assert [os.path.basename(p) for p in list_recordings(str(tmp_path))] == ["a.wav", "b.flac", "c.raw"]
+
+    received = []
+    source = FileAudioSource(str(tmp_path), sample_rate=SR, chunk_size=1000, buffer_size=4000, speed=0, sample_format='s16')
+    source.start(lambda indata, frames, time_info, status: received.append(indata[:, 0].copy()))
+
+    # Slow consumer: read what the ring holds, then acknowledge it
+    cursor = 0
+    collected = []
+    deadline = time.time() + 10
+    while not source.finished and time.time() < deadline:
+        audio, cursor = source.buffer.since(cursor)
+        collected.append(audio)
+        time.sleep(0.001)
+        source.acknowledge(cursor)
+    audio, cursor = source.buffer.since(cursor)
+    collected.append(audio)
+
+    expected = ramp(SR + SR // 2 + SR // 4)
+    assert source.finished
+    assert np.array_equal(np.concatenate(collected), expected)
+    assert np.array_equal(np.concatenate(received), expected)
+
+
+def test_paced_replay_follows_speed(tmp_path):
+    path = tmp_path / "tone.wav"
+    sf.write(path, np.zeros(SR // 2, dtype=np.float32), SR, subtype='FLOAT')
+    source = FileAudioSource(str(path), sample_rate=SR, chunk_size=800, buffer_size=SR, speed=4.0)
+    start = time.monotonic()
+    source.start(None)
+    while not source.finished and time.monotonic() - start < 5:
+        time.sleep(0.005)
+    elapsed = time.monotonic() - start
+    assert source.samples_played == SR // 2
+    assert 0.08 < elapsed < 0.5  # 0.5 s of audio at 4x is ~0.125 s
+
+
+def test_resampled_wav_loads_at_pipeline_rate(tmp_path):
+    path = tmp_path / "hi.wav"
+    sf.write(path, np.zeros(48000, dtype=np.float32), 48000)
+    audio = load_recording(str(path), SR)
+    assert audio.shape == (SR, 1)
+    assert audio.dtype == np.float32
+
+
+def test_recorder_round_trips_through_replay(tmp_path):
+    recorder = AudioRecorder(str(tmp_path), "kitchen@192.168.1.101", SR, 's16', segment_seconds=1)
+    recorder.start()
+    for i in range(24):
+        recorder.queue.put(ramp(1000, start=i * 1000))
+    recorder.stop()
+
+    files = list_recordings(str(tmp_path))
+    assert files and all(os.path.basename(f).startswith("kitchen_192.168.1.101-") for f in files)
+    recorded = np.concatenate([load_recording(f, SR, sample_format='s16')[:, 0] for f in files])
+    assert np.array_equal(recorded, ramp(24000))
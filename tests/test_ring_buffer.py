@@ -0,0 +1,87 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.ring_buffer import AudioRingBuffer
+
+
+def test_latest_matches_deque_semantics():
+    buf = AudioRingBuffer(10)
+    reference = []
+    for start in range(0, 57, 7):
+        chunk = np.arange(start, start + 7, dtype=np.float32)
+        buf.write(chunk)
+        reference.extend(chunk.tolist())
+        reference = reference[-10:]
+        assert buf.snapshot().tolist() == reference
+        assert buf.latest(3).tolist() == reference[-3:]
+    assert len(buf) == 10
+    assert buf.total_written == 63
+
+
+def test_view_is_contiguous_and_read_only():
+    buf = AudioRingBuffer(8)
+    buf.write(np.arange(13, dtype=np.float32))
+    view = buf.latest(8, copy=False)
+    assert view.flags.c_contiguous
+    assert not view.flags.writeable
+    assert view.tolist() == list(range(5, 13))
+
+
+def test_oversized_chunk_keeps_tail():
+    buf = AudioRingBuffer(4)
+    buf.write(np.arange(10, dtype=np.float32))
+    assert buf.snapshot().tolist() == [6, 7, 8, 9]
+    buf.write(np.array([10], dtype=np.float32))
+    assert buf.snapshot().tolist() == [7, 8, 9, 10]
+
+
+def test_partial_fill_and_clear():
+    buf = AudioRingBuffer(16)
+    assert len(buf.snapshot()) == 0
+    buf.write(np.ones(5, dtype=np.float32))
+    assert len(buf) == 5
+    assert buf.latest(100).shape == (5,)
+    buf.clear()
+    assert len(buf) == 0
+
+
+def test_running_rms_tracks_window():
+    rng = np.random.default_rng(0)
+    buf = AudioRingBuffer(1000, block_size=100)
+    assert np.isnan(buf.rms())
+    for _ in range(50):
+        buf.write(rng.normal(0, 0.1, size=rng.integers(1, 400)).astype(np.float32))
+        window = buf.snapshot().astype(np.float64)
+        assert np.isclose(buf.rms(), np.sqrt(np.mean(window ** 2)), rtol=1e-6)
+
+
+def test_block_history_peak_and_noise_floor():
+    buf = AudioRingBuffer(1000, block_size=100)
+    buf.write(np.full(900, 0.01, dtype=np.float32))
+    buf.write(np.full(100, 0.5, dtype=np.float32))
+    assert len(buf.block_energies()) == 10
+    assert np.isclose(buf.recent_rms(100), 0.5)
+    assert np.isclose(buf.peak(), 0.5)
+    assert np.isclose(buf.noise_floor(), 0.01, rtol=1e-4)
+    stats = buf.energy_stats()
+    assert stats["samples"] == 1000
+
+
+def test_int16_stats_are_relative_to_full_scale():
+    tone = (0.5 * np.sin(np.linspace(0, 200 * np.pi, 16000))).astype(np.float32)
+    as_int16 = (tone * 32768).astype(np.int16)
+
+    f32 = AudioRingBuffer(16000, block_size=1000)
+    s16 = AudioRingBuffer(16000, dtype=np.int16, block_size=1000)
+    f32.write(tone)
+    s16.write(as_int16)
+
+    assert s16.snapshot().dtype == np.int16
+    assert s16.rms() == pytest.approx(f32.rms(), rel=1e-3)
+    assert s16.peak() == pytest.approx(f32.peak(), rel=1e-3)
+    assert s16.noise_floor() == pytest.approx(f32.noise_floor(), rel=1e-3)
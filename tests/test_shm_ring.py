@@ -0,0 +1,117 @@
+import os
+import sys
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.shm_ring import SharedAudioRing
+
+
+def _write_ramp(name, blocks, block_size):
+    ring = SharedAudioRing.attach(name, np.int16)
+    for i in range(blocks):
+        ring.write(np.arange(i * block_size, (i + 1) * block_size, dtype=np.int16))
+    ring.mark_closed()
+    ring.close()
+
+
+def test_since_and_latest_follow_the_sequence_counter():
+    ring = SharedAudioRing.create(100, np.float32)
+    try:
+        ring.write(np.arange(30, dtype=np.float32))
+        data, cursor = ring.since(0)
+        assert cursor == 30 and np.array_equal(data, np.arange(30))
+        ring.write(np.arange(30, 110, dtype=np.float32))
+        assert len(ring) == 100
+        assert np.array_equal(ring.latest(5), np.arange(105, 110))
+        data, cursor = ring.since(cursor)
+        assert cursor == 110 and np.array_equal(data, np.arange(30, 110))
+        view = ring.latest(3, copy=False)
+        assert not view.flags.writeable
+    finally:
+        ring.close()
+
+
+def test_lapped_reader_loses_only_overwritten_audio():
+    ring = SharedAudioRing.create(64, np.int16)
+    try:
+        ring.write(np.arange(200, dtype=np.int16))
+        data, cursor = ring.since(10)
+        assert cursor == 200
+        assert np.array_equal(data, np.arange(136, 200))
+    finally:
+        ring.close()
+
+
+def test_writer_in_another_process():
+    ring = SharedAudioRing.create(4096, np.int16)
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        writer = ctx.Process(target=_write_ramp, args=(ring.name, 10, 256))
+        writer.start()
+        writer.join(timeout=30)
+        assert writer.exitcode == 0
+        assert ring.closed
+        data, cursor = ring.since(0)
+        assert cursor == 2560 and np.array_equal(data, np.arange(2560))
+    finally:
+        ring.close()
+
+
+def test_write_in_progress_is_trimmed_from_the_reader():
+    ring = SharedAudioRing.create(64, np.int16)
+    try:
+        ring.write(np.arange(64, dtype=np.int16))
+        # The writer has announced a 16-sample write but not published it yet
+        ring._header[3] = 64 + 16
+        data, cursor = ring.since(0)
+        assert cursor == 64
+        assert np.array_equal(data, np.arange(16, 64))
+    finally:
+        ring.close()
+
+
+def test_worker_health_reaches_the_main_process(monkeypatch):
+    from twin.audio import capture_worker
+    from twin.audio.health import SourceHealthManager
+
+    worker_health, main_health = SourceHealthManager(), SourceHealthManager()
+    sent = []
+    worker_health.listener = lambda *status: sent.append(status)
+    worker_health.record_spawn("rtsp://cam/1")
+    worker_health.record_failure("rtsp://cam/1", "connection refused")
+
+    monkeypatch.setattr(capture_worker, "get_source_health", lambda: main_health)
+    for status in sent:
+        capture_worker.apply_worker_status(*status)
+    assert sent[1] == ("failure", "rtsp://cam/1", "connection refused")
+    assert main_health.stats()["cam/1"]["failures"] == 1
+    assert main_health.stats()["cam/1"]["spawns"] == 1
+    assert main_health.delay("rtsp://cam/1") > 0
+
+
+def test_shutdown_unlinks_rings_and_stops_workers():
+    import asyncio
+    from multiprocessing import shared_memory
+    from twin.audio import capture_worker
+    from twin.audio.rtsp_audio import stop_capture_backends
+
+    async def scenario():
+        capture_worker.capture_pool = capture_worker.CaptureWorkerPool()
+        source = capture_worker.capture_pool.add_source("rtsp://127.0.0.1:9/none", lambda *args: None)
+        worker = capture_worker.capture_pool.workers[0]
+        name = source.buffer.name
+        stop_capture_backends()
+        return worker, name
+
+    worker, name = asyncio.run(scenario())
+    assert capture_worker.capture_pool is None
+    assert not worker.is_alive()
+    try:
+        shared_memory.SharedMemory(name=name).close()
+        leaked = True
+    except FileNotFoundError:
+        leaked = False
+    assert not leaked
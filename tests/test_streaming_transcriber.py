@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.ai.streaming import StreamingTranscriber
+
+SAMPLE_RATE = 16000
+SCRIPT = [" Hey", " twin.", " turn", " on", " the", " lights."]  # one word every 0.5 s
+
+
+class FakeWord:
+    def __init__(self, word, start, end):
+        self.word = word
+        self.start = start
+        self.end = end
+
+
+class FakeSegment:
+    def __init__(self, words):
+        self.words = words
+        self.no_speech_prob = 0.0
+
+
+class ScriptedModel:
+    """Returns the scripted words that lie inside the decoded window, relative to its start"""
+
+    def __init__(self):
+        self.calls = 0
+        self.stream_end = 0.0
+
+    def transcribe(self, audio, **kwargs):
+        self.calls += 1
+        offset = self.stream_end - audio.shape[0] / SAMPLE_RATE
+        words = []
+        for i, word in enumerate(SCRIPT):
+            start, end = i * 0.5, i * 0.5 + 0.5
+            if end <= self.stream_end and start >= offset - 1e-6:
+                words.append(FakeWord(word, start - offset, end - offset))
+        return [FakeSegment(words)], None
+
+
+def test_commits_agreed_prefix_once_and_flushes_on_final():
+    model = ScriptedModel()
+    streamer = StreamingTranscriber(model, sample_rate=SAMPLE_RATE, hop=1.0)
+    audio = np.zeros(SAMPLE_RATE * 4, dtype=np.float32)
+    released = []
+    for end in (0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5):
+        model.stream_end = end
+        samples = int(end * SAMPLE_RATE)
+        if streamer.due(0, samples):
+            released.append(streamer.update(0, audio[:samples]))
+    released.append(streamer.update(0, audio[:int(3.5 * SAMPLE_RATE)], final=True))
+
+    texts = [text for batch in released for text in batch]
+    assert texts == ["Hey twin.", "turn on the lights."]
+    # Four hop-spaced decodes plus the final flush, not one per tick
+    assert model.calls == 5
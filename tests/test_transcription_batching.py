@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import asyncio
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.ai.batching import TranscriptionBroker
+
+Segment = namedtuple("Segment", "start end text")
+
+
+class FakeBatchedPipeline:
+    """Emits one segment per clip, named after the clip's first sample value"""
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.calls = []
+
+    def transcribe(self, audio, clip_timestamps=None, batch_size=None, **kwargs):
+        self.calls.append((audio.shape[0], batch_size))
+        clips = clip_timestamps or [{"start": 0, "end": audio.shape[0]}]
+
+        def segments():
+            for clip in clips:
+                start, end = clip["start"] / self.sample_rate, clip["end"] / self.sample_rate
+                yield Segment(start + 0.1, end, f"clip-{audio[clip['start']]:.1f}")
+        return segments(), None
+
+
+def test_concurrent_segments_share_one_batched_decode():
+    pipeline = FakeBatchedPipeline(1000)
+    broker = TranscriptionBroker(None, batch_size=3, max_wait=0.5, sample_rate=1000, pipeline=pipeline)
+
+    async def scenario():
+        return await asyncio.gather(*(
+            broker.submit(np.full(500 * (i + 1), i, dtype=np.float32), source=f"room{i}")
+            for i in range(3)
+        ))
+
+    started = time.monotonic()
+    results = asyncio.run(scenario())
+    assert time.monotonic() - started < 0.5  # A full batch does not wait out the budget
+    assert pipeline.calls == [(3000, 3)]
+    for i, (segments, _) in enumerate(results):
+        assert [s.text for s in segments] == [f"clip-{i:.1f}"]
+        # Timestamps are relative to each source's own audio
+        assert abs(segments[0].start - 0.1) < 1e-6
+        assert abs(segments[0].end - 0.5 * (i + 1)) < 1e-6
+
+    stats = broker.stats()
+    assert stats["batches"] == 1
+    assert stats["mean_batch"] == 3
+    assert stats["audio_seconds"] == 3.0
+
+
+def test_lone_segment_is_flushed_after_wait_budget():
+    pipeline = FakeBatchedPipeline(1000)
+    broker = TranscriptionBroker(None, batch_size=4, max_wait=0.05, sample_rate=1000, pipeline=pipeline)
+
+    async def scenario():
+        first = await broker.submit(np.full(200, 1, dtype=np.float32))
+        second = await broker.submit(np.full(200, 2, dtype=np.float32))
+        return first, second
+
+    (first, _), (second, _) = asyncio.run(scenario())
+    assert [s.text for s in first] == ["clip-1.0"]
+    assert [s.text for s in second] == ["clip-2.0"]
+    assert len(pipeline.calls) == 2
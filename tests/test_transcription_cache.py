@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import asyncio
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.ai.cache import TranscriptionCache, audio_fingerprint
+from twin.ai import cache as cache_module
+from twin.ai.transcribe import transcribe_audio
+
+Segment = namedtuple("Segment", "start end text avg_logprob no_speech_prob")
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **kwargs):
+        self.calls += 1
+        time.sleep(0.02)
+        return iter([Segment(0.0, 1.0, "turn on the lights", -0.1, 0.01)]), None
+
+
+def window(seed=0, noise=0.0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(16000) / 16000
+    audio = 0.3 * np.sin(2 * np.pi * 200 * t) * (t < 0.6)
+    return (audio + noise * rng.standard_normal(t.shape[0])).astype(np.float32)
+
+
+def test_fingerprint_tolerates_noise_but_not_new_audio():
+    base = audio_fingerprint(window(noise=0.0005))
+    assert audio_fingerprint(window(seed=1, noise=0.0005)) == base
+    louder = window()
+    louder[12000:] += 0.2  # A tail of new sound
+    assert audio_fingerprint(louder) != base
+
+
+def test_same_audio_later_in_the_stream_hits():
+    cache = TranscriptionCache()
+    cache.put(cache.key(window(noise=0.0005), namespace="remote"), ["turn on the lights"], 0.5)
+    # The same utterance repeated (e.g. a replayed recording) at another stream position
+    assert cache.get(cache.key(window(seed=7, noise=0.0005), namespace="remote")) == ["turn on the lights"]
+    assert cache.get(cache.key(window(seed=7, noise=0.0005), namespace="local.1")) is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TranscriptionCache(max_entries=2)
+    cache.put("a", ["A"], 1.0)
+    cache.put("b", ["B"], 1.0)
+    assert cache.get("a") == ["A"]
+    cache.put("c", ["C"], 1.0)
+    assert cache.get("b") is None
+    assert cache.get("a") == ["A"] and cache.get("c") == ["C"]
+
+
+def test_repeated_window_skips_decode(monkeypatch):
+    monkeypatch.setattr(cache_module, "transcription_cache", TranscriptionCache(max_entries=8))
+    model = CountingModel()
+
+    async def scenario():
+        results = []
+        for seed in range(3):
+            results.append(await transcribe_audio(model=model, audio_data=window(seed=seed, noise=0.0005), recent_transcriptions=[]))
+        return results
+
+    results = asyncio.run(scenario())
+    assert model.calls == 1
+    assert [texts for texts, _ in results] == [["turn on the lights"]] * 3
+    stats = cache_module.transcription_cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 3)
+    assert stats["saved_seconds"] >= 0.04
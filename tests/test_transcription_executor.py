@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.ai.executor import TranscriptionExecutor, TranscriptionDropped
+from twin.utils.metrics import get_metrics
+
+
+def slow_decode(seconds, text):
+    time.sleep(seconds)  # Stands in for a blocking Whisper decode
+    return text
+
+
+def test_decodes_do_not_block_the_event_loop():
+    async def scenario():
+        executor = TranscriptionExecutor(workers=1, max_queue=4)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        results = await asyncio.gather(
+            executor.run(slow_decode, 0.15, "one", source="exec-a"),
+            executor.run(slow_decode, 0.15, "two", source="exec-b"),
+        )
+        task.cancel()
+        executor.shutdown()
+        return results, ticks
+
+    results, ticks = asyncio.run(scenario())
+    assert results == ["one", "two"]
+    assert ticks >= 15  # The loop kept running through ~0.3s of decoding
+
+    timings = get_metrics().snapshot()["timings"]
+    # The second job waited for the first, and that wait is not counted as decode time
+    assert timings["transcribe.exec-b.queue_wait_seconds"]["last"] >= 0.1
+    assert timings["transcribe.exec-b.decode_seconds"]["last"] < 0.3
+    assert timings["transcribe.exec-a.queue_wait_seconds"]["last"] < 0.1
+
+
+@pytest.mark.parametrize("policy, shed, kept", [
+    ("drop-newest", "third", "second"),
+    ("drop-oldest", "second", "third"),
+])
+def test_full_queue_policies(policy, shed, kept):
+    async def scenario():
+        executor = TranscriptionExecutor(workers=1, max_queue=1, policy=policy)
+        release = threading.Event()
+        busy = asyncio.create_task(executor.run(release.wait, source="exec-p"))
+        await asyncio.sleep(0.05)  # The worker is now occupied
+        second = asyncio.create_task(executor.run(slow_decode, 0, "second"))
+        await asyncio.sleep(0.01)
+        third = asyncio.create_task(executor.run(slow_decode, 0, "third"))
+        await asyncio.sleep(0.01)
+        release.set()
+        outcomes = {}
+        for name, task in (("second", second), ("third", third)):
+            try:
+                outcomes[name] = await task
+            except TranscriptionDropped:
+                outcomes[name] = None
+        await busy
+        stats = executor.stats()
+        executor.shutdown()
+        return outcomes, stats
+
+    outcomes, stats = asyncio.run(scenario())
+    assert outcomes[shed] is None
+    assert outcomes[kept] == kept
+    assert stats["dropped"] == 1
+    assert stats["completed"] == 2
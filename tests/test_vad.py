@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.vad import StreamingEndpointer
+
+SAMPLE_RATE = 16000
+
+
+def make_signal(duration, bursts, seed=1):
+    """Low-level noise with voiced-like tone bursts at the given (start, end) seconds"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * duration)) / SAMPLE_RATE
+    x = rng.normal(0, 0.002, t.shape[0])
+    for start, end in bursts:
+        mask = (t >= start) & (t < end)
+        x[mask] += 0.05 * np.sin(2 * np.pi * 220 * t[mask]) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t[mask]))
+    return x.astype(np.float32)
+
+
+def run(endpointer, signal, chunk=1024):
+    segments = []
+    for i in range(0, signal.shape[0], chunk):
+        end = min(i + chunk, signal.shape[0])
+        segments += endpointer.feed(signal[i:end], timestamp=1000.0 + end / SAMPLE_RATE)
+    return segments
+
+
+def test_one_segment_per_utterance_with_pre_roll_and_hangover():
+    endpointer = StreamingEndpointer(SAMPLE_RATE, pre_roll=0.3, hangover=0.6)
+    segments = run(endpointer, make_signal(8, [(1.0, 2.5), (5.0, 6.0)]))
+    assert len(segments) == 2
+    first, second = segments
+    assert abs(first.start_sample / SAMPLE_RATE - 0.7) < 0.1
+    assert 2.5 + 0.5 < first.end_sample / SAMPLE_RATE < 2.5 + 0.8
+    assert first.audio.shape[0] == first.end_sample - first.start_sample
+    assert not first.forced
+    assert abs(first.start_time - (1000.0 + first.start_sample / SAMPLE_RATE)) < 1e-6
+    assert second.start_time > first.end_time
+
+
+def test_long_speech_is_split_not_truncated():
+    endpointer = StreamingEndpointer(SAMPLE_RATE, max_utterance=3.0)
+    segments = run(endpointer, make_signal(12, [(1.0, 8.0)]))
+    assert [s.forced for s in segments][:2] == [True, True]
+    assert segments[-1].end_sample / SAMPLE_RATE > 8.0
+    for previous, current in zip(segments, segments[1:]):
+        assert current.start_sample == previous.end_sample
+
+
+def test_silence_and_short_blips_emit_nothing():
+    endpointer = StreamingEndpointer(SAMPLE_RATE, min_speech=0.25)
+    assert run(endpointer, make_signal(5, [(2.0, 2.1)])) == []
+
+
+def test_flush_emits_the_utterance_cut_off_by_end_of_input():
+    endpointer = StreamingEndpointer(SAMPLE_RATE, hangover=0.6)
+    signal = make_signal(3, [(1.0, 2.9)])
+    assert run(endpointer, signal) == []
+    segments = endpointer.flush()
+    assert len(segments) == 1
+    assert segments[0].end_sample == signal.shape[0]
+    assert abs(segments[0].start_sample / SAMPLE_RATE - 0.7) < 0.1
+    assert endpointer.flush() == [] and not endpointer.in_speech
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twin.audio.wakeup import ArrivalNotifier
+from twin.utils.metrics import get_metrics
+
+
+def test_capture_thread_wakes_consumer_and_latency_is_recorded():
+    async def scenario():
+        notifier = ArrivalNotifier("test-source")
+        assert not await notifier.wait(timeout=0.01)
+
+        def capture():
+            time.sleep(0.02)
+            for _ in range(50):  # A burst of blocks coalesces into one wakeup
+                notifier.notify()
+
+        threading.Thread(target=capture).start()
+        start = time.monotonic()
+        assert await notifier.wait(timeout=2)
+        woke_after = time.monotonic() - start
+        # Nothing new since the wakeup, so the next wait times out
+        assert not await notifier.wait(timeout=0.01)
+        return woke_after
+
+    woke_after = asyncio.run(scenario())
+    assert woke_after < 0.5
+    timing = get_metrics().snapshot()["timings"]["pipeline.test-source.arrival_to_processing_seconds"]
+    assert timing["count"] == 1
+    assert timing["max"] < 0.5